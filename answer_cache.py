@@ -0,0 +1,188 @@
+"""
+Antwort-Cache für wiederkehrende Fragen
+LRU + TTL im Speicher, optional als JSON-Datei über Neustarts hinweg persistiert
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_PUNCTUATION_PATTERN = re.compile(r'[^\w\s]')
+_WHITESPACE_PATTERN = re.compile(r'\s+')
+
+
+def normalize_question(question: str) -> str:
+    """
+    Normalisiert eine Frage für Cache-Schlüssel (lowercase, ohne Satzzeichen, einfache Leerzeichen)
+    """
+    text = _PUNCTUATION_PATTERN.sub(' ', question.lower())
+    return _WHITESPACE_PATTERN.sub(' ', text).strip()
+
+
+class ResponseCache:
+    """
+    Begrenzter Cache mit LRU-Verdrängung und Ablaufzeit pro Eintrag
+    Begrenzt wird sowohl die Anzahl der Einträge als auch die Gesamtzahl der Zeichen
+    """
+
+    def __init__(self, max_entries: int = 512, ttl_seconds: float = 3600,
+                 max_chars: int = 4_000_000, persist_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_chars = max_chars
+        self.persist_path = Path(persist_path) if persist_path else None
+
+        # key -> (wert, ablaufzeitpunkt als Unix-Zeit)
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._chars = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        """
+        Baut einen kompakten Schlüssel aus beliebigen Bestandteilen
+        """
+        raw = "\x1f".join(str(part) for part in parts)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Gibt den gecachten Wert zurück oder None (abgelaufene Einträge werden entfernt)
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        value, expires_at = entry
+        if expires_at <= time.time():
+            self._remove(key)
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: str, value: str):
+        """
+        Speichert einen Wert und verdrängt bei Bedarf die am längsten unbenutzten Einträge
+        """
+        if not value or len(value) > self.max_chars:
+            return
+        if key in self._entries:
+            self._remove(key)
+
+        self._entries[key] = (value, time.time() + self.ttl_seconds)
+        self._chars += len(value)
+
+        while self._entries and (len(self._entries) > self.max_entries or self._chars > self.max_chars):
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+            self.evictions += 1
+
+    def clear(self):
+        """
+        Leert den Cache (z.B. nach dem Neuladen der Wissensdatenbank)
+        """
+        if self._entries:
+            logger.info(f"🧹 Cache geleert ({len(self._entries)} Einträge)")
+        self._entries.clear()
+        self._chars = 0
+
+    def _remove(self, key: str):
+        value, _ = self._entries.pop(key)
+        self._chars -= len(value)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def load(self):
+        """
+        Lädt persistierte Einträge (sofern konfiguriert); abgelaufene werden übersprungen
+        """
+        if not self.persist_path or not self.persist_path.exists():
+            return
+        try:
+            with open(self.persist_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            now = time.time()
+            for key, value, expires_at in data.get("entries", []):
+                if expires_at > now:
+                    self._entries[key] = (value, expires_at)
+                    self._chars += len(value)
+            logger.info(f"💾 {len(self._entries)} Cache-Einträge aus {self.persist_path} geladen")
+        except (OSError, ValueError) as e:
+            logger.error(f"❌ Cache-Datei {self.persist_path} konnte nicht gelesen werden: {e}")
+
+    def save(self):
+        """
+        Schreibt alle gültigen Einträge atomar in die Cache-Datei (sofern konfiguriert)
+        """
+        if not self.persist_path:
+            return
+        try:
+            now = time.time()
+            entries = [
+                [key, value, expires_at]
+                for key, (value, expires_at) in self._entries.items()
+                if expires_at > now
+            ]
+            self.persist_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.persist_path.with_suffix(self.persist_path.suffix + '.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"entries": entries}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.persist_path)
+            logger.info(f"💾 {len(entries)} Cache-Einträge nach {self.persist_path} geschrieben")
+        except OSError as e:
+            logger.error(f"❌ Cache-Datei {self.persist_path} konnte nicht geschrieben werden: {e}")
+
+    def get_stats(self) -> Dict[str, float]:
+        """
+        Gibt Treffer-/Fehlschlag-Zähler und die aktuelle Größe zurück
+        """
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "chars": self._chars,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+        }
+
+
+def answer_cache_key(question: str, chunk_ids: Iterable[int], knowledge_version: str) -> str:
+    """
+    Schlüssel für den Antwort-Cache: normalisierte Frage + Chunk-IDs + Wissensstand
+    """
+    return ResponseCache.make_key(
+        normalize_question(question),
+        ",".join(str(chunk_id) for chunk_id in chunk_ids),
+        knowledge_version
+    )
+
+
+def image_digest(data: bytes) -> str:
+    """
+    Exakter Inhalts-Hash eines Bildes (für den Vision-Cache)
+    """
+    return hashlib.sha256(data).hexdigest()
+
+
+def vision_cache_key(digest: str, question: str, knowledge_version: str) -> str:
+    """
+    Schlüssel für den Vision-Cache: Bild-Hash + normalisierte Frage + Wissensstand
+    """
+    return ResponseCache.make_key(digest, normalize_question(question), knowledge_version)
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Durchsatz des Chunkers
+
+Vergleicht den bisherigen Chunker (legacy_chunker.py, String-Verkettung auf drei
+Ebenen) mit dem span-basierten TextChunker:
+- "legacy": LegacyTextChunker.split_into_chunks
+- "spans": TextChunker.iter_spans (nur Bereiche, kein Text wird kopiert)
+- "chunks": TextChunker.split_into_chunks (Bereiche plus Ausschneiden)
+- "overlap": wie "chunks" mit --overlap Zeichen Überlappung
+
+Gemessen wird auf Blöcken von --block Zeichen (wie beim Laden von Text-Dateien)
+sowie auf einem Text mit sehr langen Absätzen ohne Leerzeilen, in dem der alte
+Chunker auf Satz- und Wortebene ausweichen muss.
+
+Aufruf (aus dem Projektordner):
+    python benchmarks/bench_chunker.py --sizes 10MB 100MB
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_retrieval import MB, environment  # noqa: E402
+from corpus_generator import format_size, iter_blocks, parse_size  # noqa: E402
+from legacy_chunker import LegacyTextChunker  # noqa: E402
+from text_chunker import TextChunker  # noqa: E402
+
+
+def make_runners(overlap: int):
+    legacy = LegacyTextChunker()
+    chunker = TextChunker()
+    overlapping = TextChunker(overlap=overlap)
+    return {
+        "legacy": legacy.split_into_chunks,
+        "spans": lambda text: list(chunker.iter_spans(text)),
+        "chunks": chunker.split_into_chunks,
+        "overlap": overlapping.split_into_chunks,
+    }
+
+
+def measure(split, blocks) -> dict:
+    chunks = 0
+    characters = 0
+    seconds = 0.0
+    for block in blocks:
+        started = time.perf_counter()
+        chunks += len(split(block))
+        seconds += time.perf_counter() - started
+        characters += len(block)
+    return {
+        "chunks": chunks,
+        "seconds": round(seconds, 4),
+        "mb_per_s": round(characters / MB / seconds, 2) if seconds else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", nargs="+", default=["10MB", "50MB"], help="Korpusgrößen")
+    parser.add_argument("--block", default="1MB", help="Blockgröße pro Aufruf (wie beim Laden von Text-Dateien)")
+    parser.add_argument("--overlap", type=int, default=200, help="Überlappung für den Fall 'overlap'")
+    parser.add_argument("--seed", type=int, default=1, help="Seed des Korpus")
+    parser.add_argument("--json", action="store_true", help="Ergebnisse als JSON ausgeben")
+    args = parser.parse_args()
+
+    runners = make_runners(args.overlap)
+    block_chars = parse_size(args.block)
+    results = []
+    if not args.json:
+        print(f"{'Größe':>7} {'Text':<12}" + "".join(f"{name + ' MB/s':>14}" for name in runners))
+    for size in (parse_size(value) for value in args.sizes):
+        layouts = {
+            "absätze": lambda: iter_blocks(size, args.seed, block_chars),
+            # Absätze nur durch einfache Zeilenumbrüche getrennt (z.B. aus PDFs extrahiert)
+            "fließtext": lambda: (block.replace("\n\n", "\n") for block in iter_blocks(size, args.seed, block_chars)),
+        }
+        for layout, blocks in layouts.items():
+            row = {"size": format_size(size), "layout": layout}
+            for name, split in runners.items():
+                row[name] = measure(split, blocks())
+            results.append(row)
+            if not args.json:
+                print(f"{row['size']:>7} {layout:<12}" + "".join(f"{row[name]['mb_per_s']!s:>14}" for name in runners),
+                      flush=True)
+
+    if args.json:
+        print(json.dumps({"environment": environment(), "block": args.block, "overlap": args.overlap,
+                          "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
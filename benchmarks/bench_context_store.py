@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Kosten von store_message_context pro Nachricht
+
+Vergleicht den reinen Speicher-Kontext, den Write-Behind-Puffer mit SQLite
+(ContextDatabase) und zum Vergleich ein direktes INSERT + COMMIT pro Nachricht.
+Gemessen wird nur der Aufruf im Nachrichtenpfad, nicht das Schreiben im Hintergrund.
+
+Aufruf (aus dem Projektordner):
+    python benchmarks/bench_context_store.py --messages 50000 --channels 200 --users 2000
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from context_db import ContextDatabase  # noqa: E402
+from context_store import ContextStore  # noqa: E402
+
+
+def make_messages(count: int, channels: int, users: int, seed: int = 42):
+    """
+    Erzeugt reproduzierbare (channel_id, user_id, text)-Tupel
+    """
+    rng = random.Random(seed)
+    words = ["Versand", "Lieferung", "Rückgabe", "Preis", "Shop", "order", "shipping", "refund", "wie", "was"]
+    return [
+        (rng.randrange(channels), rng.randrange(users), " ".join(rng.choices(words, k=rng.randint(3, 20))))
+        for _ in range(count)
+    ]
+
+
+def summarize(name: str, timings: list) -> dict:
+    timings.sort()
+    count = len(timings)
+    return {
+        "variant": name,
+        "messages": count,
+        "mean_us": round(sum(timings) / count * 1e6, 2),
+        "p50_us": round(timings[count // 2] * 1e6, 2),
+        "p99_us": round(timings[min(count - 1, int(count * 0.99))] * 1e6, 2),
+        "max_us": round(timings[-1] * 1e6, 2),
+    }
+
+
+async def bench_memory(messages) -> dict:
+    store = ContextStore()
+    timings = []
+    for index, (channel_id, user_id, text) in enumerate(messages):
+        started = time.perf_counter()
+        store.add(channel_id, user_id, text)
+        timings.append(time.perf_counter() - started)
+        if index % 100 == 0:
+            await asyncio.sleep(0)
+    return summarize("memory", timings)
+
+
+async def bench_write_behind(messages, db_path: Path, flush_interval: float) -> dict:
+    store = ContextStore()
+    database = ContextDatabase(db_path=str(db_path), flush_interval=flush_interval)
+    flush_task = asyncio.create_task(database.run())
+    timings = []
+    try:
+        for index, (channel_id, user_id, text) in enumerate(messages):
+            started = time.perf_counter()
+            database.enqueue(store.add(channel_id, user_id, text))
+            timings.append(time.perf_counter() - started)
+            if index % 100 == 0:
+                # Dem Hintergrund-Flush Gelegenheit geben, wie im echten Event-Loop
+                await asyncio.sleep(0)
+    finally:
+        flush_task.cancel()
+        await database.close()
+
+    result = summarize("sqlite_write_behind", timings)
+    result.update({"flushes": database.flushes, "written": database.written})
+
+    # Warm-Load nach einem "Neustart"
+    restored_store = ContextStore(max_messages=store.max_messages)
+    restarted = ContextDatabase(db_path=str(db_path))
+    started = time.perf_counter()
+    restored = await restarted.warm_load(restored_store, limit=store.max_messages)
+    result["warm_load_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    result["warm_loaded"] = restored
+    await restarted.close()
+    return result
+
+
+def bench_sync_commit(messages, db_path: Path) -> dict:
+    store = ContextStore()
+    connection = sqlite3.connect(str(db_path))
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("CREATE TABLE context_messages (channel_id INTEGER, user_id INTEGER, content TEXT, timestamp REAL)")
+    timings = []
+    for channel_id, user_id, text in messages:
+        started = time.perf_counter()
+        record = store.add(channel_id, user_id, text)
+        with connection:
+            connection.execute("INSERT INTO context_messages VALUES (?, ?, ?, ?)",
+                               (channel_id, user_id, text, record.timestamp))
+        timings.append(time.perf_counter() - started)
+    connection.close()
+    return summarize("sqlite_commit_per_message", timings)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=50000, help="Anzahl Nachrichten")
+    parser.add_argument("--channels", type=int, default=200, help="Anzahl Channels")
+    parser.add_argument("--users", type=int, default=2000, help="Anzahl User")
+    parser.add_argument("--flush-interval", type=float, default=0.05, help="Flush-Intervall in Sekunden")
+    parser.add_argument("--sync-messages", type=int, default=2000,
+                        help="Nachrichten für die Variante mit COMMIT pro Nachricht (langsam)")
+    parser.add_argument("--json", action="store_true", help="Ergebnisse als JSON ausgeben")
+    args = parser.parse_args()
+
+    messages = make_messages(args.messages, args.channels, args.users)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        results = [
+            await bench_memory(messages),
+            await bench_write_behind(messages, Path(tmp_dir) / "context.sqlite3", args.flush_interval),
+            bench_sync_commit(messages[:args.sync_messages], Path(tmp_dir) / "sync.sqlite3"),
+        ]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'Variante':<28}{'Nachr.':>8}{'Mittel µs':>12}{'p50 µs':>10}{'p99 µs':>10}{'max µs':>12}")
+    for result in results:
+        print(f"{result['variant']:<28}{result['messages']:>8}{result['mean_us']:>12}"
+              f"{result['p50_us']:>10}{result['p99_us']:>10}{result['max_us']:>12}")
+    write_behind = results[1]
+    print(f"\nWrite-Behind: {write_behind['written']} Nachrichten in {write_behind['flushes']} Flushes, "
+          f"Warm-Load von {write_behind['warm_loaded']} Nachrichten in {write_behind['warm_load_ms']} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
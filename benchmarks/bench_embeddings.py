@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Vektorsuche (embeddings.py) im Vergleich zur Schlüsselwortsuche
+
+Misst auf synthetischen Chunks (ein Absatz = ein Chunk):
+- Einbetten: Chunks pro Sekunde und Größe der Vektor-Dateien (int8/float16)
+- Suche: Latenz der exakten Suche (flat) und des IVF-Index, Recall@10 von IVF
+  gegenüber flat
+- Trefferquote bei abgewandelten Wortformen ("Lieferzeiten" statt "Lieferzeit"):
+  Anteil der Anfragen, bei denen ein Top-5-Treffer den gesuchten Begriff enthält,
+  für keyword (BM25), semantic und hybrid
+
+Aufruf (aus dem Projektordner, benötigt numpy):
+    python benchmarks/bench_embeddings.py --chunks 10k 100k
+"""
+
+import argparse
+import json
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_retrieval import environment, peak_rss_mb, percentiles  # noqa: E402
+from bench_scoring import format_count, make_chunks, parse_count  # noqa: E402
+from corpus_generator import QUERIES  # noqa: E402
+from embeddings import EmbeddingIndex, EmbeddingStore, fuse_rankings  # noqa: E402
+from retrieval import BM25Engine  # noqa: E402
+
+# (Anfrage mit abgewandelter Wortform, Begriff, der im Treffer vorkommen soll)
+WORD_FORM_QUERIES = [
+    ("Wie lang sind die Lieferzeiten?", "lieferzeit"),
+    ("Welche Zahlungsanbietern sind sinnvoll?", "zahlungsanbieter"),
+    ("Produktbilder verbessern", "produktbild"),
+    ("Wie vermeide ich Abmahnungen?", "abmahnung"),
+    ("Wer zahlt die Zollgebühr?", "zollgebühren"),
+    ("Mehrere Kampagnen gleichzeitig", "kampagne"),
+    ("Gute Lieferanten finden", "lieferant"),
+    ("Werbeanzeigen testen", "werbeanzeige"),
+    ("How fast are refunds?", "refund"),
+    ("Which carriers are cheap?", "carrier"),
+    ("Finding suppliers", "supplier"),
+    ("Invoices for customers", "invoice"),
+    ("Cheap warehouses", "warehouse"),
+    ("Best sellers this month", "best seller"),
+    ("Campaigns for new audiences", "audience"),
+    ("Chargebacks from customers", "chargeback"),
+]
+
+
+def hit_rate(rankings, chunks, top: int = 5) -> float:
+    hits = 0
+    for (_, term), ranking in zip(WORD_FORM_QUERIES, rankings):
+        if any(term in chunks[chunk_id].lower() for chunk_id, _ in ranking[:top]):
+            hits += 1
+    return round(hits / len(WORD_FORM_QUERIES), 3)
+
+
+def timed_search(search, queries, repeat: int):
+    timings, results = [], []
+    for _ in range(repeat):
+        results = []
+        for query in queries:
+            started = time.perf_counter()
+            results.append(search(query))
+            timings.append(time.perf_counter() - started)
+    return results, percentiles(timings)
+
+
+def run_case(count: int, seed: int, repeat: int, dtype: str, nprobe: int, cache_dir: Path) -> dict:
+    chunks = make_chunks(count, seed)
+
+    store = EmbeddingStore(cache_dir=str(cache_dir), dtype=dtype, ivf_min_chunks=0, nprobe=nprobe)
+    started = time.perf_counter()
+    parts = [store.load_or_build(chunks)]
+    embed_seconds = time.perf_counter() - started
+    disk_bytes = sum(path.stat().st_size for path in cache_dir.glob("*.npy"))
+
+    flat = EmbeddingIndex(store.embedder, parts, ivf_min_chunks=0, min_score=0.0)
+    started = time.perf_counter()
+    ivf = EmbeddingIndex(store.embedder, parts, ivf_min_chunks=1, nprobe=nprobe, min_score=0.0)
+    ivf_seconds = time.perf_counter() - started
+
+    queries = QUERIES + [query for query, _ in WORD_FORM_QUERIES]
+    flat_results, flat_latency = timed_search(lambda query: flat.search(query, 10), queries, repeat)
+    ivf_results, ivf_latency = timed_search(lambda query: ivf.search(query, 10), queries, repeat)
+    recall = sum(len({chunk_id for chunk_id, _ in exact} & {chunk_id for chunk_id, _ in approx})
+                 for exact, approx in zip(flat_results, ivf_results)) / max(1, sum(map(len, flat_results)))
+
+    bm25 = BM25Engine().build(chunks)
+    keyword, _ = timed_search(lambda query: bm25.search(query, 10), [q for q, _ in WORD_FORM_QUERIES], 1)
+    semantic = flat_results[len(QUERIES):]
+    hybrid = [fuse_rankings([k, s])[:10] for k, s in zip(keyword, semantic)]
+
+    return {
+        "chunks": count,
+        "label": format_count(count),
+        "dtype": dtype,
+        "embed_seconds": round(embed_seconds, 2),
+        "embed_chunks_per_s": round(count / embed_seconds) if embed_seconds else None,
+        "disk_mb": round(disk_bytes / (1024 * 1024), 1),
+        "ivf_lists": ivf.nlist,
+        "ivf_build_seconds": round(ivf_seconds, 2),
+        "flat": flat_latency,
+        "ivf": ivf_latency,
+        "ivf_recall_at_10": round(recall, 3),
+        "word_form_hit_rate": {
+            "keyword": hit_rate(keyword, chunks),
+            "semantic": hit_rate(semantic, chunks),
+            "hybrid": hit_rate(hybrid, chunks),
+        },
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", nargs="+", default=["10k", "100k"], help="Chunk-Anzahlen, z.B. 10k 1M")
+    parser.add_argument("--dtype", choices=["int8", "float16"], default="int8", help="Speicherformat der Vektoren")
+    parser.add_argument("--nprobe", type=int, default=8, help="Durchsuchte IVF-Partitionen")
+    parser.add_argument("--repeat", type=int, default=3, help="Durchläufe über alle Anfragen")
+    parser.add_argument("--seed", type=int, default=1, help="Seed des Korpus")
+    parser.add_argument("--json", action="store_true", help="Ergebnisse als JSON ausgeben")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    results = []
+    for count in (parse_count(value) for value in args.chunks):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            result = run_case(count, args.seed, args.repeat, args.dtype, args.nprobe, Path(cache_dir))
+        results.append(result)
+        if not args.json:
+            rates = result["word_form_hit_rate"]
+            print(f"{result['label']:>6} Chunks: Einbetten {result['embed_chunks_per_s']}/s, {result['disk_mb']} MB; "
+                  f"flat p50 {result['flat']['p50_ms']} ms, IVF ({result['ivf_lists']} Listen) "
+                  f"p50 {result['ivf']['p50_ms']} ms, Recall@10 {result['ivf_recall_at_10']}; "
+                  f"Wortformen keyword {rates['keyword']} / semantic {rates['semantic']} / hybrid {rates['hybrid']}",
+                  flush=True)
+
+    if args.json:
+        print(json.dumps({"environment": environment(), "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
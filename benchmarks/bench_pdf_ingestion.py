@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Benchmark: PDF-Extraktion in Seiten pro Sekunde bei steigender Prozessanzahl
+
+Erzeugt eine synthetische PDF-Datei mit PyMuPDF und extrahiert sie mit
+KnowledgeBase._extract_pdf_content für verschiedene Werte von pdf_workers.
+
+Aufruf (aus dem Projektordner):
+    python benchmarks/bench_pdf_ingestion.py --pages 2000 --workers 1 2 4 8
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import fitz  # noqa: E402
+from knowledge_base import KnowledgeBase  # noqa: E402
+
+SAMPLE_TEXT = (
+    "Der Versand erfolgt innerhalb von drei Werktagen. Rücksendungen sind "
+    "innerhalb von 14 Tagen möglich. Shipping usually takes three business days "
+    "and returns are accepted within two weeks. "
+)
+
+
+def create_pdf(path: Path, pages: int, lines_per_page: int = 30):
+    """
+    Schreibt eine PDF-Datei mit gleichförmig gefüllten Textseiten
+    """
+    doc = fitz.open()
+    for page_num in range(pages):
+        page = doc.new_page()
+        text = "\n".join(f"{page_num + 1}.{line}: {SAMPLE_TEXT}" for line in range(lines_per_page))
+        # insert_textbox fügt nichts ein und gibt einen negativen Wert zurück, wenn der Text nicht passt
+        free_space = page.insert_textbox(fitz.Rect(36, 36, 576, 806), text, fontsize=7)
+        if free_space < 0:
+            doc.close()
+            raise ValueError(f"{lines_per_page} Zeilen passen nicht auf eine Seite (es fehlen {-free_space:.1f}pt)")
+    doc.save(str(path))
+    doc.close()
+
+
+async def measure(pdf_path: Path, workers: int, pages_per_task: int, repeat: int) -> dict:
+    """
+    Misst die Extraktion einer Datei mit der angegebenen Prozessanzahl
+    """
+    with tempfile.TemporaryDirectory() as data_folder:
+        knowledge_base = KnowledgeBase(data_folder=data_folder, pdf_workers=workers,
+                                       pages_per_task=pages_per_task)
+        try:
+            # Aufwärmen: Prozesse starten, Module laden
+            await knowledge_base._extract_pdf_content(pdf_path)
+
+            timings = []
+            extracted = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                extracted = await knowledge_base._extract_pdf_content(pdf_path)
+                timings.append(time.perf_counter() - started)
+        finally:
+            knowledge_base.close()
+
+    # Ohne extrahierten Text wäre der Durchsatz bedeutungslos
+    pages = len(extracted)
+    characters = sum(len(text) for _, text in extracted)
+    if not pages or not characters:
+        raise RuntimeError(f"Keine Seiten extrahiert ({pages} Seiten, {characters} Zeichen)")
+
+    best = min(timings)
+    return {
+        "workers": workers,
+        "pages": pages,
+        "characters": characters,
+        "seconds": round(best, 4),
+        "pages_per_second": round(pages / best, 1) if best else 0.0,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=1000, help="Seitenzahl der synthetischen PDF")
+    parser.add_argument("--lines-per-page", type=int, default=30, help="Textzeilen pro Seite")
+    parser.add_argument("--pages-per-task", type=int, default=50, help="Seiten pro Teilaufgabe")
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, 2, 4, os.cpu_count() or 1}), help="Zu messende Prozessanzahlen")
+    parser.add_argument("--repeat", type=int, default=3, help="Wiederholungen pro Messung (bester Wert zählt)")
+    parser.add_argument("--json", action="store_true", help="Ergebnisse als JSON ausgeben")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = Path(tmp) / "benchmark.pdf"
+        create_pdf(pdf_path, args.pages, args.lines_per_page)
+
+        results = [await measure(pdf_path, workers, args.pages_per_task, args.repeat)
+                   for workers in args.workers]
+
+    if args.json:
+        print(json.dumps({"benchmark": "pdf_ingestion", "results": results}, indent=2))
+        return
+
+    baseline = results[0]["pages_per_second"] or 1.0
+    print(f"{'Prozesse':>8} {'Seiten':>8} {'Sekunden':>10} {'Seiten/s':>10} {'Speedup':>8}")
+    for result in results:
+        print(f"{result['workers']:>8} {result['pages']:>8} {result['seconds']:>10.3f} "
+              f"{result['pages_per_second']:>10.1f} {result['pages_per_second'] / baseline:>7.2f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
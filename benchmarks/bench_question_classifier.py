@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Benchmark: automatische Fragenerkennung gegen beschriftete Beispielsätze
+
+Vergleicht den bisherigen Teilstring-Test aus on_message mit dem
+QuestionClassifier (Precision, Recall, vermiedene Gemini-Aufrufe, Laufzeit
+pro Nachricht) und kann mehrere Schwellwerte durchprobieren.
+
+"tuning" ist der Satz, an dem Merkmale und Gewichte ausgerichtet wurden, und
+bewertet sich daher zu gut; maßgeblich ist "holdout", der dafür nicht benutzt wird.
+
+Aufruf (aus dem Projektordner):
+    python benchmarks/bench_question_classifier.py --thresholds 1.0 1.5 2.0
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from question_classifier import DEFAULT_THRESHOLD, QuestionClassifier  # noqa: E402
+
+SAMPLES_PATH = Path(__file__).resolve().parent / "data" / "question_samples.tsv"
+HOLDOUT_PATH = Path(__file__).resolve().parent / "data" / "question_samples_holdout.tsv"
+
+# Bisherige Erkennung aus on_message (Teilstring-Suche)
+LEGACY_WORDS = ['?', 'wie', 'was', 'wann', 'wo', 'warum', 'welche', 'kann', 'soll', 'hilfe']
+
+
+def legacy_is_question(text: str) -> bool:
+    return any(word in text.lower() for word in LEGACY_WORDS)
+
+
+def load_samples(path: Path):
+    """
+    Liest Zeilen im Format "label<TAB>text"; Zeilen mit # werden übersprungen
+    """
+    samples = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip() or line.startswith('#'):
+                continue
+            label, text = line.rstrip('\n').split('\t', 1)
+            samples.append((text, label == '1'))
+    return samples
+
+
+def evaluate(name: str, predict, samples, repeat: int) -> dict:
+    """
+    Berechnet Precision/Recall und die mittlere Laufzeit pro Nachricht
+    """
+    predictions = [predict(text) for text, _ in samples]
+    true_positives = sum(1 for (_, label), predicted in zip(samples, predictions) if label and predicted)
+    false_positives = sum(1 for (_, label), predicted in zip(samples, predictions) if not label and predicted)
+    false_negatives = sum(1 for (_, label), predicted in zip(samples, predictions) if label and not predicted)
+
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for text, _ in samples:
+            predict(text)
+    per_message = (time.perf_counter() - started) / (repeat * len(samples))
+
+    return {
+        "variant": name,
+        "samples": len(samples),
+        "llm_calls": sum(predictions),
+        "true_positives": true_positives,
+        "false_positives": false_positives,
+        "false_negatives": false_negatives,
+        "precision": round(true_positives / (true_positives + false_positives), 3)
+        if true_positives + false_positives else 0.0,
+        "recall": round(true_positives / (true_positives + false_negatives), 3)
+        if true_positives + false_negatives else 0.0,
+        "us_per_message": round(per_message * 1e6, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", type=Path, default=SAMPLES_PATH,
+                        help="Beschrifteter Satz, an dem die Gewichte ausgerichtet wurden (TSV)")
+    parser.add_argument("--holdout", type=Path, default=HOLDOUT_PATH,
+                        help="Zurückgehaltener beschrifteter Satz (TSV)")
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[DEFAULT_THRESHOLD],
+                        help="Zu prüfende Schwellwerte")
+    parser.add_argument("--repeat", type=int, default=200, help="Wiederholungen für die Zeitmessung")
+    parser.add_argument("--json", action="store_true", help="Ergebnisse als JSON ausgeben")
+    args = parser.parse_args()
+
+    report = {}
+    for sample_set, path in (("tuning", args.samples), ("holdout", args.holdout)):
+        samples = load_samples(path)
+        legacy = evaluate("legacy_substring", legacy_is_question, samples, args.repeat)
+        results = [legacy]
+        for threshold in args.thresholds:
+            classifier = QuestionClassifier(threshold=threshold)
+            result = evaluate(f"classifier@{threshold:g}", classifier.is_question, samples, args.repeat)
+            result["llm_calls_avoided"] = legacy["llm_calls"] - result["llm_calls"]
+            results.append(result)
+        report[sample_set] = results
+
+        if args.json:
+            continue
+        questions = sum(1 for _, label in samples if label)
+        print(f"{sample_set}: {len(samples)} Nachrichten, davon {questions} echte Fragen ({path.name})")
+        print(f"{'Variante':<20}{'Precision':>10}{'Recall':>8}{'LLM-Aufrufe':>13}{'vermieden':>11}{'µs/Nachr.':>11}")
+        for result in results:
+            print(f"{result['variant']:<20}{result['precision']:>10}{result['recall']:>8}"
+                  f"{result['llm_calls']:>13}{result.get('llm_calls_avoided', '-'):>11}{result['us_per_message']:>11}")
+        print()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Chunking-Durchsatz, Anfrage-Latenz und Spitzenspeicher der Wissenssuche
+
+Misst für jede Korpusgröße zwei Pfade:
+- "legacy": TextChunker.split_into_chunks / calculate_relevance_score /
+  get_relevant_chunks auf dem kompletten Text (teilt bei jeder Frage neu auf)
+- "index": DocumentBuilder + KnowledgeIndex (einmal aufbauen, dann suchen)
+
+Jeder Fall läuft in einem eigenen Prozess, damit der Spitzenspeicher (max RSS)
+nur diesem Fall zugeordnet wird. Die Ergebnisse lassen sich als JSON speichern
+und zwischen Commits vergleichen.
+
+Aufruf (aus dem Projektordner):
+    python benchmarks/bench_retrieval.py --sizes 1MB 10MB 100MB --output results.json
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+try:
+    import resource  # nicht unter Windows verfügbar
+except ImportError:
+    resource = None
+
+from corpus_generator import QUERIES, format_size, generate_text, iter_blocks, parse_size  # noqa: E402
+from knowledge_index import DocumentBuilder, KnowledgeIndex  # noqa: E402
+from text_chunker import TextChunker  # noqa: E402
+
+MB = 1024 * 1024
+
+
+def peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / MB if sys.platform == "darwin" else peak / 1024, 1)
+
+
+def percentiles(timings: List[float]) -> Dict[str, float]:
+    """
+    Latenz-Kennzahlen in Millisekunden
+    """
+    ordered = sorted(timings)
+    count = len(ordered)
+
+    def pick(fraction: float) -> float:
+        return round(ordered[min(count - 1, int(count * fraction))] * 1000, 3)
+
+    return {
+        "count": count,
+        "mean_ms": round(sum(ordered) / count * 1000, 3),
+        "p50_ms": pick(0.50),
+        "p90_ms": pick(0.90),
+        "p99_ms": pick(0.99),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+def run_index_case(size: int, seed: int, repeat: int, max_tokens: int) -> dict:
+    """
+    Baut den Index blockweise auf und misst die Suche
+    """
+    logging.disable(logging.INFO)
+    chunker = TextChunker()
+
+    # Nur Chunking (Erzeugung des Korpus wird nicht mitgemessen)
+    chunk_seconds = 0.0
+    for block in iter_blocks(size, seed):
+        started = time.perf_counter()
+        chunker.split_into_chunks(block)
+        chunk_seconds += time.perf_counter() - started
+
+    # Chunking + Analyse + Index
+    build_seconds = 0.0
+    builder = DocumentBuilder("corpus.txt", chunker)
+    for block in iter_blocks(size, seed):
+        started = time.perf_counter()
+        builder.add_page(1, block)
+        build_seconds += time.perf_counter() - started
+    started = time.perf_counter()
+    index = KnowledgeIndex.from_documents([builder.build()], chunker)
+    build_seconds += time.perf_counter() - started
+
+    timings = []
+    for _ in range(repeat):
+        for query in QUERIES:
+            query_started = time.perf_counter()
+            index.search(query, max_tokens=max_tokens)
+            timings.append(time.perf_counter() - query_started)
+
+    stats = index.get_stats()
+    return {
+        "engine": "index",
+        "size_bytes": size,
+        "chunks": stats.get("chunks", len(index)),
+        "chunk_seconds": round(chunk_seconds, 4),
+        "chunking_mb_per_s": round(size / MB / chunk_seconds, 2) if chunk_seconds else None,
+        "build_seconds": round(build_seconds, 4),
+        "build_mb_per_s": round(size / MB / build_seconds, 2) if build_seconds else None,
+        "query": percentiles(timings),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def run_legacy_case(size: int, seed: int, repeat: int, max_tokens: int) -> dict:
+    """
+    Misst den ursprünglichen Pfad: kompletten Text aufteilen und pro Frage alle Chunks bewerten
+    """
+    logging.disable(logging.INFO)
+    chunker = TextChunker()
+    text = generate_text(size, seed)
+
+    started = time.perf_counter()
+    chunks = chunker.split_into_chunks(text)
+    chunk_seconds = time.perf_counter() - started
+
+    scoring = []
+    for query in QUERIES:
+        query_started = time.perf_counter()
+        for chunk in chunks:
+            chunker.calculate_relevance_score(chunk, query)
+        scoring.append(time.perf_counter() - query_started)
+
+    timings = []
+    for _ in range(repeat):
+        for query in QUERIES:
+            query_started = time.perf_counter()
+            chunker.get_relevant_chunks(text, query, max_tokens=max_tokens)
+            timings.append(time.perf_counter() - query_started)
+
+    return {
+        "engine": "legacy",
+        "size_bytes": size,
+        "chunks": len(chunks),
+        "chunk_seconds": round(chunk_seconds, 4),
+        "chunking_mb_per_s": round(size / MB / chunk_seconds, 2) if chunk_seconds else None,
+        "scoring": percentiles(scoring),
+        "query": percentiles(timings),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+CASES = {
+    "index": run_index_case,
+    "legacy": run_legacy_case,
+}
+
+
+def run_isolated(engine: str, size: int, seed: int, repeat: int, max_tokens: int) -> dict:
+    """
+    Führt einen Fall in einem frischen Prozess aus (eigener Spitzenspeicher)
+    """
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+        return executor.submit(CASES[engine], size, seed, repeat, max_tokens).result()
+
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=Path(__file__).resolve().parent, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", nargs="+", default=["1MB", "10MB"], help="Korpusgrößen, z.B. 1MB 100MB 1GB")
+    parser.add_argument("--engines", nargs="+", choices=sorted(CASES), default=sorted(CASES),
+                        help="Zu messende Pfade")
+    parser.add_argument("--legacy-max", default="50MB",
+                        help="Größte Korpusgröße für den legacy-Pfad (teilt pro Frage neu auf)")
+    parser.add_argument("--repeat", type=int, default=3, help="Durchläufe über alle Anfragen")
+    parser.add_argument("--max-tokens", type=int, default=7000, help="Token-Budget pro Anfrage")
+    parser.add_argument("--seed", type=int, default=1, help="Seed des Korpus")
+    parser.add_argument("--output", type=Path, help="Ergebnisse als JSON in diese Datei schreiben")
+    parser.add_argument("--json", action="store_true", help="Ergebnisse als JSON ausgeben")
+    args = parser.parse_args()
+
+    legacy_max = parse_size(args.legacy_max)
+    results = []
+    for size in (parse_size(value) for value in args.sizes):
+        for engine in args.engines:
+            if engine == "legacy" and size > legacy_max:
+                continue
+            result = run_isolated(engine, size, args.seed, args.repeat, args.max_tokens)
+            result["size"] = format_size(size)
+            results.append(result)
+            if not args.json:
+                query = result["query"]
+                print(f"{result['size']:>7} {engine:<7} {result['chunks']:>9} Chunks  "
+                      f"{result['chunking_mb_per_s']:>8} MB/s  "
+                      f"p50 {query['p50_ms']:>9} ms  p99 {query['p99_ms']:>9} ms  "
+                      f"RSS {result['peak_rss_mb']} MB", flush=True)
+
+    report = {"environment": environment(), "queries": QUERIES, "results": results}
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    if args.json:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
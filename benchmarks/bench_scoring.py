@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Bewertung aller Chunks pro Anfrage nach Chunk-Anzahl
+
+Vergleicht drei Bewertungen auf denselben synthetischen Chunks (ein Absatz = ein Chunk):
+- "jaccard": TextChunker.calculate_relevance_score für jeden Chunk plus Sortierung
+  (Kern von get_relevant_chunks, ohne erneutes Aufteilen)
+- "bm25": invertierter Index aus retrieval.BM25Engine
+- "tfidf": dünne TF-IDF-Matrix aus retrieval.TfidfEngine, einzeln und als Stapel
+  (alle Anfragen in einem Matrix-Matrix-Produkt)
+
+Jeder Fall läuft in einem eigenen Prozess (eigener Spitzenspeicher). Der
+Jaccard-Pfad bewertet pro Anfrage jeden Chunk in Python und wird daher nur
+mit --jaccard-queries Anfragen gemessen.
+
+Aufruf (aus dem Projektordner, tfidf benötigt numpy und scipy):
+    python benchmarks/bench_scoring.py --chunks 10k 100k 1M
+"""
+
+import argparse
+import itertools
+import json
+import logging
+import multiprocessing
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_retrieval import environment, peak_rss_mb, percentiles  # noqa: E402
+from corpus_generator import QUERIES, iter_paragraphs  # noqa: E402
+from retrieval import BM25Engine, TfidfEngine  # noqa: E402
+from text_chunker import TextChunker  # noqa: E402
+
+TOP_K = 20
+
+
+def parse_count(value: str) -> int:
+    """
+    Wandelt Angaben wie "10k" oder "1M" in eine Anzahl um
+    """
+    factors = {"k": 1_000, "m": 1_000_000}
+    suffix = value[-1:].lower()
+    if suffix in factors:
+        return int(float(value[:-1]) * factors[suffix])
+    return int(value)
+
+
+def format_count(count: int) -> str:
+    for suffix, factor in (("M", 1_000_000), ("k", 1_000)):
+        if count >= factor and count % factor == 0:
+            return f"{count // factor}{suffix}"
+    return str(count)
+
+
+def make_chunks(count: int, seed: int) -> List[str]:
+    return list(itertools.islice(iter_paragraphs(1 << 62, seed), count))
+
+
+def run_jaccard_case(count: int, seed: int, repeat: int, queries: int) -> dict:
+    logging.disable(logging.INFO)
+    chunks = make_chunks(count, seed)
+    chunker = TextChunker()
+
+    timings = []
+    for query in QUERIES[:queries]:
+        started = time.perf_counter()
+        scored = [(chunker.calculate_relevance_score(chunk, query), chunk_id) for chunk_id, chunk in enumerate(chunks)]
+        scored.sort(key=lambda item: item[0], reverse=True)
+        timings.append(time.perf_counter() - started)
+
+    return {"engine": "jaccard", "chunks": count, "build_seconds": 0.0, "query": percentiles(timings),
+            "peak_rss_mb": peak_rss_mb()}
+
+
+def run_bm25_case(count: int, seed: int, repeat: int, queries: int) -> dict:
+    logging.disable(logging.INFO)
+    chunks = make_chunks(count, seed)
+
+    started = time.perf_counter()
+    engine = BM25Engine().build(chunks)
+    build_seconds = time.perf_counter() - started
+
+    timings = []
+    for _ in range(repeat):
+        for query in QUERIES:
+            started = time.perf_counter()
+            engine.search(query, TOP_K)
+            timings.append(time.perf_counter() - started)
+
+    return {"engine": "bm25", "chunks": count, "terms": engine.term_count, "build_seconds": round(build_seconds, 3),
+            "query": percentiles(timings), "peak_rss_mb": peak_rss_mb()}
+
+
+def run_tfidf_case(count: int, seed: int, repeat: int, queries: int) -> dict:
+    logging.disable(logging.INFO)
+    chunks = make_chunks(count, seed)
+
+    started = time.perf_counter()
+    engine = TfidfEngine().build(chunks)
+    build_seconds = time.perf_counter() - started
+
+    timings = []
+    for _ in range(repeat):
+        for query in QUERIES:
+            started = time.perf_counter()
+            engine.search(query, TOP_K)
+            timings.append(time.perf_counter() - started)
+
+    # Alle Anfragen als ein Stapel; angegeben wird die Zeit pro Anfrage
+    batch_timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        engine.search_many(QUERIES, TOP_K)
+        batch_timings.append((time.perf_counter() - started) / len(QUERIES))
+
+    return {"engine": "tfidf", "chunks": count, "terms": engine.term_count, "build_seconds": round(build_seconds, 3),
+            "matrix_mb": round(engine.matrix_bytes / (1024 * 1024), 1), "query": percentiles(timings),
+            "batch_per_query": percentiles(batch_timings), "peak_rss_mb": peak_rss_mb()}
+
+
+CASES = {
+    "jaccard": run_jaccard_case,
+    "bm25": run_bm25_case,
+    "tfidf": run_tfidf_case,
+}
+
+
+def run_isolated(engine: str, count: int, seed: int, repeat: int, queries: int) -> dict:
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+        return executor.submit(CASES[engine], count, seed, repeat, queries).result()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", nargs="+", default=["10k", "100k", "1M"], help="Chunk-Anzahlen, z.B. 10k 1M")
+    parser.add_argument("--engines", nargs="+", choices=sorted(CASES), default=["jaccard", "bm25", "tfidf"],
+                        help="Zu messende Bewertungen")
+    parser.add_argument("--repeat", type=int, default=3, help="Durchläufe über alle Anfragen (bm25, tfidf)")
+    parser.add_argument("--jaccard-queries", type=int, default=3, help="Anfragen für den Jaccard-Pfad")
+    parser.add_argument("--seed", type=int, default=1, help="Seed des Korpus")
+    parser.add_argument("--output", type=Path, help="Ergebnisse als JSON in diese Datei schreiben")
+    parser.add_argument("--json", action="store_true", help="Ergebnisse als JSON ausgeben")
+    args = parser.parse_args()
+
+    results = []
+    if not args.json:
+        print(f"{'Chunks':>7} {'Engine':<8} {'Aufbau s':>9} {'p50 ms':>10} {'p99 ms':>10} {'Stapel ms':>10} {'RSS MB':>8}")
+    for count in (parse_count(value) for value in args.chunks):
+        for engine in args.engines:
+            result = run_isolated(engine, count, args.seed, args.repeat, args.jaccard_queries)
+            result["label"] = format_count(count)
+            results.append(result)
+            if not args.json:
+                batch = result.get("batch_per_query", {}).get("mean_ms", "-")
+                print(f"{result['label']:>7} {engine:<8} {result['build_seconds']:>9} "
+                      f"{result['query']['p50_ms']:>10} {result['query']['p99_ms']:>10} {batch:>10} "
+                      f"{result['peak_rss_mb']!s:>8}", flush=True)
+
+    report = {"environment": environment(), "queries": QUERIES, "top_k": TOP_K, "results": results}
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    if args.json:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
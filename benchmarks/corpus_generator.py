@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Deterministischer synthetischer Korpus (deutsch/englisch) für Retrieval-Benchmarks
+
+Gleicher Seed und gleiche Größe ergeben byte-identische Texte, sodass Messungen
+über Commits hinweg vergleichbar sind. Der Text wird absatzweise erzeugt und
+muss nie komplett im Speicher liegen (Größen von 1 MB bis 1 GB).
+
+Aufruf (aus dem Projektordner):
+    python benchmarks/corpus_generator.py --size 100MB --output /tmp/corpus.txt
+"""
+
+import argparse
+import random
+import re
+import sys
+from typing import Iterator, List
+
+# Themen mit Fachbegriffen; jede Sprache hat eigene Begriffe und Satzvorlagen
+TOPICS = {
+    "de": {
+        "versand": ["Versand", "Lieferzeit", "Paketdienst", "Sendungsverfolgung", "Zollgebühren", "Lagerhaus"],
+        "zahlung": ["Zahlung", "Kreditkarte", "Rechnung", "Rückerstattung", "Zahlungsanbieter", "Mehrwertsteuer"],
+        "werbung": ["Werbeanzeige", "Zielgruppe", "Kampagne", "Budget", "Klickrate", "Konversionsrate"],
+        "produkte": ["Produktbeschreibung", "Lieferant", "Marge", "Bestseller", "Produktbild", "Lagerbestand"],
+        "recht": ["Impressum", "Widerrufsrecht", "Gewerbeanmeldung", "Datenschutz", "Abmahnung", "AGB"],
+    },
+    "en": {
+        "shipping": ["shipping", "delivery time", "carrier", "tracking number", "customs duty", "warehouse"],
+        "payment": ["payment", "credit card", "invoice", "refund", "payment provider", "sales tax"],
+        "ads": ["ad creative", "audience", "campaign", "budget", "click-through rate", "conversion rate"],
+        "products": ["product description", "supplier", "margin", "best seller", "product photo", "inventory"],
+        "legal": ["terms of service", "right of withdrawal", "business license", "privacy policy", "chargeback", "VAT"],
+    },
+}
+
+TEMPLATES = {
+    "de": [
+        "Die {a} hängt direkt mit der {b} zusammen.",
+        "Wer die {a} optimiert, senkt langfristig die Kosten für {b}.",
+        "Bei Problemen mit {a} sollte zuerst {b} geprüft werden.",
+        "Eine klare Regel für {a} spart viel Zeit bei {b}.",
+        "Viele Händler unterschätzen, wie stark {a} die {b} beeinflusst.",
+        "Im Test verbesserte sich die {a} nach {n} Tagen um {p} Prozent.",
+        "Für {a} gilt in der Regel eine Frist von {n} Tagen.",
+    ],
+    "en": [
+        "The {a} is closely tied to the {b}.",
+        "Improving the {a} usually lowers the cost of {b} over time.",
+        "When the {a} fails, check the {b} first.",
+        "A clear rule for {a} saves a lot of time on {b}.",
+        "Many sellers underestimate how much the {a} affects the {b}.",
+        "In our test the {a} improved by {p} percent after {n} days.",
+        "The {a} usually comes with a deadline of {n} days.",
+    ],
+}
+
+# Feste Anfragen über beide Sprachen; einige treffen häufige, einige seltene Begriffe
+QUERIES: List[str] = [
+    "Wie lange dauert der Versand?",
+    "Welche Zollgebühren fallen an?",
+    "Wie funktioniert die Rückerstattung bei Kreditkarte?",
+    "Wie senke ich die Kosten meiner Kampagne?",
+    "Was muss im Impressum stehen?",
+    "Wie finde ich einen guten Lieferanten mit hoher Marge?",
+    "Wann brauche ich eine Gewerbeanmeldung?",
+    "Wie verbessere ich die Konversionsrate meiner Werbeanzeige?",
+    "Frist Widerrufsrecht Tage",
+    "Lagerbestand Bestseller Produktbild",
+    "How long does delivery take with the carrier?",
+    "What is the right of withdrawal deadline?",
+    "How do I handle a chargeback from a credit card payment?",
+    "Which audience should a new campaign target?",
+    "How can I improve my product description and product photo?",
+    "sales tax invoice payment provider",
+    "tracking number warehouse customs duty",
+    "best seller inventory margin supplier",
+    "privacy policy terms of service",
+    "Budget Klickrate click-through rate",
+]
+
+_SIZE_PATTERN = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([kmg]?i?b?)?\s*$", re.IGNORECASE)
+_SIZE_UNITS = {"": 1, "b": 1, "k": 1024, "m": 1024 ** 2, "g": 1024 ** 3}
+
+
+def parse_size(value: str) -> int:
+    """
+    Wandelt Angaben wie "1MB", "250mb" oder "1G" in Bytes um
+    """
+    match = _SIZE_PATTERN.match(value)
+    if not match:
+        raise ValueError(f"Ungültige Größe: {value}")
+    number, unit = match.groups()
+    return int(float(number) * _SIZE_UNITS[(unit or "").lower()[:1]])
+
+
+def format_size(size: int) -> str:
+    for unit, factor in (("GB", 1024 ** 3), ("MB", 1024 ** 2), ("KB", 1024)):
+        if size >= factor:
+            return f"{size / factor:g}{unit}"
+    return f"{size}B"
+
+
+def iter_paragraphs(size_bytes: int, seed: int = 1) -> Iterator[str]:
+    """
+    Erzeugt Absätze, bis insgesamt etwa size_bytes (UTF-8, inkl. Trennern) erreicht sind
+    Abschnitte beginnen mit einer Überschrift; Absätze sind einsprachig
+    """
+    rng = random.Random(seed)
+    produced = 0
+    section = 0
+    while produced < size_bytes:
+        language = "de" if rng.random() < 0.6 else "en"
+        topic = rng.choice(sorted(TOPICS[language]))
+        terms = TOPICS[language][topic]
+
+        if section % 8 == 0:
+            heading = f"Abschnitt {section // 8 + 1}: {topic.capitalize()}" if language == "de" \
+                else f"Section {section // 8 + 1}: {topic.capitalize()}"
+            produced += len(heading.encode("utf-8")) + 2
+            yield heading
+        section += 1
+
+        sentences = []
+        for _ in range(rng.randint(3, 12)):
+            template = rng.choice(TEMPLATES[language])
+            a, b = rng.sample(terms, 2)
+            sentences.append(template.format(a=a, b=b, n=rng.randint(2, 60), p=rng.randint(1, 90)))
+        paragraph = " ".join(sentences)
+        produced += len(paragraph.encode("utf-8")) + 2
+        yield paragraph
+
+
+def iter_blocks(size_bytes: int, seed: int = 1, block_chars: int = 1024 * 1024) -> Iterator[str]:
+    """
+    Fasst Absätze zu Blöcken von etwa block_chars Zeichen zusammen (wie beim Lesen von Text-Dateien)
+    Aneinandergehängt ergeben die Blöcke exakt generate_text(size_bytes, seed)
+    """
+    buffer: List[str] = []
+    length = 0
+    first = True
+    for paragraph in iter_paragraphs(size_bytes, seed):
+        piece = paragraph if first else "\n\n" + paragraph
+        first = False
+        buffer.append(piece)
+        length += len(piece)
+        if length >= block_chars:
+            yield "".join(buffer)
+            buffer, length = [], 0
+    if buffer:
+        yield "".join(buffer)
+
+
+def generate_text(size_bytes: int, seed: int = 1) -> str:
+    """
+    Erzeugt den kompletten Korpus als String (nur für kleinere Größen sinnvoll)
+    """
+    return "\n\n".join(iter_paragraphs(size_bytes, seed))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", default="10MB", help="Zielgröße, z.B. 1MB, 100MB, 1GB")
+    parser.add_argument("--seed", type=int, default=1, help="Seed für den Zufallsgenerator")
+    parser.add_argument("--output", help="Zieldatei (Standard: stdout)")
+    args = parser.parse_args()
+
+    size = parse_size(args.size)
+    output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        for block in iter_blocks(size, args.seed):
+            output.write(block)
+    finally:
+        if args.output:
+            output.close()
+
+
+if __name__ == "__main__":
+    main()
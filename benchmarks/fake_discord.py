@@ -0,0 +1,196 @@
+"""
+Offline-Ersatz für Discord-Objekte im Lasttest
+Nachbildung genau der Attribute und Methoden, die enhanced_bot benutzt
+(author, channel, guild, reply, send, edit, typing), plus eine Nachrichtenquelle,
+die reproduzierbaren Verkehr über mehrere Guilds erzeugt
+"""
+
+import itertools
+import random
+import time
+from typing import List, Optional, Tuple
+
+from corpus_generator import QUERIES
+
+_ids = itertools.count(1000)
+
+
+class FakeUser:
+    def __init__(self, name: str, bot: bool = False):
+        self.id = next(_ids)
+        self.name = name
+        self.bot = bot
+        self.mention = f"<@{self.id}>"
+
+    def __str__(self) -> str:
+        return self.name
+
+
+class FakeBotUser(FakeUser):
+    """
+    Ersatz für bot.user
+    """
+
+    def __init__(self):
+        super().__init__("LoadTestBot", bot=True)
+
+    def mentioned_in(self, message) -> bool:
+        return f"<@{self.id}>" in message.content
+
+
+class FakeGuild:
+    def __init__(self, name: str):
+        self.id = next(_ids)
+        self.name = name
+
+
+class RequestTrace:
+    """
+    Zeitpunkte einer simulierten Anfrage (für Zeit bis zur ersten Antwort)
+    """
+    __slots__ = ("kind", "started", "first_reply", "replies", "edits")
+
+    def __init__(self, kind: str):
+        self.kind = kind
+        self.started = time.perf_counter()
+        self.first_reply: Optional[float] = None
+        self.replies = 0
+        self.edits = 0
+
+    def record_reply(self):
+        if self.first_reply is None:
+            self.first_reply = time.perf_counter()
+        self.replies += 1
+
+
+class FakeSentMessage:
+    def __init__(self, content: Optional[str], trace: RequestTrace):
+        self.content = content
+        self._trace = trace
+
+    async def edit(self, content: Optional[str] = None, **kwargs):
+        self.content = content
+        self._trace.edits += 1
+
+
+class _Typing:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakeChannel:
+    """
+    Channel-Ansicht einer einzelnen Anfrage; mehrere Anfragen teilen sich die ID
+    """
+
+    def __init__(self, channel_id: int, guild: FakeGuild, trace: RequestTrace):
+        self.id = channel_id
+        self.guild = guild
+        self._trace = trace
+
+    async def send(self, content: Optional[str] = None, **kwargs) -> FakeSentMessage:
+        self._trace.record_reply()
+        return FakeSentMessage(content, self._trace)
+
+    def typing(self) -> _Typing:
+        return _Typing()
+
+
+class FakeMessage:
+    def __init__(self, content: str, author: FakeUser, channel: FakeChannel, guild: FakeGuild):
+        self.id = next(_ids)
+        self.content = content
+        self.author = author
+        self.channel = channel
+        self.guild = guild
+        self.attachments: List[object] = []
+
+    async def reply(self, content: Optional[str] = None, **kwargs) -> FakeSentMessage:
+        return await self.channel.send(content, **kwargs)
+
+
+class FakeContext:
+    """
+    Ersatz für commands.Context beim direkten Aufruf von frage_command
+    """
+
+    def __init__(self, message: FakeMessage):
+        self.message = message
+        self.author = message.author
+        self.channel = message.channel
+        self.guild = message.guild
+
+    async def send(self, content: Optional[str] = None, **kwargs) -> FakeSentMessage:
+        return await self.channel.send(content, **kwargs)
+
+    def typing(self) -> _Typing:
+        return self.channel.typing()
+
+
+CHATTER = [
+    "Heute 12 Bestellungen reingekommen",
+    "Ich habe heute etwas Neues gelernt",
+    "Die Kanne Kaffee ist leer",
+    "Mein Shop ist endlich online!",
+    "Wir sehen uns morgen im Call",
+    "That was a great webinar",
+    "I just launched my store",
+    "Sounds good to me",
+]
+GREETINGS = ["Hallo, wie geht's?", "Hi, wie läuft's?", "Hello, how are you?", "Moin!"]
+
+# Anteile der Nachrichtenarten am Verkehr
+DEFAULT_MIX = {
+    "chat": 0.55,
+    "auto_question": 0.25,
+    "mention": 0.08,
+    "greeting": 0.04,
+    "frage": 0.08,
+}
+
+
+class MessageSource:
+    """
+    Erzeugt reproduzierbaren Verkehr für guilds Guilds mit je channels Channels und users Usern
+    """
+
+    def __init__(self, bot_user: FakeBotUser, guilds: int = 10, channels: int = 3, users: int = 50,
+                 mix: Optional[dict] = None, seed: int = 7):
+        self.bot_user = bot_user
+        self.rng = random.Random(seed)
+        self.mix = mix or DEFAULT_MIX
+        self.guilds = [FakeGuild(f"guild-{index}") for index in range(guilds)]
+        self.channels = {guild.id: [next(_ids) for _ in range(channels)] for guild in self.guilds}
+        self.users = {guild.id: [FakeUser(f"user-{guild.name}-{index}") for index in range(users)]
+                      for guild in self.guilds}
+        self._kinds = list(self.mix)
+        self._weights = [self.mix[kind] for kind in self._kinds]
+
+    def next(self) -> Tuple[str, RequestTrace, object, Optional[str]]:
+        """
+        Gibt (art, trace, message_oder_context, frage) zurück
+        Für "frage" ist das Objekt ein FakeContext und die Frage gesetzt, sonst eine FakeMessage
+        """
+        kind = self.rng.choices(self._kinds, self._weights)[0]
+        guild = self.rng.choice(self.guilds)
+        channel_id = self.rng.choice(self.channels[guild.id])
+        author = self.rng.choice(self.users[guild.id])
+        trace = RequestTrace(kind)
+        channel = FakeChannel(channel_id, guild, trace)
+
+        if kind == "chat":
+            content = self.rng.choice(CHATTER)
+        elif kind == "greeting":
+            content = self.rng.choice(GREETINGS)
+        elif kind == "mention":
+            content = f"{self.bot_user.mention} {self.rng.choice(QUERIES)}"
+        else:
+            content = self.rng.choice(QUERIES)
+
+        if kind == "frage":
+            message = FakeMessage(f"!frage {content}", author, channel, guild)
+            return kind, trace, FakeContext(message), content
+        return kind, trace, FakeMessage(content, author, channel, guild), None
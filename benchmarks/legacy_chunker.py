@@ -0,0 +1,121 @@
+"""
+Bisheriger Chunker (Stand vor dem span-basierten TextChunker.iter_spans)
+Unverändert übernommen, nur als Vergleichsbasis für bench_chunker.py
+"""
+
+import re
+from typing import List
+
+
+class LegacyTextChunker:
+    """
+    Teilt an Absätzen, dann an Sätzen, dann an Wörtern und baut Chunks per String-Verkettung auf
+    """
+
+    def __init__(self, max_chunk_size: int = 2000):
+        self.max_chunk_size = max_chunk_size
+
+    def split_into_chunks(self, text: str) -> List[str]:
+        """
+        Teilt einen Text in sinnvolle Chunks auf
+        Versucht an Absätzen, Sätzen und Wörtern zu trennen
+        """
+        if not text or not text.strip():
+            return []
+        
+        # Wenn Text kurz genug ist, direkt zurückgeben
+        if len(text) <= self.max_chunk_size:
+            return [text]
+        
+        chunks = []
+        
+        # Zunächst an doppelten Zeilenwechseln (Absätze) trennen
+        paragraphs = text.split('\n\n')
+        current_chunk = ""
+        
+        for paragraph in paragraphs:
+            # Wenn Absatz + aktueller Chunk zu lang wäre
+            if len(current_chunk) + len(paragraph) + 2 > self.max_chunk_size:
+                if current_chunk:
+                    chunks.append(current_chunk.strip())
+                    current_chunk = ""
+                
+                # Wenn ein einzelner Absatz zu lang ist, weiter aufteilen
+                if len(paragraph) > self.max_chunk_size:
+                    sub_chunks = self._split_long_paragraph(paragraph)
+                    chunks.extend(sub_chunks)
+                else:
+                    current_chunk = paragraph
+            else:
+                if current_chunk:
+                    current_chunk += "\n\n" + paragraph
+                else:
+                    current_chunk = paragraph
+        
+        # Letzten Chunk hinzufügen
+        if current_chunk:
+            chunks.append(current_chunk.strip())
+        
+        return [chunk for chunk in chunks if chunk.strip()]
+    
+    def _split_long_paragraph(self, paragraph: str) -> List[str]:
+        """
+        Teilt lange Absätze an Satzgrenzen auf
+        """
+        chunks = []
+        
+        # An Satzenden trennen (. ! ?)
+        sentences = re.split(r'[.!?]+\s+', paragraph)
+        current_chunk = ""
+        
+        for sentence in sentences:
+            sentence = sentence.strip()
+            if not sentence:
+                continue
+                
+            # Satzende-Zeichen wieder hinzufügen (außer beim letzten)
+            if not sentence.endswith(('.', '!', '?')):
+                sentence += '.'
+            
+            if len(current_chunk) + len(sentence) + 1 > self.max_chunk_size:
+                if current_chunk:
+                    chunks.append(current_chunk.strip())
+                    current_chunk = sentence
+                else:
+                    # Einzelner Satz ist zu lang - an Wörtern trennen
+                    word_chunks = self._split_long_sentence(sentence)
+                    chunks.extend(word_chunks)
+            else:
+                if current_chunk:
+                    current_chunk += " " + sentence
+                else:
+                    current_chunk = sentence
+        
+        if current_chunk:
+            chunks.append(current_chunk.strip())
+        
+        return chunks
+    
+    def _split_long_sentence(self, sentence: str) -> List[str]:
+        """
+        Teilt sehr lange Sätze an Wortgrenzen auf
+        """
+        words = sentence.split()
+        chunks = []
+        current_chunk = ""
+        
+        for word in words:
+            if len(current_chunk) + len(word) + 1 > self.max_chunk_size:
+                if current_chunk:
+                    chunks.append(current_chunk.strip())
+                current_chunk = word
+            else:
+                if current_chunk:
+                    current_chunk += " " + word
+                else:
+                    current_chunk = word
+        
+        if current_chunk:
+            chunks.append(current_chunk.strip())
+        
+        return chunks
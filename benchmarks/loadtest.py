@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Lasttest ohne Discord und ohne Gemini
+
+Treibt on_message und frage_command aus enhanced_bot mit simulierten
+Nachrichten (fake_discord) gegen ein Ersatzmodell (stub_model) und eine
+synthetische Wissensdatenbank. N Guilds senden mit einer Zielrate
+(Poisson-verteilt); gemessen werden Ende-zu-Ende-Latenz, Zeit bis zur
+ersten Antwort, Event-Loop-Verzögerung, Durchsatz und Speicher.
+
+Aufruf (aus dem Projektordner):
+    python benchmarks/loadtest.py --guilds 20 --rate 30 --duration 60
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+try:
+    import resource  # nicht unter Windows verfügbar
+except ImportError:
+    resource = None
+
+import enhanced_bot  # noqa: E402
+from answer_cache import ResponseCache  # noqa: E402
+from corpus_generator import iter_blocks, parse_size  # noqa: E402
+from fake_discord import FakeBotUser, MessageSource  # noqa: E402
+from knowledge_base import KnowledgeBase  # noqa: E402
+from llm_dispatch import LLMDispatcher  # noqa: E402
+from scheduler import RequestScheduler  # noqa: E402
+from stub_model import StubModel  # noqa: E402
+from text_chunker import TextChunker  # noqa: E402
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    """
+    Kennzahlen in Millisekunden
+    """
+    if not values:
+        return {"count": 0}
+    ordered = sorted(values)
+    count = len(ordered)
+
+    def pick(fraction: float) -> float:
+        return round(ordered[min(count - 1, int(count * fraction))] * 1000, 2)
+
+    return {
+        "count": count,
+        "mean_ms": round(sum(ordered) / count * 1000, 2),
+        "p50_ms": pick(0.50),
+        "p90_ms": pick(0.90),
+        "p99_ms": pick(0.99),
+        "max_ms": round(ordered[-1] * 1000, 2),
+    }
+
+
+def peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+
+
+async def monitor_loop_lag(samples: List[float], interval: float = 0.05):
+    """
+    Misst, wie viel später als geplant der Event-Loop einen Timer ausführt
+    """
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, time.perf_counter() - started - interval))
+
+
+async def setup_bot(args, data_folder: Path) -> StubModel:
+    """
+    Initialisiert die globalen Dienste von enhanced_bot wie on_ready, aber mit Ersatzmodell
+    """
+    enhanced_bot.CONFIG_DETAILS.update({
+        'CONTEXT_DB_FILE': '',
+        'METRICS_PORT': 0,
+        'STREAM_RESPONSES': not args.no_stream,
+        'STREAM_EDIT_INTERVAL': args.edit_interval,
+        'USER_RATE_PER_MINUTE': args.user_rate,
+        'LLM_QUEUE_SIZE': args.queue_size,
+    })
+
+    # Korpus für die Wissensdatenbank
+    with open(data_folder / "corpus.txt", "w", encoding="utf-8") as f:
+        for block in iter_blocks(parse_size(args.corpus_size)):
+            f.write(block)
+
+    enhanced_bot.bot._connection.user = FakeBotUser()
+    await enhanced_bot.bot.setup_hook()
+
+    model = StubModel(latency=args.model_latency, jitter=args.model_jitter, first_chunk=args.first_chunk,
+                      chunks=args.chunks, chunk_interval=args.chunk_interval, answer_chars=args.answer_chars)
+    enhanced_bot.gemini_model = model
+    enhanced_bot.gemini_vision_model = model
+    enhanced_bot.llm_scheduler = RequestScheduler(
+        max_concurrent=args.max_in_flight, max_queue=args.queue_size,
+        user_rate_per_minute=args.user_rate, user_burst=enhanced_bot.USER_BURST
+    )
+    enhanced_bot.llm_dispatcher = LLMDispatcher(max_in_flight=args.max_in_flight, timeout=60,
+                                                limit_concurrency=False)
+    enhanced_bot.text_chunker = TextChunker()
+    enhanced_bot.answer_cache = ResponseCache(max_entries=0 if args.no_cache else 512)
+    enhanced_bot.vision_cache = ResponseCache()
+    enhanced_bot.knowledge_base = KnowledgeBase(data_folder=str(data_folder), chunker=enhanced_bot.text_chunker,
+                                                pdf_workers=1)
+    await enhanced_bot.knowledge_base.load_knowledge_base()
+    return model
+
+
+async def replay(args, source: MessageSource) -> dict:
+    """
+    Sendet Nachrichten mit der Zielrate und wartet auf die Verarbeitung aller Nachrichten
+    """
+    rng = random.Random(args.seed)
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    first_replies: Dict[str, List[float]] = defaultdict(list)
+    errors = 0
+    loop_lag: List[float] = []
+
+    async def run_one(kind, trace, target, question):
+        nonlocal errors
+        try:
+            if kind == "frage":
+                await enhanced_bot.frage_command.callback(target, question=question)
+            else:
+                await enhanced_bot.on_message(target)
+        except Exception as e:
+            errors += 1
+            logging.getLogger(__name__).error(f"Anfrage fehlgeschlagen ({kind}): {e}")
+            return
+        finished = time.perf_counter()
+        latencies[kind].append(finished - trace.started)
+        if trace.first_reply is not None:
+            first_replies[kind].append(trace.first_reply - trace.started)
+
+    monitor = asyncio.create_task(monitor_loop_lag(loop_lag))
+    tasks = []
+    started = time.perf_counter()
+    next_send = started
+    while next_send - started < args.duration:
+        delay = next_send - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        kind, trace, target, question = source.next()
+        tasks.append(asyncio.create_task(run_one(kind, trace, target, question)))
+        next_send += rng.expovariate(args.rate)
+    sent_seconds = time.perf_counter() - started
+
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+    monitor.cancel()
+
+    all_latencies = [value for values in latencies.values() for value in values]
+    return {
+        "messages": len(tasks),
+        "completed": len(all_latencies),
+        "errors": errors,
+        "send_seconds": round(sent_seconds, 2),
+        "elapsed_seconds": round(elapsed, 2),
+        "offered_rate": round(len(tasks) / sent_seconds, 2) if sent_seconds else 0.0,
+        "throughput": round(len(all_latencies) / elapsed, 2) if elapsed else 0.0,
+        "latency": percentiles(all_latencies),
+        "latency_by_kind": {kind: percentiles(values) for kind, values in sorted(latencies.items())},
+        "first_reply_by_kind": {kind: percentiles(values) for kind, values in sorted(first_replies.items())},
+        "loop_lag": percentiles(loop_lag),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--guilds", type=int, default=10, help="Anzahl simulierter Guilds")
+    parser.add_argument("--channels", type=int, default=3, help="Channels pro Guild")
+    parser.add_argument("--users", type=int, default=50, help="User pro Guild")
+    parser.add_argument("--rate", type=float, default=20.0, help="Nachrichten pro Sekunde (alle Guilds)")
+    parser.add_argument("--duration", type=float, default=30.0, help="Dauer des Sendens in Sekunden")
+    parser.add_argument("--corpus-size", default="5MB", help="Größe der synthetischen Wissensdatenbank")
+    parser.add_argument("--model-latency", type=float, default=1.0, help="Antwortzeit des Modells (s)")
+    parser.add_argument("--model-jitter", type=float, default=0.2, help="Streuung der Antwortzeit (s)")
+    parser.add_argument("--first-chunk", type=float, default=0.4, help="Zeit bis zum ersten Stream-Stück (s)")
+    parser.add_argument("--chunks", type=int, default=8, help="Stream-Stücke pro Antwort")
+    parser.add_argument("--chunk-interval", type=float, default=0.1, help="Abstand der Stream-Stücke (s)")
+    parser.add_argument("--answer-chars", type=int, default=600, help="Länge der Antworten")
+    parser.add_argument("--no-stream", action="store_true", help="Antworten nicht streamen")
+    parser.add_argument("--no-cache", action="store_true", help="Antwort-Cache deaktivieren")
+    parser.add_argument("--edit-interval", type=float, default=1.0, help="STREAM_EDIT_INTERVAL")
+    parser.add_argument("--max-in-flight", type=int, default=enhanced_bot.LLM_MAX_IN_FLIGHT,
+                        help="Gleichzeitige Modellaufrufe")
+    parser.add_argument("--queue-size", type=int, default=enhanced_bot.LLM_QUEUE_SIZE, help="LLM_QUEUE_SIZE")
+    parser.add_argument("--user-rate", type=float, default=enhanced_bot.USER_RATE_PER_MINUTE,
+                        help="USER_RATE_PER_MINUTE (0 = ohne Limit)")
+    parser.add_argument("--seed", type=int, default=7, help="Seed für Verkehr und Ankunftszeiten")
+    parser.add_argument("--json", action="store_true", help="Ergebnisse als JSON ausgeben")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as data_folder:
+        model = await setup_bot(args, Path(data_folder))
+        source = MessageSource(enhanced_bot.bot.user, guilds=args.guilds, channels=args.channels,
+                               users=args.users, seed=args.seed)
+        try:
+            report = await replay(args, source)
+        finally:
+            enhanced_bot.knowledge_base.close()
+            await enhanced_bot.bot.close()
+
+    report.update({
+        "model_calls": model.calls,
+        "scheduler": enhanced_bot.llm_scheduler.get_stats(),
+        "dispatcher": enhanced_bot.llm_dispatcher.get_stats(),
+        "coalescing": enhanced_bot.question_flights.get_stats(),
+        "answer_cache": enhanced_bot.answer_cache.get_stats(),
+        "routes": enhanced_bot.message_router.get_stats(),
+        "context": enhanced_bot.context_store.get_stats(),
+        "peak_rss_mb": peak_rss_mb(),
+    })
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"Nachrichten: {report['messages']} gesendet ({report['offered_rate']}/s), "
+          f"{report['completed']} verarbeitet, {report['errors']} Fehler, "
+          f"Durchsatz {report['throughput']}/s")
+    print(f"{'Art':<16}{'Anzahl':>8}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'1. Antwort p50':>16}")
+    for kind, stats in report["latency_by_kind"].items():
+        first = report["first_reply_by_kind"].get(kind, {})
+        print(f"{kind:<16}{stats['count']:>8}{stats['p50_ms']:>10}{stats['p90_ms']:>10}{stats['p99_ms']:>10}"
+              f"{first.get('p50_ms', '-'):>16}")
+    lag = report["loop_lag"]
+    print(f"\nEvent-Loop-Verzögerung: p50 {lag.get('p50_ms')} ms, p99 {lag.get('p99_ms')} ms, max {lag.get('max_ms')} ms")
+    print(f"Modellaufrufe: {report['model_calls']}, zusammengeführt: {report['coalescing']['coalesced']}, "
+          f"abgewiesen: {report['scheduler']['shed']}, gedrosselt: {report['scheduler']['rate_limited']}")
+    print(f"Spitzenspeicher: {report['peak_rss_mb']} MB")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
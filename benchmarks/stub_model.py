@@ -0,0 +1,73 @@
+"""
+Offline-Ersatz für das Gemini-Modell im Lasttest
+Liefert nach einer konfigurierbaren Latenz eine feste Antwort, wahlweise
+als Stream mit Zeit bis zum ersten Stück und Abstand zwischen den Stücken
+"""
+
+import asyncio
+import random
+from typing import AsyncIterator, Optional
+
+
+class StubResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class StubStream:
+    """
+    Verhält sich wie die Stream-Antwort von generate_content_async(..., stream=True)
+    """
+
+    def __init__(self, pieces, interval: float):
+        self._pieces = pieces
+        self._interval = interval
+
+    async def __aiter__(self) -> AsyncIterator[StubResponse]:
+        for index, piece in enumerate(self._pieces):
+            if index:
+                await asyncio.sleep(self._interval)
+            yield StubResponse(piece)
+
+
+class StubModel:
+    """
+    latency: Gesamtdauer einer nicht gestreamten Antwort (Sekunden, ± jitter)
+    first_chunk: Zeit bis zum ersten Stück beim Streaming
+    chunks / chunk_interval: Anzahl Stücke und Abstand zwischen ihnen
+    answer_chars: Länge der Antwort
+    """
+
+    def __init__(self, latency: float = 1.0, jitter: float = 0.2, first_chunk: float = 0.4,
+                 chunks: int = 8, chunk_interval: float = 0.1, answer_chars: int = 600,
+                 seed: Optional[int] = 11):
+        self.latency = latency
+        self.jitter = jitter
+        self.first_chunk = first_chunk
+        self.chunks = max(1, chunks)
+        self.chunk_interval = chunk_interval
+        self.answer_chars = answer_chars
+        self._rng = random.Random(seed)
+
+        self.calls = 0
+        self.streamed_calls = 0
+
+    def _delay(self, base: float) -> float:
+        return max(0.0, base + self._rng.uniform(-self.jitter, self.jitter))
+
+    def _answer(self) -> str:
+        sentence = "Das ist eine simulierte Antwort aus dem Lasttest. "
+        return (sentence * (self.answer_chars // len(sentence) + 1))[:self.answer_chars]
+
+    async def generate_content_async(self, contents, stream: bool = False, **kwargs):
+        self.calls += 1
+        text = self._answer()
+        if not stream:
+            await asyncio.sleep(self._delay(self.latency))
+            return StubResponse(text)
+
+        self.streamed_calls += 1
+        await asyncio.sleep(self._delay(self.first_chunk))
+        size = len(text) // self.chunks + 1
+        pieces = [text[start:start + size] for start in range(0, len(text), size)]
+        return StubStream(pieces, self.chunk_interval)
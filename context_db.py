@@ -0,0 +1,191 @@
+"""
+Persistenter Gesprächskontext in SQLite
+Nachrichten landen zuerst in einem Puffer im Speicher und werden periodisch
+gesammelt in eine SQLite-Datenbank (WAL-Modus) geschrieben; beim Start wird
+der noch gültige Kontext wieder geladen
+"""
+
+import asyncio
+import logging
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from context_store import ContextRecord, ContextStore
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS context_messages (
+    id INTEGER PRIMARY KEY,
+    channel_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    content TEXT NOT NULL,
+    timestamp REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_context_messages_timestamp ON context_messages (timestamp);
+"""
+
+
+class ContextDatabase:
+    """
+    Write-Behind-Persistenz für den ContextStore
+
+    enqueue() hängt nur an eine Liste an und ist damit im Nachrichtenpfad praktisch kostenlos;
+    geschrieben wird im Hintergrund (run) in einem eigenen Thread, damit der Event-Loop frei bleibt
+    """
+
+    def __init__(self, db_path: str = "data/context.sqlite3", expire_seconds: float = 1800,
+                 flush_interval: float = 2.0, batch_size: int = 500, purge_interval: float = 300,
+                 max_pending: int = 200000):
+        self.db_path = Path(db_path)
+        self.expire_seconds = expire_seconds
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.purge_interval = purge_interval
+        # Obergrenze des Puffers, falls die Datenbank länger nicht beschreibbar ist
+        self.max_pending = max_pending
+
+        self._pending: List[Tuple[object, object, str, float]] = []
+        self._flush_requested: Optional[asyncio.Event] = None
+        # Ein einzelner Thread besitzt die Verbindung
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="context-db")
+        self._connection: Optional[sqlite3.Connection] = None
+        self._last_purge = 0.0
+
+        self.written = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+        self.dropped = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(_SCHEMA)
+            self._connection = connection
+        return self._connection
+
+    async def _run_in_thread(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    def enqueue(self, record: ContextRecord):
+        """
+        Merkt eine Nachricht zum Schreiben vor (ohne I/O)
+        """
+        self._pending.append((record.channel_id, record.user_id, record.content, record.timestamp))
+        if len(self._pending) >= self.batch_size and self._flush_requested is not None:
+            self._flush_requested.set()
+
+    async def warm_load(self, store: ContextStore, limit: Optional[int] = None) -> int:
+        """
+        Lädt den noch nicht abgelaufenen Kontext in den Store; gibt die Anzahl Nachrichten zurück
+        """
+        try:
+            rows = await self._run_in_thread(self._load_recent_sync, time.time() - self.expire_seconds, limit)
+        except sqlite3.Error as e:
+            logger.error(f"❌ Kontext-Datenbank {self.db_path} konnte nicht gelesen werden: {e}")
+            return 0
+
+        for channel_id, user_id, content, timestamp in rows:
+            store.add(channel_id, user_id, content, timestamp)
+        if rows:
+            logger.info(f"💬 {len(rows)} Kontext-Nachrichten aus {self.db_path} geladen")
+        return len(rows)
+
+    def _load_recent_sync(self, since: float, limit: Optional[int]) -> List[Tuple[int, int, str, float]]:
+        connection = self._connect()
+        if limit:
+            # Die neuesten Nachrichten auswählen, aber chronologisch zurückgeben
+            rows = connection.execute(
+                "SELECT channel_id, user_id, content, timestamp FROM context_messages "
+                "WHERE timestamp > ? ORDER BY timestamp DESC LIMIT ?", (since, limit)
+            ).fetchall()
+            rows.reverse()
+            return rows
+        return connection.execute(
+            "SELECT channel_id, user_id, content, timestamp FROM context_messages "
+            "WHERE timestamp > ? ORDER BY timestamp", (since,)
+        ).fetchall()
+
+    async def run(self):
+        """
+        Schreibt den Puffer alle flush_interval Sekunden (oder bei vollem Puffer früher)
+        """
+        self._flush_requested = asyncio.Event()
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_requested.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_requested.clear()
+            await self.flush()
+
+    async def flush(self):
+        """
+        Schreibt alle gepufferten Nachrichten in einer Transaktion
+        """
+        if not self._pending and time.time() - self._last_purge < self.purge_interval:
+            return
+        batch, self._pending = self._pending, []
+        try:
+            await self._run_in_thread(self._write_sync, batch)
+        except sqlite3.Error as e:
+            # z.B. "database is locked": der Batch kommt vor die inzwischen neu gepufferten
+            # Nachrichten und wird beim nächsten Flush erneut geschrieben
+            self.failed_flushes += 1
+            expire_before = time.time() - self.expire_seconds
+            self._pending = [row for row in batch if row[3] > expire_before] + self._pending
+            overflow = len(self._pending) - self.max_pending
+            if overflow > 0:
+                # Die ältesten Nachrichten zuerst aufgeben
+                del self._pending[:overflow]
+                self.dropped += overflow
+            logger.error(f"❌ Kontext konnte nicht gespeichert werden ({len(batch)} Nachrichten, "
+                         f"neuer Versuch beim nächsten Schreiben): {e}")
+
+    def _write_sync(self, batch: List[Tuple[object, object, str, float]]):
+        connection = self._connect()
+        now = time.time()
+        with connection:
+            if batch:
+                connection.executemany(
+                    "INSERT INTO context_messages (channel_id, user_id, content, timestamp) VALUES (?, ?, ?, ?)",
+                    batch
+                )
+            if now - self._last_purge >= self.purge_interval:
+                connection.execute("DELETE FROM context_messages WHERE timestamp <= ?",
+                                   (now - self.expire_seconds,))
+                self._last_purge = now
+        if batch:
+            self.written += len(batch)
+            self.flushes += 1
+
+    async def close(self):
+        """
+        Schreibt den Rest des Puffers und schließt die Verbindung
+        """
+        await self.flush()
+        await self._run_in_thread(self._close_sync)
+        self._executor.shutdown(wait=True)
+
+    def _close_sync(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Gibt geschriebene Nachrichten, Anzahl Schreibvorgänge und Puffergröße zurück
+        """
+        return {
+            "pending": len(self._pending),
+            "written": self.written,
+            "flushes": self.flushes,
+            "failed_flushes": self.failed_flushes,
+            "dropped": self.dropped,
+        }
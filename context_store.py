@@ -0,0 +1,176 @@
+"""
+Begrenzter Gesprächskontext-Speicher
+Ersetzt die unbegrenzten defaultdicts für Channel- und User-Kontext:
+globale Obergrenzen, LRU-Verdrängung inaktiver Channels/User und
+proaktives Entfernen abgelaufener Nachrichten
+"""
+
+import logging
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Dict, Hashable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ContextRecord:
+    """
+    Kompakter Eintrag einer Nachricht (slots statt Tupel/Dict)
+    Derselbe Record wird im Channel- und im User-Kontext referenziert
+    """
+    __slots__ = ("channel_id", "user_id", "content", "timestamp")
+
+    def __init__(self, channel_id: Hashable, user_id: Hashable, content: str, timestamp: float):
+        self.channel_id = channel_id
+        self.user_id = user_id
+        self.content = content
+        self.timestamp = timestamp
+
+
+class ContextStore:
+    """
+    Kontext pro Channel und pro User mit Ablaufzeit und globalen Obergrenzen
+
+    Die OrderedDicts werden nur beim Schreiben umsortiert; dadurch stehen die am
+    längsten inaktiven Einträge vorne und ein Sweep kann früh abbrechen
+    """
+
+    def __init__(self, expire_seconds: float = 1800, channel_maxlen: int = 20, user_maxlen: int = 10,
+                 max_channels: int = 10000, max_users: int = 50000, max_messages: int = 200000):
+        self.expire_seconds = expire_seconds
+        self.channel_maxlen = channel_maxlen
+        self.user_maxlen = user_maxlen
+        self.max_channels = max_channels
+        self.max_users = max_users
+        self.max_messages = max_messages
+
+        self._channels: "OrderedDict[Hashable, Deque[ContextRecord]]" = OrderedDict()
+        self._users: "OrderedDict[Hashable, Deque[ContextRecord]]" = OrderedDict()
+        # Anzahl gespeicherter Referenzen (Channel- + User-Deques)
+        self._message_count = 0
+
+        self.evicted_entries = 0
+        self.expired_messages = 0
+
+    def add(self, channel_id: Hashable, user_id: Hashable, content: str,
+            timestamp: Optional[float] = None) -> ContextRecord:
+        """
+        Speichert eine Nachricht im Channel- und im User-Kontext
+        """
+        record = ContextRecord(channel_id, user_id, content, time.time() if timestamp is None else timestamp)
+        self._append(self._channels, channel_id, record, self.channel_maxlen)
+        self._append(self._users, user_id, record, self.user_maxlen)
+        self._enforce_limits()
+        return record
+
+    def _append(self, entries: "OrderedDict[Hashable, Deque[ContextRecord]]", key: Hashable,
+                record: ContextRecord, maxlen: int):
+        records = entries.get(key)
+        if records is None:
+            records = entries[key] = deque(maxlen=maxlen)
+        else:
+            entries.move_to_end(key)
+        if len(records) < maxlen:
+            self._message_count += 1
+        records.append(record)
+
+    def _enforce_limits(self):
+        """
+        Verdrängt die am längsten inaktiven Channels/User, bis alle Obergrenzen eingehalten sind
+        """
+        while len(self._channels) > self.max_channels:
+            self._evict_oldest(self._channels)
+        while len(self._users) > self.max_users:
+            self._evict_oldest(self._users)
+        while self._message_count > self.max_messages and (self._channels or self._users):
+            # Den insgesamt ältesten Eintrag beider Bereiche verdrängen
+            oldest_channel = self._newest_timestamp(self._channels)
+            oldest_user = self._newest_timestamp(self._users)
+            if oldest_user is None or (oldest_channel is not None and oldest_channel <= oldest_user):
+                self._evict_oldest(self._channels)
+            else:
+                self._evict_oldest(self._users)
+
+    @staticmethod
+    def _newest_timestamp(entries: "OrderedDict[Hashable, Deque[ContextRecord]]") -> Optional[float]:
+        if not entries:
+            return None
+        records = entries[next(iter(entries))]
+        return records[-1].timestamp if records else float("-inf")
+
+    def _evict_oldest(self, entries: "OrderedDict[Hashable, Deque[ContextRecord]]"):
+        _, records = entries.popitem(last=False)
+        self._message_count -= len(records)
+        self.evicted_entries += 1
+
+    def _drop_expired(self, records: Deque[ContextRecord], expire_before: float):
+        """
+        Entfernt abgelaufene Nachrichten vom Anfang (Deques sind zeitlich sortiert)
+        """
+        while records and records[0].timestamp <= expire_before:
+            records.popleft()
+            self._message_count -= 1
+            self.expired_messages += 1
+
+    def recent_channel_messages(self, channel_id: Hashable, limit: int = 5) -> List[ContextRecord]:
+        """
+        Gibt die letzten nicht abgelaufenen Nachrichten eines Channels zurück (älteste zuerst)
+        """
+        records = self._channels.get(channel_id)
+        if not records:
+            return []
+        self._drop_expired(records, time.time() - self.expire_seconds)
+        return list(records)[-limit:] if limit else list(records)
+
+    def recent_user_messages(self, user_id: Hashable, limit: int = 3,
+                             exclude: Optional[str] = None) -> List[ContextRecord]:
+        """
+        Gibt die letzten nicht abgelaufenen Nachrichten eines Users zurück (älteste zuerst)
+        Nachrichten mit dem Inhalt exclude werden übersprungen
+        """
+        records = self._users.get(user_id)
+        if not records:
+            return []
+        self._drop_expired(records, time.time() - self.expire_seconds)
+
+        selected = []
+        for record in reversed(records):
+            if record.content != exclude:
+                selected.append(record)
+            if len(selected) >= limit:
+                break
+        selected.reverse()
+        return selected
+
+    def prune(self) -> int:
+        """
+        Entfernt Channels und User, deren neueste Nachricht abgelaufen ist
+        Bricht beim ersten noch aktiven Eintrag ab; gibt die Anzahl entfernter Einträge zurück
+        """
+        expire_before = time.time() - self.expire_seconds
+        removed = 0
+        for entries in (self._channels, self._users):
+            while entries:
+                key = next(iter(entries))
+                records = entries[key]
+                if records and records[-1].timestamp > expire_before:
+                    break
+                del entries[key]
+                self._message_count -= len(records)
+                self.expired_messages += len(records)
+                removed += 1
+        if removed:
+            logger.debug(f"🧹 {removed} inaktive Kontexte entfernt")
+        return removed
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Gibt die aktuelle Größe des Speichers zurück
+        """
+        return {
+            "channels": len(self._channels),
+            "users": len(self._users),
+            "messages": self._message_count,
+            "evicted_entries": self.evicted_entries,
+            "expired_messages": self.expired_messages,
+        }
@@ -0,0 +1,366 @@
+"""
+Semantische Suche ohne Netzwerk für die Wissensdatenbank
+- HashingEmbedder: Vektoren aus gehashten Wörtern und Zeichen-n-Grammen
+  (findet auch Wortformen wie "Lieferzeiten" zu "Lieferzeit")
+- EmbeddingStore: speichert die Vektoren pro Dokument als int8/float16-Array
+  auf der Festplatte und blendet sie per Memory-Mapping ein
+- EmbeddingIndex: Top-k-Suche per Skalarprodukt (blockweise, BLAS) oder über
+  einen IVF-Index (k-Means-Partitionen, nur die nächsten Partitionen werden gelesen)
+- fuse_rankings: Reciprocal Rank Fusion von Schlüsselwort- und Vektor-Ranking
+
+Benötigt NumPy (optional, wie scipy für die TF-IDF-Engine).
+"""
+
+import hashlib
+import logging
+import os
+import re
+import zlib
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from retrieval import Analyzer
+
+try:
+    import numpy as np
+except ImportError:  # NumPy ist optional; ohne NumPy gibt es nur die Schlüsselwortsuche
+    np = None
+
+logger = logging.getLogger(__name__)
+
+RETRIEVAL_MODES = ("keyword", "semantic", "hybrid")
+EMBEDDING_DTYPES = ("int8", "float16")
+
+# Vom EmbeddingStore geschriebene Dateien (andere Dateien im Ordner bleiben unberührt)
+_VECTOR_FILE = re.compile(r"^([0-9a-f]{40})\.(vec|scale)\.npy$")
+
+
+class HashingEmbedder:
+    """
+    Zustandsloser Embedder: jedes Wort wird auf ein paar gehashte Dimensionen
+    (Wort und Zeichen-n-Gramme, mit Vorzeichen-Hash) abgebildet, ein Text ist die
+    normierte Summe seiner Wörter. Gleiche Einstellungen ergeben immer gleiche
+    Vektoren, daher lassen sich die Vektoren auf der Festplatte wiederverwenden.
+    """
+
+    def __init__(self, dim: int = 256, ngram_min: int = 3, ngram_max: int = 5,
+                 analyzer: Optional[Analyzer] = None, word_cache_size: int = 65536):
+        self.dim = dim
+        self.ngram_min = ngram_min
+        self.ngram_max = ngram_max
+        self.analyzer = analyzer or Analyzer()
+        self._word_features = lru_cache(maxsize=word_cache_size)(self._compute_word_features)
+
+    @property
+    def signature(self) -> str:
+        """
+        Kennung der Einstellungen (ändert sich die Kennung, werden Vektoren neu berechnet)
+        """
+        return f"hash-v2-{self.dim}-{self.ngram_min}-{self.ngram_max}"
+
+    def _compute_word_features(self, word: str) -> Tuple["np.ndarray", "np.ndarray"]:
+        marked = f"<{word}>"
+        grams = [marked[start:start + size]
+                 for size in range(self.ngram_min, self.ngram_max + 1)
+                 for start in range(len(marked) - size + 1)]
+        hashes = [zlib.crc32(word.encode("utf-8"))] + [zlib.crc32(gram.encode("utf-8")) for gram in grams]
+        # Das Wort selbst zählt halb so viel wie alle n-Gramme zusammen
+        weights = [0.5] + [1.0 / len(grams)] * len(grams) if grams else [1.0]
+        indices = np.fromiter((value % self.dim for value in hashes), dtype=np.int64, count=len(hashes))
+        signs = np.fromiter((-1.0 if value & 0x80000000 else 1.0 for value in hashes), dtype=np.float32,
+                            count=len(hashes))
+        return indices, signs * np.asarray(weights, dtype=np.float32)
+
+    def embed(self, texts: Sequence[str]) -> "np.ndarray":
+        """
+        Gibt ein (len(texts) x dim) float32-Array mit normierten Zeilen zurück
+        Zahlen werden übersprungen (tragen keine Bedeutung, erzeugen aber Hash-Rauschen);
+        Texte ohne Begriffe ergeben Nullvektoren
+        """
+        offsets, counts, indices, weights = [], [], [], []
+        for row, text in enumerate(texts):
+            offset = row * self.dim
+            for word in self.analyzer.analyze(text):
+                if word.isdigit():
+                    continue
+                word_indices, word_weights = self._word_features(word)
+                offsets.append(offset)
+                counts.append(len(word_indices))
+                indices.append(word_indices)
+                weights.append(word_weights)
+
+        size = len(texts) * self.dim
+        if not indices:
+            return np.zeros((len(texts), self.dim), dtype=np.float32)
+        flat = np.repeat(np.asarray(offsets, dtype=np.int64), counts) + np.concatenate(indices)
+        vectors = np.bincount(flat, weights=np.concatenate(weights), minlength=size)
+        vectors = vectors.reshape(len(texts), self.dim).astype(np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        np.divide(vectors, norms, out=vectors, where=norms > 0)
+        return vectors
+
+    def embed_query(self, text: str) -> "np.ndarray":
+        return self.embed([text])[0]
+
+
+def quantize(vectors: "np.ndarray", dtype: str) -> Tuple["np.ndarray", Optional["np.ndarray"]]:
+    """
+    int8: symmetrisch pro Zeile (Wert * scale ≈ Original); float16: ohne Skalierung
+    """
+    if dtype == "float16":
+        return vectors.astype(np.float16), None
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    quantized = np.rint(vectors / scales[:, None]).astype(np.int8)
+    return quantized, scales.astype(np.float32)
+
+
+class EmbeddingStore:
+    """
+    Vektor-Dateien pro Dokument auf der Festplatte (<schlüssel>.vec.npy und .scale.npy)
+    Der Schlüssel hängt von den Chunk-Texten und den Embedder-Einstellungen ab, sodass
+    unveränderte Dokumente beim Neuladen nicht neu eingebettet werden
+    """
+
+    def __init__(self, cache_dir: str = "data/embeddings", embedder: Optional[HashingEmbedder] = None,
+                 dtype: str = "int8", ivf_min_chunks: int = 20000, nprobe: int = 8,
+                 min_score: float = 0.15, batch_size: int = 1024):
+        if np is None:
+            raise RuntimeError("EmbeddingStore benötigt numpy")
+        if dtype not in EMBEDDING_DTYPES:
+            raise ValueError(f"Unbekannter Vektortyp: {dtype}")
+        self.cache_dir = Path(cache_dir)
+        self.embedder = embedder or HashingEmbedder()
+        self.dtype = dtype
+        self.ivf_min_chunks = ivf_min_chunks
+        self.nprobe = nprobe
+        self.min_score = min_score
+        self.batch_size = batch_size
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, texts: Sequence[str]) -> str:
+        digest = hashlib.sha1(f"{self.embedder.signature}:{self.dtype}".encode("utf-8"))
+        for text in texts:
+            digest.update(text.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def load_or_build(self, texts: Sequence[str]) -> Tuple["np.ndarray", Optional["np.ndarray"]]:
+        """
+        Gibt die (memory-mapped) Vektoren und Skalen eines Dokuments zurück
+        """
+        if not texts:
+            return np.zeros((0, self.embedder.dim), dtype=np.dtype(self.dtype)), None
+        key = self._key(texts)
+        vector_path = self.cache_dir / f"{key}.vec.npy"
+        scale_path = self.cache_dir / f"{key}.scale.npy"
+        if vector_path.exists() and (self.dtype == "float16" or scale_path.exists()):
+            self.hits += 1
+        else:
+            self.misses += 1
+            self._write(texts, vector_path, scale_path)
+        vectors = np.load(vector_path, mmap_mode="r")
+        scales = np.load(scale_path) if self.dtype == "int8" else None
+        return vectors, scales
+
+    def _write(self, texts: Sequence[str], vector_path: Path, scale_path: Path):
+        """
+        Bettet stapelweise ein und schreibt direkt in eine Datei (nie alles im Speicher)
+        """
+        tmp_path = vector_path.with_name(vector_path.name + ".tmp")
+        vectors = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.dtype(self.dtype),
+                                            shape=(len(texts), self.embedder.dim))
+        scales = np.ones(len(texts), dtype=np.float32)
+        for start in range(0, len(texts), self.batch_size):
+            batch, batch_scales = quantize(self.embedder.embed(texts[start:start + self.batch_size]), self.dtype)
+            vectors[start:start + len(batch)] = batch
+            if batch_scales is not None:
+                scales[start:start + len(batch)] = batch_scales
+        vectors.flush()
+        del vectors
+        if self.dtype == "int8":
+            np.save(scale_path, scales)
+        os.replace(tmp_path, vector_path)
+
+    def prune(self, keep: Sequence[str]):
+        """
+        Löscht Vektor-Dateien, die zu keinem der angegebenen Schlüssel gehören
+        """
+        keep = set(keep)
+        for path in self.cache_dir.glob("*.npy"):
+            match = _VECTOR_FILE.match(path.name)
+            if match and match.group(1) not in keep:
+                try:
+                    path.unlink()
+                except OSError:
+                    pass  # z.B. unter Windows noch eingeblendet; beim nächsten Mal erneut
+
+    def build_index(self, documents: Sequence[Sequence[str]]) -> "EmbeddingIndex":
+        """
+        Lädt oder berechnet die Vektoren aller Dokumente (Chunk-Texte in Index-Reihenfolge)
+        """
+        parts = [self.load_or_build(texts) for texts in documents]
+        self.prune([self._key(texts) for texts in documents])
+        return EmbeddingIndex(self.embedder, parts, ivf_min_chunks=self.ivf_min_chunks,
+                              nprobe=self.nprobe, min_score=self.min_score)
+
+    def get_stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+class EmbeddingIndex:
+    """
+    Top-k-Suche über die Vektoren mehrerer Dokumente (Chunk-ID = Position über alle Dokumente)
+    Ab ivf_min_chunks Chunks wird ein IVF-Index trainiert: sqrt(n) Partitionen per
+    sphärischem k-Means; eine Anfrage liest nur die nprobe nächsten Partitionen
+    """
+
+    def __init__(self, embedder: HashingEmbedder, parts: Sequence[Tuple["np.ndarray", Optional["np.ndarray"]]],
+                 ivf_min_chunks: int = 20000, nprobe: int = 8, min_score: float = 0.15,
+                 block_rows: int = 65536, seed: int = 0):
+        self.embedder = embedder
+        self.parts = [(vectors, scales) for vectors, scales in parts if len(vectors)]
+        self._bases = np.cumsum([0] + [len(vectors) for vectors, _ in self.parts])
+        self.count = int(self._bases[-1])
+        self.nprobe = nprobe
+        self.min_score = min_score
+        self.block_rows = block_rows
+
+        self._centroids: Optional["np.ndarray"] = None
+        self._order: Optional["np.ndarray"] = None
+        self._offsets: Optional["np.ndarray"] = None
+        if ivf_min_chunks and self.count >= ivf_min_chunks:
+            self._train_ivf(np.random.default_rng(seed))
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def nlist(self) -> int:
+        return 0 if self._centroids is None else len(self._centroids)
+
+    def _iter_blocks(self):
+        """
+        Liefert (erste Chunk-ID, float32-Block, Skalen oder None) über alle Dokumente
+        Die int8-Skalen werden erst auf die Scores angewendet (eine Multiplikation pro Zeile)
+        """
+        for (vectors, scales), base in zip(self.parts, self._bases):
+            for start in range(0, len(vectors), self.block_rows):
+                block = np.asarray(vectors[start:start + self.block_rows], dtype=np.float32)
+                block_scales = scales[start:start + len(block)] if scales is not None else None
+                yield int(base) + start, block, block_scales
+
+    def _gather(self, ids: "np.ndarray") -> "np.ndarray":
+        """
+        Liest die Vektoren sortierter Chunk-IDs (float32)
+        """
+        block = np.empty((len(ids), self.embedder.dim), dtype=np.float32)
+        bounds = np.searchsorted(ids, self._bases)
+        for (vectors, scales), base, start, end in zip(self.parts, self._bases, bounds, bounds[1:]):
+            if start == end:
+                continue
+            local = ids[start:end] - base
+            block[start:end] = vectors[local]
+            if scales is not None:
+                block[start:end] *= scales[local, None]
+        return block
+
+    def _train_ivf(self, rng):
+        nlist = int(min(4096, max(16, np.sqrt(self.count))))
+        sample_ids = np.sort(rng.choice(self.count, size=min(self.count, nlist * 40), replace=False))
+        sample = self._gather(sample_ids)
+        sample = sample[np.linalg.norm(sample, axis=1) > 0]
+        if not len(sample):
+            # Nur Nullvektoren (z.B. Chunks ohne Wörter): ohne IVF werden alle Vektoren verglichen
+            logger.info(f"🧭 Kein IVF-Index: keine Stichprobe mit Inhalt unter {self.count} Vektoren")
+            return
+        nlist = min(nlist, len(sample))
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+        for _ in range(10):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            order = np.argsort(assignment, kind="stable")
+            present, starts = np.unique(assignment[order], return_index=True)
+            sums = np.zeros_like(centroids)
+            sums[present] = np.add.reduceat(sample[order], starts, axis=0)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            # Leere Partitionen behalten ihren bisherigen Mittelpunkt
+            centroids = np.where(norms > 0, sums / np.where(norms > 0, norms, 1.0), centroids)
+
+        assignments = np.empty(self.count, dtype=np.int32)
+        for start, block, _ in self._iter_blocks():
+            assignments[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+        self._centroids = centroids.astype(np.float32)
+        self._order = np.argsort(assignments, kind="stable").astype(np.int64)
+        self._offsets = np.searchsorted(assignments[self._order], np.arange(nlist + 1))
+        logger.info(f"🧭 IVF-Index: {nlist} Partitionen über {self.count} Vektoren")
+
+    def search(self, query: str, top_k: int = 10) -> List[Tuple[int, float]]:
+        """
+        Gibt die top_k ähnlichsten (chunk_id, kosinus) Paare über min_score zurück
+        """
+        if top_k <= 0 or not self.count:
+            return []
+        vector = self.embedder.embed_query(query)
+        if not vector.any():
+            return []
+
+        if self._centroids is None:
+            ids_parts, score_parts = [], []
+            for start, block, scales in self._iter_blocks():
+                scores = block @ vector
+                if scales is not None:
+                    scores *= scales
+                keep = np.flatnonzero(scores >= self.min_score)
+                if len(keep) > top_k:
+                    keep = keep[np.argpartition(scores[keep], len(keep) - top_k)[-top_k:]]
+                ids_parts.append(keep + start)
+                score_parts.append(scores[keep])
+            ids, scores = np.concatenate(ids_parts), np.concatenate(score_parts)
+        else:
+            nprobe = min(self.nprobe, self.nlist)
+            lists = np.argpartition(self._centroids @ vector, self.nlist - nprobe)[-nprobe:]
+            ids = np.sort(np.concatenate([self._order[self._offsets[index]:self._offsets[index + 1]]
+                                          for index in lists]))
+            scores = self._gather(ids) @ vector
+            keep = scores >= self.min_score
+            ids, scores = ids[keep], scores[keep]
+
+        order = np.lexsort((ids, -scores))[:top_k]
+        return list(zip(ids[order].tolist(), scores[order].tolist()))
+
+
+def fuse_rankings(rankings: Sequence[Sequence[Tuple[int, float]]], weights: Optional[Sequence[float]] = None,
+                  k: int = 60) -> List[Tuple[int, float]]:
+    """
+    Reciprocal Rank Fusion: score = Summe von gewicht / (k + rang) über alle Rankings
+    Braucht keine vergleichbaren Scores (BM25 und Kosinus haben verschiedene Skalen)
+    """
+    weights = weights or [1.0] * len(rankings)
+    fused: Dict[int, float] = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, (chunk_id, _) in enumerate(ranking, 1):
+            fused[chunk_id] = fused.get(chunk_id, 0.0) + weight / (k + rank)
+    return sorted(fused.items(), key=lambda item: (-item[1], item[0]))
+
+
+def create_embedding_store(mode: str, **options) -> Optional[EmbeddingStore]:
+    """
+    Erstellt den Vektor-Speicher für semantic/hybrid; None für keyword oder ohne NumPy
+    """
+    if mode not in RETRIEVAL_MODES:
+        logger.warning(f"⚠️ Unbekannter RETRIEVAL_MODE '{mode}' - verwende keyword")
+        return None
+    if mode == "keyword":
+        return None
+    if np is None:
+        logger.warning(f"⚠️ RETRIEVAL_MODE '{mode}' benötigt numpy - verwende keyword")
+        return None
+    dtype = options.get("dtype", "int8")
+    if dtype not in EMBEDDING_DTYPES:
+        logger.warning(f"⚠️ Unbekannter EMBEDDING_DTYPE '{dtype}' - verwende int8")
+        options["dtype"] = "int8"
+    return EmbeddingStore(**options)
@@ -13,13 +13,28 @@ import google.generativeai as genai
 import os
 import json
 import logging
+import re
 import asyncio
-import aiohttp
-import base64
-from collections import defaultdict, deque
-from datetime import datetime, timedelta
+import signal
+import time
+from pathlib import Path
 from knowledge_base import KnowledgeBase
 from text_chunker import TextChunker
+from llm_dispatch import LLMDispatcher
+from streaming_reply import StreamingReply
+from answer_cache import ResponseCache, answer_cache_key, image_digest, vision_cache_key
+from http_client import AttachmentDownloader, AttachmentTooLarge, DownloadError
+from image_pipeline import ImagePipeline
+from context_store import ContextStore
+from context_db import ContextDatabase
+from singleflight import SingleFlight
+from scheduler import Priority, QueueFull, RateLimited, RequestScheduler, SchedulerRejected
+from question_classifier import QuestionClassifier
+from message_router import MessageRouter, Route, greeting_response, is_greeting
+from metrics import MetricsRegistry, monitor_event_loop_lag
+from status_server import StatusServer
+from profiling import RequestProfiler
+from embeddings import HashingEmbedder, create_embedding_store
 
 # Logging konfigurieren
 logging.basicConfig(level=logging.INFO)
@@ -32,27 +47,183 @@ CONFIG_DETAILS = {}
 intents = discord.Intents.default()
 intents.message_content = True
 
-bot = commands.Bot(command_prefix='!', intents=intents)
+class EnhancedBot(commands.Bot):
+    """Bot mit Lebenszyklus für langlebige Ressourcen (z.B. HTTP-Session)"""
+
+    async def setup_hook(self):
+        global attachment_downloader, image_pipeline, context_store, context_sweep_task, context_db, context_flush_task, message_router
+        message_router = MessageRouter(
+            QuestionClassifier(threshold=CONFIG_DETAILS.get('QUESTION_THRESHOLD', QUESTION_THRESHOLD)),
+            command_prefix=self.command_prefix
+        )
+        await start_metrics()
+        request_profiler.output_dir = Path(CONFIG_DETAILS.get('PROFILE_DIR', PROFILE_DIR))
+        request_profiler.top = CONFIG_DETAILS.get('PROFILE_TOP_FUNCTIONS', PROFILE_TOP_FUNCTIONS)
+        # SIGUSR1 schaltet das Profiling ein und aus (nicht unter Windows)
+        if hasattr(signal, 'SIGUSR1'):
+            try:
+                asyncio.get_running_loop().add_signal_handler(signal.SIGUSR1, toggle_profiler_from_signal)
+            except (NotImplementedError, RuntimeError):
+                pass
+        context_store = ContextStore(
+            expire_seconds=CONFIG_DETAILS.get('CONTEXT_EXPIRE_MINUTES', CONTEXT_EXPIRE_MINUTES) * 60,
+            max_channels=CONFIG_DETAILS.get('CONTEXT_MAX_CHANNELS', CONTEXT_MAX_CHANNELS),
+            max_users=CONFIG_DETAILS.get('CONTEXT_MAX_USERS', CONTEXT_MAX_USERS),
+            max_messages=CONFIG_DETAILS.get('CONTEXT_MAX_MESSAGES', CONTEXT_MAX_MESSAGES)
+        )
+        context_sweep_task = asyncio.create_task(sweep_context_store())
+        context_db_file = CONFIG_DETAILS.get('CONTEXT_DB_FILE', CONTEXT_DB_FILE)
+        if context_db_file:
+            context_db = ContextDatabase(
+                db_path=context_db_file,
+                expire_seconds=context_store.expire_seconds,
+                flush_interval=CONFIG_DETAILS.get('CONTEXT_FLUSH_INTERVAL', CONTEXT_FLUSH_INTERVAL),
+                max_pending=context_store.max_messages
+            )
+            await context_db.warm_load(context_store, limit=context_store.max_messages)
+            context_flush_task = asyncio.create_task(context_db.run())
+        attachment_downloader = AttachmentDownloader(
+            max_bytes=CONFIG_DETAILS.get('IMAGE_MAX_MB', IMAGE_MAX_MB) * 1024 * 1024,
+            timeout=CONFIG_DETAILS.get('IMAGE_DOWNLOAD_TIMEOUT', IMAGE_DOWNLOAD_TIMEOUT)
+        )
+        await attachment_downloader.start()
+        image_pipeline = ImagePipeline(
+            max_edge=CONFIG_DETAILS.get('IMAGE_MAX_EDGE', IMAGE_MAX_EDGE),
+            quality=CONFIG_DETAILS.get('IMAGE_QUALITY', IMAGE_QUALITY)
+        )
+
+    async def close(self):
+        await request_profiler.close()
+        if loop_lag_task:
+            loop_lag_task.cancel()
+        if status_server:
+            await status_server.stop()
+        if context_sweep_task:
+            context_sweep_task.cancel()
+        if context_flush_task:
+            context_flush_task.cancel()
+        if context_db:
+            await context_db.close()
+        if attachment_downloader:
+            await attachment_downloader.close()
+        if image_pipeline:
+            image_pipeline.shutdown()
+        if knowledge_watch_task:
+            knowledge_watch_task.cancel()
+        if knowledge_base:
+            knowledge_base.close()
+        if llm_scheduler:
+            llm_scheduler.shutdown()
+        if llm_dispatcher:
+            llm_dispatcher.shutdown()
+        await super().close()
+
+bot = EnhancedBot(command_prefix='!', intents=intents)
 
 # Globale Variablen
 knowledge_base = None
 text_chunker = None
 gemini_model = None
 gemini_vision_model = None
+llm_dispatcher = None
+llm_scheduler = None
+answer_cache = None
+vision_cache = None
+knowledge_watch_task = None
+attachment_downloader = None
+image_pipeline = None
+# Kontext-Speicher für Channel- und User-Kontext (wird in setup_hook erstellt)
+context_store = None
+context_sweep_task = None
+context_db = None
+context_flush_task = None
+# Links in Nachrichten (werden nicht geöffnet, nur erwähnt)
+URL_PATTERN = re.compile(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+')
+# Messpunkte pro Verarbeitungsschritt (immer aktiv, Ausgabe über den Status-Server)
+metrics = MetricsRegistry()
+status_server = None
+loop_lag_task = None
+# Profiling bei Bedarf (!profile oder SIGUSR1); muss vor den Handlern existieren
+request_profiler = RequestProfiler()
+# Ordnet Nachrichten vor jeder teuren Verarbeitung einer Route zu (wird in setup_hook erstellt)
+message_router = None
+# Gleichzeitige identische Fragen teilen sich einen Gemini-Aufruf
+# Abgelehnte Anfragen (Rate-Limit, Lastabwurf) betreffen nur den ausführenden User
+question_flights = SingleFlight(leader_errors=(SchedulerRejected,))
 
-# Kontext-Speicher: {channel_id: deque([(user_id, message, timestamp), ...])}
-channel_context = defaultdict(lambda: deque(maxlen=20))
-# User-spezifischer Kontext: {user_id: deque([message, ...])}
-user_context = defaultdict(lambda: deque(maxlen=10))
+# Höfliche Antworten beim Lastabwurf
+RATE_LIMIT_MESSAGE = "⏳ Du stellst gerade sehr viele Fragen. Bitte warte etwa {seconds} Sekunden und versuche es dann erneut."
+OVERLOAD_MESSAGE = "⏳ Gerade sind sehr viele Anfragen offen. Bitte versuche es in einem Moment erneut."
 
 # Konfiguration
 CONTEXT_EXPIRE_MINUTES = 30
 MAX_CONTEXT_MESSAGES = 15
+# Obergrenzen des Kontext-Speichers; darüber werden die am längsten inaktiven Einträge verdrängt
+CONTEXT_MAX_CHANNELS = 10000
+CONTEXT_MAX_USERS = 50000
+CONTEXT_MAX_MESSAGES = 200000
+# Schwellwert der automatischen Fragenerkennung (höher = weniger automatische Antworten)
+QUESTION_THRESHOLD = 1.5
+# Intervall in Sekunden, in dem abgelaufener Kontext entfernt wird
+CONTEXT_SWEEP_INTERVAL = 60
+# SQLite-Datei für den Kontext über Neustarts hinweg (leer = nur im Speicher) und Schreibintervall in Sekunden
+CONTEXT_DB_FILE = "data/context.sqlite3"
+CONTEXT_FLUSH_INTERVAL = 2.0
+# Gemini-Dispatch: maximale parallele Anfragen und Timeout pro Anfrage (überschreibbar in config.json)
+LLM_MAX_IN_FLIGHT = 4
+LLM_TIMEOUT_SECONDS = 60
+# Zulassung: maximale Warteschlange, Anfragen pro User und Minute (Burst) und optionale Guild-Gewichte
+LLM_QUEUE_SIZE = 100
+USER_RATE_PER_MINUTE = 6
+USER_BURST = 3
+GUILD_WEIGHTS = {}
+# Antworten gestreamt anzeigen und höchstens alle STREAM_EDIT_INTERVAL Sekunden editieren
+STREAM_RESPONSES = True
+STREAM_EDIT_INTERVAL = 1.0
+# Antwort-Cache: Anzahl Einträge, Lebensdauer und optionale Datei für Persistenz
+ANSWER_CACHE_SIZE = 512
+ANSWER_CACHE_TTL_MINUTES = 60
+ANSWER_CACHE_FILE = None
+# Vision-Cache: Bildanalysen pro Bildinhalt und Frage
+VISION_CACHE_SIZE = 256
+VISION_CACHE_TTL_MINUTES = 60
+# Ordner für den Cache extrahierter PDF-/Textinhalte (leer = deaktiviert)
+EXTRACTION_CACHE_DIR = "data/extraction_cache"
+# Intervall in Sekunden, in dem der Wissensordner auf Änderungen geprüft wird (0 = aus)
+KNOWLEDGE_WATCH_INTERVAL = 60
+# Bild-Downloads: maximale Größe in MB und Timeout in Sekunden
+IMAGE_MAX_MB = 10
+IMAGE_DOWNLOAD_TIMEOUT = 30
+# Bildvorverarbeitung: maximale Kantenlänge in Pixeln und Qualität beim Neukodieren
+IMAGE_MAX_EDGE = 1536
+IMAGE_QUALITY = 85
+# Überlappung benachbarter Wissens-Chunks in Zeichen (0 = keine)
+CHUNK_OVERLAP = 0
+# PDF-Extraktion: Anzahl Prozesse (None = alle CPU-Kerne) und Seiten pro Teilaufgabe
+PDF_WORKERS = None
+PDF_PAGES_PER_TASK = 50
+# Bewertung der Wissens-Chunks: "bm25" (invertierter Index) oder "tfidf" (dünne Matrix, benötigt numpy/scipy)
+RETRIEVAL_ENGINE = "bm25"
+# Vektorsuche ohne Netzwerk: "keyword" (aus), "semantic" oder "hybrid" (Schlüsselwörter + Vektoren, benötigt numpy)
+RETRIEVAL_MODE = "keyword"
+EMBEDDING_DIR = "data/embeddings"
+EMBEDDING_DIM = 256
+EMBEDDING_DTYPE = "int8"
+# Ab dieser Chunk-Anzahl wird ein IVF-Index genutzt; durchsucht werden EMBEDDING_NPROBE Partitionen
+EMBEDDING_IVF_MIN_CHUNKS = 20000
+EMBEDDING_NPROBE = 8
+# Status-Server für Metriken im Prometheus-Format (Port 0 = aus); nur lokal erreichbar
+METRICS_HOST = "127.0.0.1"
+METRICS_PORT = 9108
+# Profiling: Zielordner, Anzahl Anfragen pro Mitschnitt (SIGUSR1 und !profile ohne Zahl), Zeilen der Zusammenfassung
+PROFILE_DIR = "data/profiles"
+PROFILE_REQUESTS = 20
+PROFILE_TOP_FUNCTIONS = 15
 
 @bot.event
 async def on_ready():
     """Bot ist bereit"""
-    global knowledge_base, text_chunker, gemini_model, gemini_vision_model, CONFIG_DETAILS
+    global knowledge_base, text_chunker, gemini_model, gemini_vision_model, llm_dispatcher, llm_scheduler, answer_cache, vision_cache, knowledge_watch_task, CONFIG_DETAILS
     
     logger.info(f'🤖 Bot {bot.user} ist online!')
     
@@ -68,6 +239,30 @@ async def on_ready():
         genai.configure(api_key=api_key)
         gemini_model = genai.GenerativeModel('gemini-1.5-pro-latest')
         gemini_vision_model = genai.GenerativeModel('gemini-1.5-pro-latest')
+        # Nach einem Reconnect: laufende Anfragen behalten ihre bisherigen Objekte,
+        # deren Thread-Pool und Warteschlange werden danach beendet
+        previous_dispatcher, previous_scheduler = llm_dispatcher, llm_scheduler
+        llm_scheduler = RequestScheduler(
+            max_concurrent=CONFIG_DETAILS.get('LLM_MAX_IN_FLIGHT', LLM_MAX_IN_FLIGHT),
+            max_queue=CONFIG_DETAILS.get('LLM_QUEUE_SIZE', LLM_QUEUE_SIZE),
+            user_rate_per_minute=CONFIG_DETAILS.get('USER_RATE_PER_MINUTE', USER_RATE_PER_MINUTE),
+            user_burst=CONFIG_DETAILS.get('USER_BURST', USER_BURST),
+            guild_weights={
+                int(guild_id): float(weight)
+                for guild_id, weight in CONFIG_DETAILS.get('GUILD_WEIGHTS', GUILD_WEIGHTS).items()
+            }
+        )
+        # Alle Modellaufrufe laufen in einem Scheduler-Slot: der Scheduler ist die einzige
+        # Begrenzung (sonst warteten zugelassene Anfragen erneut, an WFQ und Lastabwurf vorbei)
+        llm_dispatcher = LLMDispatcher(
+            max_in_flight=llm_scheduler.max_concurrent,
+            timeout=CONFIG_DETAILS.get('LLM_TIMEOUT_SECONDS', LLM_TIMEOUT_SECONDS),
+            limit_concurrency=False
+        )
+        if previous_dispatcher:
+            previous_dispatcher.shutdown()
+        if previous_scheduler:
+            previous_scheduler.shutdown()
         logger.info("✅ Gemini Pro + Vision configured using key from config.json.")
     except Exception as e:
         logger.error(f"Gemini API Fehler: {e}")
@@ -79,20 +274,73 @@ async def on_ready():
         # global CONFIG_DETAILS is already specified for on_ready
         knowledge_dir_from_config = CONFIG_DETAILS.get('KNOWLEDGE_BASE_DIR')
 
+        text_chunker = TextChunker(overlap=CONFIG_DETAILS.get('CHUNK_OVERLAP', CHUNK_OVERLAP))
+
+        knowledge_options = {
+            'chunker': text_chunker,
+            'cache_dir': CONFIG_DETAILS.get('EXTRACTION_CACHE_DIR', EXTRACTION_CACHE_DIR),
+            'pdf_workers': CONFIG_DETAILS.get('PDF_WORKERS', PDF_WORKERS),
+            'pages_per_task': CONFIG_DETAILS.get('PDF_PAGES_PER_TASK', PDF_PAGES_PER_TASK),
+            'retrieval_engine': CONFIG_DETAILS.get('RETRIEVAL_ENGINE', RETRIEVAL_ENGINE),
+        }
+        retrieval_mode = CONFIG_DETAILS.get('RETRIEVAL_MODE', RETRIEVAL_MODE)
+        knowledge_options['retrieval_mode'] = retrieval_mode
+        knowledge_options['embedding_store'] = create_embedding_store(
+            retrieval_mode,
+            cache_dir=CONFIG_DETAILS.get('EMBEDDING_DIR', EMBEDDING_DIR),
+            embedder=HashingEmbedder(dim=CONFIG_DETAILS.get('EMBEDDING_DIM', EMBEDDING_DIM)),
+            dtype=CONFIG_DETAILS.get('EMBEDDING_DTYPE', EMBEDDING_DTYPE),
+            ivf_min_chunks=CONFIG_DETAILS.get('EMBEDDING_IVF_MIN_CHUNKS', EMBEDDING_IVF_MIN_CHUNKS),
+            nprobe=CONFIG_DETAILS.get('EMBEDDING_NPROBE', EMBEDDING_NPROBE)
+        )
+
+        if answer_cache is None:
+            answer_cache = ResponseCache(
+                max_entries=CONFIG_DETAILS.get('ANSWER_CACHE_SIZE', ANSWER_CACHE_SIZE),
+                ttl_seconds=CONFIG_DETAILS.get('ANSWER_CACHE_TTL_MINUTES', ANSWER_CACHE_TTL_MINUTES) * 60,
+                persist_path=CONFIG_DETAILS.get('ANSWER_CACHE_FILE', ANSWER_CACHE_FILE)
+            )
+            answer_cache.load()
+
+        if vision_cache is None:
+            vision_cache = ResponseCache(
+                max_entries=CONFIG_DETAILS.get('VISION_CACHE_SIZE', VISION_CACHE_SIZE),
+                ttl_seconds=CONFIG_DETAILS.get('VISION_CACHE_TTL_MINUTES', VISION_CACHE_TTL_MINUTES) * 60
+            )
+
         if knowledge_dir_from_config:
             logger.info(f"📚 Using custom knowledge base directory: {knowledge_dir_from_config}")
-            knowledge_base = KnowledgeBase(data_folder=knowledge_dir_from_config)
+            new_knowledge_base = KnowledgeBase(data_folder=knowledge_dir_from_config, **knowledge_options)
         else:
             logger.info("📚 Using default knowledge base directory 'user_knowledge/'.")
-            knowledge_base = KnowledgeBase() # Uses the new default "user_knowledge"
+            new_knowledge_base = KnowledgeBase(**knowledge_options) # Uses the new default "user_knowledge"
 
-        text_chunker = TextChunker() # Assuming TextChunker doesn't need path
-        await knowledge_base.load_knowledge_base()
+        # Gecachte Antworten passen nach einer Wissensänderung nicht mehr
+        new_knowledge_base.on_reload(answer_cache.clear)
+        try:
+            await new_knowledge_base.load_knowledge_base()
+        except Exception:
+            new_knowledge_base.close()
+            raise
+        
+        # Erst nach dem Laden umschalten: bis hierhin antwortet (z.B. nach einem Reconnect)
+        # weiter der bisherige Stand; dessen Überwachung endet, bevor sein Pool geschlossen wird
+        if knowledge_watch_task:
+            knowledge_watch_task.cancel()
+            knowledge_watch_task = None
+        previous_knowledge_base, knowledge_base = knowledge_base, new_knowledge_base
+        if previous_knowledge_base:
+            previous_knowledge_base.close()
         
         # Update the log message to reflect the actual path used by knowledge_base instance
         file_count = len(knowledge_base.get_loaded_files())
         logger.info(f"✅ {file_count} Wissensdateien geladen aus '{knowledge_base.data_folder}'")
         
+        # Wissensordner auf neue/geänderte Dateien überwachen
+        watch_interval = CONFIG_DETAILS.get('KNOWLEDGE_WATCH_INTERVAL', KNOWLEDGE_WATCH_INTERVAL)
+        if watch_interval and watch_interval > 0:
+            knowledge_watch_task = asyncio.create_task(knowledge_base.watch(watch_interval))
+        
         # Bot Status setzen
         await bot.change_presence(
             activity=discord.Activity(
@@ -104,74 +352,98 @@ async def on_ready():
     except Exception as e:
         logger.error(f"Wissensdatenbank Fehler: {e}")
 
-def store_message_context(channel_id, user_id, message_content):
-    """Speichert Nachricht im Kontext"""
-    timestamp = datetime.now()
+async def start_metrics():
+    """Registriert die Kennzahlen aller Komponenten und startet den Status-Server"""
+    global status_server, loop_lag_task
+    metrics.describe("bot_stage_seconds", "Dauer der Verarbeitungsschritte pro Handler")
+    metrics.describe("bot_route_seconds", "Gesamtdauer der Nachrichtenverarbeitung pro Route")
+    # Die Komponenten werden teils erst in on_ready erstellt, daher erst beim Abruf auflösen
+    metrics.register_stats("bot_llm_scheduler", lambda: llm_scheduler.get_stats() if llm_scheduler else None)
+    metrics.register_stats("bot_llm_dispatcher", lambda: llm_dispatcher.get_stats() if llm_dispatcher else None)
+    metrics.register_stats("bot_answer_cache", lambda: answer_cache.get_stats() if answer_cache else None)
+    metrics.register_stats("bot_vision_cache", lambda: vision_cache.get_stats() if vision_cache else None)
+    metrics.register_stats("bot_coalescing", question_flights.get_stats)
+    metrics.register_stats("bot_context", lambda: context_store.get_stats() if context_store else None)
+    metrics.register_stats("bot_context_db", lambda: context_db.get_stats() if context_db else None)
+    metrics.register_stats("bot_attachments", lambda: attachment_downloader.get_stats() if attachment_downloader else None)
+    metrics.register_stats("bot_images", lambda: image_pipeline.get_stats() if image_pipeline else None)
+    metrics.register_stats("bot_knowledge", lambda: knowledge_base.index.get_stats() if knowledge_base else None)
     
-    # Channel-Kontext speichern
-    channel_context[channel_id].append((user_id, message_content, timestamp))
+    loop_lag_task = asyncio.create_task(monitor_event_loop_lag(metrics))
     
-    # User-Kontext speichern
-    user_context[user_id].append((message_content, timestamp))
+    port = CONFIG_DETAILS.get('METRICS_PORT', METRICS_PORT)
+    if port:
+        status_server = StatusServer(metrics, host=CONFIG_DETAILS.get('METRICS_HOST', METRICS_HOST), port=port)
+        try:
+            await status_server.start()
+        except OSError as e:
+            logger.error(f"❌ Status-Server konnte nicht gestartet werden: {e}")
+            status_server = None
+
+def toggle_profiler_from_signal():
+    """SIGUSR1: startet einen Mitschnitt oder beendet den laufenden; der Bericht landet im Log"""
+    if not request_profiler.stop():
+        request_profiler.arm(CONFIG_DETAILS.get('PROFILE_REQUESTS', PROFILE_REQUESTS))
+
+async def sweep_context_store():
+    """Entfernt regelmäßig Channels und User ohne gültigen Kontext"""
+    interval = CONFIG_DETAILS.get('CONTEXT_SWEEP_INTERVAL', CONTEXT_SWEEP_INTERVAL)
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            context_store.prune()
+        except Exception as e:
+            logger.error(f"Kontext-Bereinigung fehlgeschlagen: {e}")
+
+def store_message_context(channel_id, user_id, message_content):
+    """Speichert Nachricht im Kontext (die Datenbank wird gesammelt im Hintergrund geschrieben)"""
+    record = context_store.add(channel_id, user_id, message_content)
+    if context_db:
+        context_db.enqueue(record)
 
 def get_relevant_context(channel_id, user_id, current_message):
     """Holt relevanten Kontext für bessere Antworten"""
     context_parts = []
     
-    # Aktuelle Zeit
-    now = datetime.now()
-    expire_time = now - timedelta(minutes=CONTEXT_EXPIRE_MINUTES)
-    
     # Channel-Kontext (letzte Nachrichten in diesem Channel)
-    recent_channel_messages = []
-    for uid, msg, timestamp in reversed(channel_context[channel_id]):
-        if timestamp > expire_time:
-            recent_channel_messages.append(f"User {uid}: {msg}")
-        if len(recent_channel_messages) >= 5:
-            break
+    recent_channel_messages = [
+        f"User {record.user_id}: {record.content}"
+        for record in context_store.recent_channel_messages(channel_id, limit=5)
+    ]
     
     if recent_channel_messages:
-        context_parts.append("AKTUELLER CHAT-KONTEXT:\n" + "\n".join(reversed(recent_channel_messages)))
+        context_parts.append("AKTUELLER CHAT-KONTEXT:\n" + "\n".join(recent_channel_messages))
     
     # User-spezifischer Kontext
-    user_messages = []
-    for msg, timestamp in reversed(user_context[user_id]):
-        if timestamp > expire_time and msg != current_message:
-            user_messages.append(msg)
-        if len(user_messages) >= 3:
-            break
+    user_messages = [
+        record.content
+        for record in context_store.recent_user_messages(user_id, limit=3, exclude=current_message)
+    ]
     
     if user_messages:
-        context_parts.append("VORHERIGE FRAGEN DIESES USERS:\n" + "\n".join(reversed(user_messages)))
+        context_parts.append("VORHERIGE FRAGEN DIESES USERS:\n" + "\n".join(user_messages))
     
     return "\n\n".join(context_parts)
 
-async def download_image(url):
-    """Lädt Bild herunter und konvertiert zu Base64"""
+async def download_image(attachment):
+    """Lädt ein Bild über die gemeinsame HTTP-Session (gestreamt, größenbegrenzt)"""
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as response:
-                if response.status == 200:
-                    image_data = await response.read()
-                    return base64.b64encode(image_data).decode('utf-8')
-        return None
-    except Exception as e:
+        return await attachment_downloader.download(attachment.url, declared_size=attachment.size)
+    except AttachmentTooLarge:
+        raise
+    except DownloadError as e:
         logger.error(f"Fehler beim Bilddownload: {e}")
         return None
 
-async def analyze_image_with_context(image_data, question, context):
-    """Analysiert Bild mit Kontext und Dropshipping-Wissen"""
-    global gemini_vision_model, knowledge_base, text_chunker
+async def analyze_image_with_context(image_data, question, context, mime_type="image/jpeg", cache_key=None):
+    """Analysiert Bild mit Kontext und Dropshipping-Wissen (erfolgreiche Analysen landen im Vision-Cache)"""
+    global gemini_vision_model, knowledge_base, text_chunker, llm_dispatcher, vision_cache
     
     try:
         # Relevante Wissensinhalte für Bildanalyse
         relevant_chunks = []
         if knowledge_base and question:
-            relevant_chunks = text_chunker.get_relevant_chunks(
-                knowledge_base.get_combined_content(),
-                question,
-                max_tokens=6000
-            )
+            relevant_chunks = knowledge_base.get_relevant_chunks(question, max_tokens=6000)
         
         knowledge_context = ""
         if relevant_chunks:
@@ -196,16 +468,22 @@ Respond clearly and concisely.
 
         # Erstelle Bild-Teil für Gemini
         image_part = {
-            "mime_type": "image/jpeg",
+            "mime_type": mime_type,
             "data": image_data
         }
         
-        response = gemini_vision_model.generate_content([prompt, image_part])
+        started = time.perf_counter()
+        response = await llm_dispatcher.generate(gemini_vision_model, [prompt, image_part])
+        logger.info(f"🖼️ Vision-Latenz: {time.perf_counter() - started:.2f}s")
         
         if response and response.text:
+            if cache_key and vision_cache:
+                vision_cache.put(cache_key, response.text)
             return response.text
         return "Entschuldigung, ich konnte das Bild nicht analysieren."
         
+    except asyncio.TimeoutError:
+        return "⏱️ Die Bildanalyse hat zu lange gedauert. Bitte versuche es später erneut."
     except Exception as e:
         logger.error(f"Bildanalyse Fehler: {e}")
         return "Fehler bei der Bildanalyse. Bitte versuche es erneut."
@@ -222,9 +500,10 @@ async def frage_command(ctx, *, question: str = None):
     
     await handle_question_with_context(ctx, question)
 
+@request_profiler.profiled("frage")
 async def handle_question_with_context(ctx, question):
     """Verarbeitet Frage mit vollständigem Kontext"""
-    global knowledge_base, text_chunker, gemini_model
+    global knowledge_base, text_chunker, gemini_model, llm_dispatcher, answer_cache
     
     if not knowledge_base or not gemini_model:
         await ctx.send("❌ Bot nicht vollständig initialisiert.")
@@ -232,47 +511,40 @@ async def handle_question_with_context(ctx, question):
     
     logger.info(f"Frage mit Kontext von {ctx.author}: {question}")
     
+    # Einfache Begrüßungen sofort beantworten, ohne Wissenssuche und KI
+    if is_greeting(question):
+        await send_long_message(ctx, greeting_response(question, style="explicit"))
+        return
+    
     async with ctx.typing():
         try:
+            stages = metrics.stage_timer("frage")
+            
             # Kontext abrufen
             context = get_relevant_context(ctx.channel.id, ctx.author.id, question)
+            stages.mark("context")
             
-            # Relevante Wissensinhalte finden
-            knowledge_content = knowledge_base.get_combined_content()
-            relevant_chunks = text_chunker.get_relevant_chunks(
-                knowledge_content,
+            # Relevante Wissensinhalte aus dem vorberechneten Index finden
+            relevant_records = knowledge_base.search(
                 question + " " + context,  # Kontext in Suche einbeziehen
                 max_tokens=7000
             )
+            relevant_chunks = [record.text for record in relevant_records]
+            stages.mark("retrieval")
             
             if not relevant_chunks:
                 await ctx.send("🔍 Keine relevanten Informationen gefunden.")
                 return
             
-            # Prüfe ob es eine einfache Begrüßung ist
-            greeting_words = ['hallo', 'hi', 'hey', 'guten tag', 'moin', 'servus', 'wie geht', 'wie läuft']
-            is_greeting = any(word in question.lower() for word in greeting_words) and len(question.split()) <= 6
-            
-            if is_greeting:
-                # Spracherkennung für Begrüßung
-                is_english = any(word in question.lower() for word in ['hello', 'hi', 'hey', 'how are you'])
-                
-                if is_english:
-                    greeting_responses = [
-                        "Hello! How can I assist you today?",
-                        "Hi there! What can I help you with?",
-                        "Greetings! I'm here to help. What's your question?"
-                    ]
-                else:
-                    greeting_responses = [
-                        "Hallo! Wie kann ich Ihnen heute behilflich sein?",
-                        "Hallo! Womit kann ich Ihnen helfen?",
-                        "Guten Tag! Ich bin hier, um zu helfen. Was ist Ihre Frage?"
-                    ]
-                
-                import random
-                response_text = random.choice(greeting_responses)
-                await send_long_message(ctx, response_text)
+            # Antwort-Cache prüfen
+            cache_key = answer_cache_key(
+                question, [record.chunk_id for record in relevant_records], knowledge_base.version
+            )
+            cached_answer = answer_cache.get(cache_key)
+            stages.mark("cache")
+            if cached_answer:
+                await send_long_message(ctx, cached_answer)
+                stages.mark("send")
                 return
             
             # Erweiterten Prompt für fachliche Fragen erstellen
@@ -316,18 +588,118 @@ ANWEISUNGEN:
 - Behalten Sie einen neutralen und hilfsbereiten Ton bei.
 - Antworten Sie in der Sprache der aktuellen Frage (Deutsch).'''
 
-            # Gemini API Anfrage
-            response = gemini_model.generate_content(prompt)
+            stages.mark("prompt")
             
-            if response and response.text:
-                await send_long_message(ctx, response.text)
-            else:
+            # Gemini API Anfrage (außerhalb des Event-Loops)
+            async def generate_answer():
+                # Kontingent nur für einen eigenen Modellaufruf prüfen (Cache-Treffer und
+                # zusammengeführte Fragen kosten nichts)
+                llm_scheduler.check_rate(ctx.author.id)
+                async with llm_scheduler.slot(ctx.guild.id if ctx.guild else None, Priority.EXPLICIT):
+                    stages.mark("queue")
+                    if CONFIG_DETAILS.get('STREAM_RESPONSES', STREAM_RESPONSES):
+                        # Beim Streaming sind Erzeugen und Senden verzahnt
+                        answer = await stream_answer(prompt, ctx.send, ctx.send)
+                        stages.mark("generate")
+                        return answer
+                    response = await llm_dispatcher.generate(gemini_model, prompt)
+                    stages.mark("generate")
+                    if response and response.text:
+                        await send_long_message(ctx, response.text)
+                        stages.mark("send")
+                        return response.text
+                    return ""
+            
+            # Läuft dieselbe Frage (gleiche Wissens-Chunks) bereits, deren Antwort übernehmen
+            answer, shared = await question_flights.do(cache_key, generate_answer)
+            if shared:
+                stages.mark("coalesced")
+            
+            if not answer:
                 await ctx.send("❌ Keine Antwort von der KI erhalten.")
+            elif shared:
+                await send_long_message(ctx, answer)
+                stages.mark("send")
+            else:
+                answer_cache.put(cache_key, answer)
                 
+        except RateLimited as e:
+            await ctx.send(RATE_LIMIT_MESSAGE.format(seconds=max(1, round(e.retry_after))))
+        except QueueFull:
+            await ctx.send(OVERLOAD_MESSAGE)
+        except asyncio.TimeoutError:
+            await ctx.send("⏱️ Die KI hat zu lange für eine Antwort gebraucht. Bitte versuche es später erneut.")
         except Exception as e:
             logger.error(f"Fehler bei kontextbasierter Frage: {e}")
             await ctx.send("❌ Fehler bei der Verarbeitung deiner Frage.")
 
+@bot.command(name='reload')
+@commands.has_permissions(administrator=True)
+async def reload_command(ctx):
+    """Lädt neue, geänderte und gelöschte Wissensdateien neu (nur Administratoren)"""
+    global knowledge_base
+    
+    if not knowledge_base:
+        await ctx.send("❌ Wissensdatenbank nicht geladen.")
+        return
+    
+    async with ctx.typing():
+        summary = await knowledge_base.reload()
+    
+    await ctx.send(
+        f"🔄 Wissensdatenbank aktualisiert: {summary['added']} neu, {summary['changed']} geändert, "
+        f"{summary['removed']} entfernt, {summary['unchanged']} unverändert."
+    )
+
+@reload_command.error
+async def reload_command_error(ctx, error):
+    """Fehlerbehandlung für !reload"""
+    if isinstance(error, (commands.MissingPermissions, commands.NoPrivateMessage)):
+        await ctx.send("🔒 Nur Administratoren eines Servers können die Wissensdatenbank neu laden.")
+    else:
+        logger.error(f"Reload-Command Fehler: {error}")
+        await ctx.send("❌ Fehler beim Neuladen der Wissensdatenbank.")
+
+@bot.command(name='profile')
+@commands.is_owner()
+async def profile_command(ctx, requests: int = None):
+    """Profiliert die nächsten N Anfragen und postet die teuersten Funktionen (nur Bot-Owner); 0 beendet"""
+    if requests == 0:
+        if request_profiler.stop():
+            await ctx.send("🔬 Profiling wird beendet. Bereits erfasste Anfragen erscheinen im Bericht.")
+        else:
+            await ctx.send("ℹ️ Es läuft kein Profiling.")
+        return
+    
+    if requests is not None and requests < 0:
+        await ctx.send("❓ Verwendung: `!profile 20` (Anzahl Anfragen) oder `!profile 0` zum Beenden.")
+        return
+    requests = requests or CONFIG_DETAILS.get('PROFILE_REQUESTS', PROFILE_REQUESTS)
+    
+    async def post_report(report):
+        kinds = ", ".join(f"{kind}: {count}" for kind, count in sorted(report.kinds.items()))
+        header = (f"🔬 **Profil** von {report.requests} Anfragen ({kinds}) über {report.duration:.1f}s\n"
+                  f"Gespeichert unter `{report.path}`\n")
+        # Discord erlaubt 2000 Zeichen pro Nachricht
+        summary = report.summary[:1900 - len(header)]
+        await ctx.send(f"{header}```\n{summary}\n```")
+    
+    if request_profiler.arm(requests, notify=post_report):
+        await ctx.send(f"🔬 Profiling für die nächsten {requests} Anfragen aktiviert.")
+    else:
+        await ctx.send("⏳ Es läuft bereits ein Profiling. Mit `!profile 0` beenden.")
+
+@profile_command.error
+async def profile_command_error(ctx, error):
+    """Fehlerbehandlung für !profile"""
+    if isinstance(error, commands.NotOwner):
+        await ctx.send("🔒 Nur der Bot-Owner kann das Profiling steuern.")
+    elif isinstance(error, commands.BadArgument):
+        await ctx.send("❓ Verwendung: `!profile 20` (Anzahl Anfragen) oder `!profile 0` zum Beenden.")
+    else:
+        logger.error(f"Profile-Command Fehler: {error}")
+        await ctx.send("❌ Fehler beim Steuern des Profilings.")
+
 @bot.command(name='info')
 async def info_command(ctx):
     """Zeigt erweiterte Bot-Informationen"""
@@ -356,6 +728,49 @@ async def info_command(ctx):
                 kb_value = "Keine Wissensdatenbank geladen.\n(Verzeichnis über GUI konfigurierbar)"
             embed.add_field(name="📚 Wissensdatenbank", value=kb_value, inline=True)
             
+            if answer_cache:
+                cache_stats = answer_cache.get_stats()
+                embed.add_field(
+                    name="⚡ Antwort-Cache",
+                    value=f"{cache_stats['entries']} Einträge\n{cache_stats['hits']} Treffer / {cache_stats['misses']} Fehlschläge\nTrefferquote: {cache_stats['hit_rate']:.0%}\nZusammengeführt: {question_flights.coalesced} Anfragen",
+                    inline=True
+                )
+            
+            if vision_cache:
+                vision_stats = vision_cache.get_stats()
+                embed.add_field(
+                    name="🖼️ Vision-Cache",
+                    value=f"{vision_stats['entries']} Einträge\n{vision_stats['hits']} Treffer / {vision_stats['misses']} Fehlschläge",
+                    inline=True
+                )
+            
+            if llm_scheduler:
+                scheduler_stats = llm_scheduler.get_stats()
+                embed.add_field(
+                    name="🚦 Warteschlange",
+                    value=f"{scheduler_stats['queue_depth']} wartend / {scheduler_stats['active']} aktiv\nWartezeit Ø {scheduler_stats['avg_wait']:.1f}s (p95 {scheduler_stats['p95_wait']:.1f}s)\n{scheduler_stats['shed']} abgewiesen, {scheduler_stats['rate_limited']} gedrosselt",
+                    inline=True
+                )
+            
+            if message_router:
+                route_stats = message_router.get_stats()
+                embed.add_field(
+                    name="🧭 Routen",
+                    value="\n".join(
+                        f"{name}: {stats['count']}× Ø {stats['avg_seconds'] * 1000:.0f} ms"
+                        for name, stats in route_stats.items() if stats['count']
+                    ) or "Noch keine Nachrichten",
+                    inline=True
+                )
+            
+            if context_store:
+                context_stats = context_store.get_stats()
+                embed.add_field(
+                    name="💬 Kontext",
+                    value=f"{context_stats['channels']} Channels / {context_stats['users']} User\n{context_stats['messages']} Nachrichten",
+                    inline=True
+                )
+            
             embed.add_field(
                 name="🧠 KI-Fähigkeiten",
                 value="• Gemini 1.5 Pro (Text)\n• Gemini Vision (Bilder)\n• Kontext-Management",
@@ -370,7 +785,7 @@ async def info_command(ctx):
             
             embed.add_field(
                 name="🔧 Befehle",
-                value="`!frage [text]` - Stelle eine Frage\n`!info` - Bot Informationen\n`!themen` - Bot Fähigkeiten\n`@Bot + Nachricht` - Direkte Ansprache",
+                value="`!frage [text]` - Stelle eine Frage\n`!info` - Bot Informationen\n`!themen` - Bot Fähigkeiten\n`!reload` - Wissen neu laden (Admin)\n`@Bot + Nachricht` - Direkte Ansprache",
                 inline=False
             )
             
@@ -420,35 +835,41 @@ async def on_message(message):
     if message.author.bot:
         return
     
-    # Verarbeite Commands zuerst
-    await bot.process_commands(message)
-    
-    # Speichere alle Nachrichten für Kontext (außer Commands)
-    if not message.content.startswith('!'):
-        store_message_context(message.channel.id, message.author.id, message.content)
-    
-    # Prüfe auf Bot-Erwähnung oder Fragen
+    # Route bestimmen, bevor irgendetwas Teures passiert
     bot_mentioned = bot.user.mentioned_in(message)
-    is_question = any(word in message.content.lower() for word in 
-                     ['?', 'wie', 'was', 'wann', 'wo', 'warum', 'welche', 'kann', 'soll', 'hilfe'])
+    route = message_router.route(message.content, bot_mentioned, bool(message.attachments))
     
-    # Verarbeite Bilder wenn Bot erwähnt wurde
-    if bot_mentioned and message.attachments:
-        await handle_image_analysis(message)
-        return
-    
-    # Verarbeite Text-Fragen (einschließlich Links)
-    if (bot_mentioned or is_question) and len(message.content.strip()) > 5 and not message.content.startswith('!'):
-        question = message.content.replace(f'<@{bot.user.id}>', '').strip()
+    with message_router.timed(route), metrics.timer("bot_route_seconds", route=route.value):
+        # Commands brauchen weder Kontext noch Klassifikation
+        if route is Route.COMMAND:
+            await bot.process_commands(message)
+            return
         
-        # Prüfe auf Links in der Nachricht
-        import re
-        urls = re.findall(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+', question)
-        if urls:
-            # Füge Kontext über Links hinzu
-            question = f"{question}\n\nHinweis: Die Nachricht enthält Links, die ich nicht direkt öffnen kann."
+        # Speichere alle Nachrichten für Kontext (außer Commands)
+        store_message_context(message.channel.id, message.author.id, message.content)
+        
+        # Verarbeite Bilder wenn Bot erwähnt wurde
+        if route is Route.IMAGE:
+            await handle_image_analysis(message)
+            return
         
-        await handle_auto_question_with_context(message, question)
+        # Begrüßungen ohne Wissenssuche und ohne KI beantworten
+        if route is Route.GREETING:
+            await send_long_message_reply(message, greeting_response(message.content))
+            return
+        
+        # Verarbeite Text-Fragen (einschließlich Links)
+        if route is Route.KNOWLEDGE:
+            question = message.content.replace(f'<@{bot.user.id}>', '').strip()
+            
+            # Prüfe auf Links in der Nachricht
+            if URL_PATTERN.search(question):
+                # Füge Kontext über Links hinzu
+                question = f"{question}\n\nHinweis: Die Nachricht enthält Links, die ich nicht direkt öffnen kann."
+            
+            # Erwähnungen sind explizite Anfragen und werden bevorzugt bedient
+            priority = Priority.EXPLICIT if bot_mentioned else Priority.AUTO
+            await handle_auto_question_with_context(message, question, priority)
 
 async def handle_image_analysis(message):
     """Verarbeitet Bildanalyse mit Kontext"""
@@ -460,15 +881,29 @@ async def handle_image_analysis(message):
             await message.reply("Ich sehe keine Bilder zum Analysieren. Lade ein Bild hoch und erwähne mich!")
             return
         
+        # Zu große Anhänge früh ablehnen (Größe liefert discord.py bereits mit)
+        try:
+            attachment_downloader.check_size(images[0].size)
+        except AttachmentTooLarge as e:
+            await message.reply(f"❌ Das Bild ist zu groß. {e}")
+            return
+        
         async with message.channel.typing():
+            stages = metrics.stage_timer("image")
+            
             # Analysiere erstes Bild
-            image_url = images[0].url
-            image_data = await download_image(image_url)
+            try:
+                image_data = await download_image(images[0])
+            except AttachmentTooLarge as e:
+                await message.reply(f"❌ Das Bild ist zu groß. {e}")
+                return
             
             if not image_data:
                 await message.reply("❌ Konnte das Bild nicht laden. Bitte versuche es erneut.")
                 return
             
+            stages.mark("download")
+            
             # Kontext für Bildanalyse
             context = get_relevant_context(message.channel.id, message.author.id, message.content)
             question_context = message.content.replace(f'<@{bot.user.id}>', '').strip()
@@ -476,19 +911,52 @@ async def handle_image_analysis(message):
             if not question_context:
                 question_context = "Analysiere dieses Bild im E-Commerce/Dropshipping Kontext"
             
-            # Bildanalyse durchführen
-            analysis = await analyze_image_with_context(image_data, question_context, context)
+            # Gleiches Bild mit gleicher Frage schon analysiert?
+            digest = await asyncio.get_running_loop().run_in_executor(None, image_digest, image_data)
+            cache_key = vision_cache_key(digest, question_context, knowledge_base.version if knowledge_base else "")
+            cached_analysis = vision_cache.get(cache_key) if vision_cache else None
+            stages.mark("cache")
+            if cached_analysis:
+                await send_long_message_reply(message, f"🖼️ **Bildanalyse:**\n\n{cached_analysis}")
+                stages.mark("send")
+                return
+            
+            # Bild verkleinern und kompakt neu kodieren (im Thread-Pool)
+            prepared = await image_pipeline.prepare(image_data)
+            logger.info(
+                f"🖼️ Bild vorbereitet: {prepared.original_bytes / 1024:.0f} KB → {len(prepared.data) / 1024:.0f} KB "
+                f"({prepared.bytes_saved / 1024:.0f} KB gespart, {prepared.mime_type})"
+            )
+            stages.mark("preprocess")
+            
+            # Bildanalyse durchführen (Bildanalysen erfolgen nur auf Erwähnung, also explizit)
+            try:
+                llm_scheduler.check_rate(message.author.id)
+                async with llm_scheduler.slot(message.guild.id if message.guild else None, Priority.EXPLICIT):
+                    stages.mark("queue")
+                    analysis = await analyze_image_with_context(
+                        prepared.data, question_context, context, prepared.mime_type, cache_key=cache_key
+                    )
+                    stages.mark("generate")
+            except RateLimited as e:
+                await message.reply(RATE_LIMIT_MESSAGE.format(seconds=max(1, round(e.retry_after))))
+                return
+            except QueueFull:
+                await message.reply(OVERLOAD_MESSAGE)
+                return
             
             # Antwort senden
             await send_long_message_reply(message, f"🖼️ **Bildanalyse:**\n\n{analysis}")
+            stages.mark("send")
             
     except Exception as e:
         logger.error(f"Bildanalyse Fehler: {e}")
         await message.reply("❌ Fehler bei der Bildanalyse. Bitte versuche es erneut.")
 
-async def handle_auto_question_with_context(message, question):
-    """Behandelt automatisch erkannte Fragen mit Kontext"""
-    global knowledge_base, text_chunker, gemini_model
+@request_profiler.profiled("auto")
+async def handle_auto_question_with_context(message, question, priority=Priority.AUTO):
+    """Behandelt automatisch erkannte Fragen und Erwähnungen mit Kontext"""
+    global knowledge_base, text_chunker, gemini_model, llm_dispatcher, answer_cache
     
     if not knowledge_base or not gemini_model:
         return
@@ -497,47 +965,36 @@ async def handle_auto_question_with_context(message, question):
     
     try:
         async with message.channel.typing():
+            stages = metrics.stage_timer("auto")
+            
             # Kontext abrufen
             context = get_relevant_context(message.channel.id, message.author.id, question)
+            stages.mark("context")
             
-            # Relevante Wissensinhalte finden
-            knowledge_content = knowledge_base.get_combined_content()
-            relevant_chunks = text_chunker.get_relevant_chunks(
-                knowledge_content,
+            # Relevante Wissensinhalte aus dem vorberechneten Index finden
+            relevant_records = knowledge_base.search(
                 question + " " + context,
                 max_tokens=7000
             )
+            relevant_chunks = [record.text for record in relevant_records]
+            stages.mark("retrieval")
             
-            # Prüfe ob es eine einfache Begrüßung ist
-            greeting_words = ['hallo', 'hi', 'hey', 'guten tag', 'moin', 'servus', 'wie geht', 'wie läuft']
-            is_greeting = any(word in question.lower() for word in greeting_words) and len(question.split()) <= 6
-            
-            if is_greeting:
-                # Spracherkennung für Begrüßung
-                is_english = any(word in question.lower() for word in ['hello', 'hi', 'hey', 'how are you'])
-                
-                if is_english:
-                    greeting_responses = [
-                        "Hello! I'm doing well, thank you. How can I help you?",
-                        "Hi! Everything is fine. What can I do for you today?",
-                        "Hello! I'm operational and ready to assist."
-                    ]
-                else:
-                    greeting_responses = [
-                        "Hallo! Mir geht es gut, danke. Wie kann ich Ihnen helfen?",
-                        "Hi! Alles in Ordnung. Was kann ich heute für Sie tun?",
-                        "Hallo! Ich bin einsatzbereit und stehe zur Verfügung."
-                    ]
-                
-                import random
-                response_text = random.choice(greeting_responses)
-                await send_long_message_reply(message, response_text)
-                return
-            
+            # Begrüßungen wurden bereits vom Router beantwortet
             if not relevant_chunks:
                 await message.reply("Keine relevanten Informationen gefunden. Versuche es mit einer spezifischeren Frage.")
                 return
             
+            # Antwort-Cache prüfen
+            cache_key = answer_cache_key(
+                question, [record.chunk_id for record in relevant_records], knowledge_base.version
+            )
+            cached_answer = answer_cache.get(cache_key)
+            stages.mark("cache")
+            if cached_answer:
+                await send_long_message_reply(message, cached_answer)
+                stages.mark("send")
+                return
+            
             # Prompt mit professioneller, authentischer Persönlichkeit
             combined_knowledge = '\n\n'.join(relevant_chunks)
             # Spracherkennung für die Antwortsprache (aus der Frage abgeleitet)
@@ -561,15 +1018,64 @@ INSTRUCTIONS:
 - Respond in the language of the current question (Detected: {'English' if is_english else 'German'}).
 - If the question involves links, state that you cannot open them but can discuss the text content if provided.'''
 
-            # Gemini API Anfrage
-            response = gemini_model.generate_content(prompt)
+            stages.mark("prompt")
+            
+            # Gemini API Anfrage (außerhalb des Event-Loops)
+            async def generate_answer():
+                # Kontingent nur für einen eigenen Modellaufruf prüfen (Cache-Treffer und
+                # zusammengeführte Fragen kosten nichts)
+                llm_scheduler.check_rate(message.author.id)
+                async with llm_scheduler.slot(message.guild.id if message.guild else None, priority):
+                    stages.mark("queue")
+                    if CONFIG_DETAILS.get('STREAM_RESPONSES', STREAM_RESPONSES):
+                        # Beim Streaming sind Erzeugen und Senden verzahnt
+                        answer = await stream_answer(prompt, message.reply, message.channel.send)
+                        stages.mark("generate")
+                        return answer
+                    response = await llm_dispatcher.generate(gemini_model, prompt)
+                    stages.mark("generate")
+                    if response and response.text:
+                        await send_long_message_reply(message, response.text)
+                        stages.mark("send")
+                        return response.text
+                    return ""
             
-            if response and response.text:
-                await send_long_message_reply(message, response.text)
+            # Läuft dieselbe Frage (gleiche Wissens-Chunks) bereits, deren Antwort übernehmen
+            answer, shared = await question_flights.do(cache_key, generate_answer)
+            if shared:
+                stages.mark("coalesced")
+            
+            if answer and shared:
+                await send_long_message_reply(message, answer)
+                stages.mark("send")
+            elif answer:
+                answer_cache.put(cache_key, answer)
                 
+    except RateLimited as e:
+        # Automatisch erkannte Fragen werden still übersprungen, Erwähnungen bekommen eine Antwort
+        logger.info(f"Auto-Frage wegen Rate-Limit übersprungen ({message.author})")
+        if priority == Priority.EXPLICIT:
+            await message.reply(RATE_LIMIT_MESSAGE.format(seconds=max(1, round(e.retry_after))))
+    except QueueFull:
+        logger.warning(f"Auto-Frage wegen voller Warteschlange verworfen: {question}")
+        if priority == Priority.EXPLICIT:
+            await message.reply(OVERLOAD_MESSAGE)
+    except asyncio.TimeoutError:
+        logger.warning(f"Auto-Frage Timeout: {question}")
     except Exception as e:
         logger.error(f"Auto-Frage Kontext Fehler: {e}")
 
+async def stream_answer(prompt, send_first, send_followup):
+    """Streamt die Gemini-Antwort in Discord und gibt den vollständigen Text zurück"""
+    reply = StreamingReply(
+        send_first,
+        send_followup,
+        edit_interval=CONFIG_DETAILS.get('STREAM_EDIT_INTERVAL', STREAM_EDIT_INTERVAL)
+    )
+    async for piece in llm_dispatcher.stream(gemini_model, prompt):
+        await reply.feed(piece)
+    return await reply.finish()
+
 async def send_long_message(ctx, text):
     """Sendet lange Nachrichten in Chunks"""
     if len(text) <= 1900:
@@ -651,4 +1157,10 @@ if __name__ == "__main__":
     # or lack GEMINI_API_KEY, which on_ready will handle.
 
     logger.info("🚀 Starting Bot...")
-    bot.run(discord_token)
\ No newline at end of file
+    bot.run(discord_token)
+
+    # Nach dem Beenden den Antwort-Cache sichern (falls Persistenz konfiguriert ist)
+    if answer_cache:
+        answer_cache.save()
+    if knowledge_base:
+        knowledge_base.close()
\ No newline at end of file
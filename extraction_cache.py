@@ -0,0 +1,196 @@
+"""
+Festplatten-Cache für extrahierte Dateiinhalte
+Unveränderte Dateien werden beim Start aus dem Cache geladen statt neu geparst
+
+Aufbau des Cache-Ordners:
+- manifest.json: {pfad: {"size": ..., "mtime_ns": ..., "sha256": ...}}
+- <sha256>.pages.gz: eine JSON-Zeile [seitennummer, text] pro Seite, gzip-komprimiert
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Erhöhen, wenn sich die Extraktionslogik ändert, damit alte Einträge nicht mehr passen
+EXTRACTOR_VERSION = 1
+BLOB_SUFFIX = ".pages.gz"
+
+
+class ExtractionCache:
+    """
+    Inhaltsadressierter Cache: Schlüssel ist der SHA-256 des Dateiinhalts
+    Größe und Änderungszeit im Manifest ersparen das Hashen unveränderter Dateien
+    """
+
+    def __init__(self, cache_dir: str = "data/extraction_cache"):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.manifest_path = self.cache_dir / "manifest.json"
+        self._manifest: Dict[str, Dict[str, object]] = self._load_manifest()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.hashed_files = 0
+        self.pruned_blobs = 0
+
+    def _load_manifest(self) -> Dict[str, Dict[str, object]]:
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") == EXTRACTOR_VERSION:
+                return data.get("files", {})
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ Manifest {self.manifest_path} unlesbar, Cache wird neu aufgebaut: {e}")
+        return {}
+
+    def save_manifest(self):
+        """
+        Schreibt das Manifest atomar auf die Festplatte
+        Vorher werden verwaiste Einträge und Cache-Dateien entfernt (siehe prune)
+        """
+        self.prune()
+        with self._lock:
+            data = {"version": EXTRACTOR_VERSION, "files": dict(self._manifest)}
+        tmp_path = self.manifest_path.with_suffix('.json.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.manifest_path)
+
+    def prune(self) -> int:
+        """
+        Entfernt Manifest-Einträge gelöschter Dateien und Cache-Dateien, auf die
+        kein Eintrag mehr verweist (z.B. der alte Inhalt einer geänderten Datei)
+        Gibt die Anzahl gelöschter Cache-Dateien zurück
+        """
+        with self._lock:
+            for key in [key for key in self._manifest if not os.path.exists(key)]:
+                del self._manifest[key]
+            referenced = {entry["sha256"] for entry in self._manifest.values()}
+
+        removed = 0
+        for blob_path in self.cache_dir.glob(f"*{BLOB_SUFFIX}"):
+            if blob_path.name[:-len(BLOB_SUFFIX)] in referenced:
+                continue
+            try:
+                blob_path.unlink()
+                removed += 1
+            except OSError as e:
+                logger.warning(f"⚠️ Cache-Datei {blob_path.name} konnte nicht gelöscht werden: {e}")
+        if removed:
+            logger.info(f"🧹 Extraktions-Cache: {removed} verwaiste Einträge gelöscht")
+        self.pruned_blobs += removed
+        return removed
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.cache_dir / f"{digest}{BLOB_SUFFIX}"
+
+    @staticmethod
+    def _hash_file(file_path: Path) -> str:
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def _resolve_digest(self, file_path: Path) -> str:
+        """
+        Liefert den Inhalts-Hash; gehasht wird nur, wenn Größe oder Änderungszeit abweichen
+        """
+        key = str(file_path.resolve())
+        stat = file_path.stat()
+        with self._lock:
+            entry = self._manifest.get(key)
+        if entry and entry.get("size") == stat.st_size and entry.get("mtime_ns") == stat.st_mtime_ns:
+            return entry["sha256"]
+
+        digest = self._hash_file(file_path)
+        with self._lock:
+            self.hashed_files += 1
+            self._manifest[key] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": digest}
+        return digest
+
+    def lookup(self, file_path: Path) -> Optional[Path]:
+        """
+        Gibt den Pfad des Cache-Eintrags zurück oder None, wenn die Datei neu extrahiert werden muss
+        """
+        blob_path = self._blob_path(self._resolve_digest(file_path))
+        with self._lock:
+            if blob_path.exists():
+                self.hits += 1
+                return blob_path
+            self.misses += 1
+        return None
+
+    def open_writer(self, file_path: Path) -> "PageWriter":
+        """
+        Öffnet einen Schreiber, der Seiten stückweise unter dem Inhalts-Hash ablegt
+        """
+        return PageWriter(self._blob_path(self._resolve_digest(file_path)))
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Gibt Cache-Treffer, Fehlschläge, Anzahl gehashter Dateien und gelöschte Einträge zurück
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hashed_files": self.hashed_files,
+            "pruned_blobs": self.pruned_blobs,
+        }
+
+
+def read_page_batches(blob_path: Path, max_chars: int = 1024 * 1024) -> Iterator[List[Tuple[int, str]]]:
+    """
+    Liest einen Cache-Eintrag in Stapeln von Seiten, ohne die Datei komplett zu laden
+    Ein Stapel endet, sobald er max_chars Zeichen erreicht (mindestens eine Seite pro Stapel)
+    """
+    with gzip.open(blob_path, 'rt', encoding='utf-8') as f:
+        batch: List[Tuple[int, str]] = []
+        batch_chars = 0
+        for line in f:
+            page_num, page_text = json.loads(line)
+            batch.append((page_num, page_text))
+            batch_chars += len(page_text)
+            if batch_chars >= max_chars:
+                yield batch
+                batch = []
+                batch_chars = 0
+        if batch:
+            yield batch
+
+
+class PageWriter:
+    """
+    Schreibt Seiten stückweise in eine temporäre Datei; erst commit() macht den Eintrag sichtbar
+    """
+
+    def __init__(self, blob_path: Path):
+        self.blob_path = blob_path
+        self._tmp_path = blob_path.with_suffix(f'.{os.getpid()}.{threading.get_ident()}.tmp')
+        self._file = gzip.open(self._tmp_path, 'wt', encoding='utf-8', compresslevel=6)
+
+    def write(self, pages: Iterable[Tuple[int, str]]):
+        for page_num, page_text in pages:
+            self._file.write(json.dumps([page_num, page_text], ensure_ascii=False))
+            self._file.write('\n')
+
+    def commit(self):
+        self._file.close()
+        os.replace(self._tmp_path, self.blob_path)
+
+    def discard(self):
+        self._file.close()
+        try:
+            os.remove(self._tmp_path)
+        except OSError:
+            pass
@@ -0,0 +1,117 @@
+"""
+Gemeinsamer HTTP-Client für Discord-Anhänge
+Eine langlebige aiohttp-Session mit Verbindungspool statt einer Session pro Download;
+Downloads werden gestreamt und bei Überschreiten der Größenbegrenzung abgebrochen
+"""
+
+import logging
+from typing import Dict, Optional
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+
+class DownloadError(Exception):
+    """
+    Anhang konnte nicht geladen werden
+    """
+
+
+class AttachmentTooLarge(DownloadError):
+    """
+    Anhang überschreitet die konfigurierte Größenbegrenzung
+    """
+
+
+class AttachmentDownloader:
+    """
+    Lädt Anhänge über eine gemeinsame Session mit Größen- und Zeitlimit
+    start() und close() werden vom Bot-Lebenszyklus aufgerufen
+    """
+
+    def __init__(self, max_bytes: int = 10 * 1024 * 1024, timeout: float = 30.0,
+                 connection_limit: int = 20, read_size: int = 64 * 1024):
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.connection_limit = connection_limit
+        self.read_size = read_size
+        self._session: Optional[aiohttp.ClientSession] = None
+
+        self.downloads = 0
+        self.rejected = 0
+        self.failed = 0
+        self.bytes_downloaded = 0
+
+    async def start(self):
+        """
+        Erstellt die gemeinsame Session (idempotent)
+        """
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                connector=aiohttp.TCPConnector(limit=self.connection_limit, ttl_dns_cache=300)
+            )
+
+    async def close(self):
+        """
+        Schließt die Session und alle offenen Verbindungen
+        """
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def check_size(self, declared_size: Optional[int]):
+        """
+        Lehnt Anhänge ab, deren bekannte Größe schon über dem Limit liegt
+        """
+        if declared_size is not None and declared_size > self.max_bytes:
+            self.rejected += 1
+            raise AttachmentTooLarge(
+                f"Anhang ist {declared_size / 1024 / 1024:.1f} MB groß "
+                f"(maximal {self.max_bytes / 1024 / 1024:.1f} MB)"
+            )
+
+    async def download(self, url: str, declared_size: Optional[int] = None) -> bytes:
+        """
+        Lädt eine URL gestreamt herunter und bricht ab, sobald das Limit überschritten wird
+        """
+        self.check_size(declared_size)
+        if self._session is None or self._session.closed:
+            await self.start()
+
+        try:
+            async with self._session.get(url) as response:
+                if response.status != 200:
+                    self.failed += 1
+                    raise DownloadError(f"HTTP {response.status}")
+                self.check_size(response.content_length)
+
+                data = bytearray()
+                async for block in response.content.iter_chunked(self.read_size):
+                    data.extend(block)
+                    if len(data) > self.max_bytes:
+                        self.rejected += 1
+                        raise AttachmentTooLarge(
+                            f"Anhang überschreitet {self.max_bytes / 1024 / 1024:.1f} MB"
+                        )
+        except DownloadError:
+            raise
+        except Exception as e:
+            self.failed += 1
+            raise DownloadError(str(e)) from e
+
+        self.downloads += 1
+        self.bytes_downloaded += len(data)
+        return bytes(data)
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Gibt Download-Zähler zurück
+        """
+        return {
+            "downloads": self.downloads,
+            "rejected": self.rejected,
+            "failed": self.failed,
+            "bytes_downloaded": self.bytes_downloaded,
+        }
@@ -0,0 +1,151 @@
+"""
+Bildvorverarbeitung vor der Gemini-Vision-Anfrage
+Erkennt das tatsächliche Format, verkleinert große Bilder auf eine maximale
+Kantenlänge und kodiert sie kompakt neu - im Thread-Pool außerhalb des Event-Loops
+"""
+
+import asyncio
+import io
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow ist optional; ohne Pillow wird nur das Format erkannt
+    Image = None
+    ImageOps = None
+
+logger = logging.getLogger(__name__)
+
+# Formate, die Gemini Vision direkt verarbeitet
+SUPPORTED_MIME_TYPES = {"image/jpeg", "image/png", "image/webp", "image/heic", "image/heif"}
+
+
+def detect_image_format(data: bytes) -> Optional[str]:
+    """
+    Erkennt den MIME-Typ anhand der Signatur (Magic Bytes)
+    """
+    if data.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if data.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    if data[:6] in (b"GIF87a", b"GIF89a"):
+        return "image/gif"
+    if data.startswith(b"BM"):
+        return "image/bmp"
+    if data[4:8] == b"ftyp":
+        brand = data[8:12]
+        if brand in (b"heic", b"heix", b"hevc", b"hevx"):
+            return "image/heic"
+        if brand in (b"mif1", b"msf1"):
+            return "image/heif"
+    return None
+
+
+@dataclass(frozen=True)
+class PreparedImage:
+    """
+    Ergebnis der Vorverarbeitung
+    """
+    data: bytes
+    mime_type: str
+    original_bytes: int
+    width: int = 0
+    height: int = 0
+
+    @property
+    def bytes_saved(self) -> int:
+        return max(0, self.original_bytes - len(self.data))
+
+
+class ImagePipeline:
+    """
+    Verkleinert und kodiert Bilder im Thread-Pool neu und zählt die eingesparten Bytes
+    """
+
+    def __init__(self, max_edge: int = 1536, quality: int = 85, workers: int = 2):
+        self.max_edge = max_edge
+        self.quality = quality
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="image")
+
+        if Image is None:
+            logger.warning("⚠️ Pillow nicht installiert - Bilder werden nicht verkleinert")
+
+        self.images = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.total_seconds = 0.0
+
+    async def prepare(self, data: bytes) -> PreparedImage:
+        """
+        Bereitet ein Bild für die Vision-Anfrage vor, ohne den Event-Loop zu blockieren
+        """
+        started = time.perf_counter()
+        prepared = await asyncio.get_running_loop().run_in_executor(self._executor, self.prepare_sync, data)
+
+        self.images += 1
+        self.bytes_in += prepared.original_bytes
+        self.bytes_out += len(prepared.data)
+        self.total_seconds += time.perf_counter() - started
+        return prepared
+
+    def prepare_sync(self, data: bytes) -> PreparedImage:
+        """
+        Synchrone Vorverarbeitung: Format erkennen, verkleinern, neu kodieren
+        Ist das Ergebnis nicht kleiner und das Format unterstützt, bleibt das Original erhalten
+        """
+        mime_type = detect_image_format(data) or "image/jpeg"
+        original = PreparedImage(data=data, mime_type=mime_type, original_bytes=len(data))
+        if Image is None:
+            return original
+
+        try:
+            with Image.open(io.BytesIO(data)) as image:
+                image = ImageOps.exif_transpose(image)
+                resized = max(image.size) > self.max_edge
+                if resized:
+                    image.thumbnail((self.max_edge, self.max_edge), Image.LANCZOS)
+
+                if not resized and mime_type in SUPPORTED_MIME_TYPES:
+                    return PreparedImage(data=data, mime_type=mime_type, original_bytes=len(data),
+                                         width=image.width, height=image.height)
+
+                # Transparenz erhalten (WebP), sonst JPEG
+                has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+                output = io.BytesIO()
+                if has_alpha:
+                    image.convert("RGBA").save(output, format="WEBP", quality=self.quality, method=4)
+                    new_mime_type = "image/webp"
+                else:
+                    image.convert("RGB").save(output, format="JPEG", quality=self.quality, optimize=True)
+                    new_mime_type = "image/jpeg"
+                encoded = output.getvalue()
+                width, height = image.width, image.height
+        except Exception as e:
+            logger.warning(f"⚠️ Bild konnte nicht vorverarbeitet werden, sende Original: {e}")
+            return original
+
+        if len(encoded) >= len(data) and mime_type in SUPPORTED_MIME_TYPES:
+            return original
+        return PreparedImage(data=encoded, mime_type=new_mime_type, original_bytes=len(data),
+                             width=width, height=height)
+
+    def get_stats(self) -> Dict[str, float]:
+        """
+        Gibt verarbeitete Bilder, Bytes vorher/nachher und die mittlere Dauer zurück
+        """
+        return {
+            "images": self.images,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "bytes_saved": max(0, self.bytes_in - self.bytes_out),
+            "avg_seconds": (self.total_seconds / self.images) if self.images else 0.0,
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
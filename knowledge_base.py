@@ -4,22 +4,177 @@ Lädt und verarbeitet PDF- und Text-Dateien aus dem data/ Ordner
 """
 
 import os
+import sys
+import hashlib
 import logging
 import asyncio
+import codecs
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 import fitz  # PyMuPDF für PDF-Verarbeitung
-from typing import List, Dict
+from typing import AsyncIterator, Callable, Iterator, List, Dict, Optional, Tuple
+from embeddings import EmbeddingStore
+from knowledge_index import ChunkRecord, DocumentBuilder, IndexedDocument, KnowledgeIndex
+from extraction_cache import ExtractionCache, PageWriter, read_page_batches
+
+try:
+    import resource  # nicht unter Windows verfügbar
+except ImportError:
+    resource = None
+from text_chunker import TextChunker
 
 logger = logging.getLogger(__name__)
 
+def _count_pdf_pages(path: str) -> int:
+    """
+    Gibt die Seitenzahl einer PDF-Datei zurück
+    """
+    try:
+        with fitz.open(path) as doc:
+            return len(doc)
+    except Exception as e:
+        raise Exception(f"PyMuPDF Fehler: {str(e)}")
+
+def _extract_pdf_page_range(path: str, start: int, end: Optional[int]) -> List[Tuple[int, str]]:
+    """
+    Extrahiert die Seiten [start, end) einer PDF-Datei
+    Modulfunktion, damit sie in einem ProcessPoolExecutor laufen kann
+    """
+    try:
+        text_content = []
+        with fitz.open(path) as doc:
+            end = len(doc) if end is None else min(end, len(doc))
+            for page_num in range(start, end):
+                page = doc.load_page(page_num)
+                page_text = page.get_text()
+                
+                if page_text.strip():  # Nur nicht-leere Seiten hinzufügen
+                    text_content.append((page_num + 1, page_text))
+        
+        return text_content
+        
+    except Exception as e:
+        raise Exception(f"PyMuPDF Fehler: {str(e)}")
+
+# Encodings für Text-Dateien in Prüfreihenfolge
+TEXT_ENCODINGS = ['utf-8', 'utf-8-sig', 'latin-1', 'cp1252']
+# Blockgröße beim Lesen von Text-Dateien (Zeichen)
+TEXT_BLOCK_SIZE = 1024 * 1024
+
+def _detect_text_encoding(file_path: Path) -> str:
+    """
+    Findet das erste Encoding, mit dem sich die Datei vollständig dekodieren lässt
+    Die Datei wird dabei blockweise gelesen und nicht im Speicher gehalten
+    """
+    for encoding in TEXT_ENCODINGS:
+        decoder = codecs.getincrementaldecoder(encoding)()
+        try:
+            with open(file_path, 'rb') as f:
+                for block in iter(lambda: f.read(TEXT_BLOCK_SIZE), b''):
+                    decoder.decode(block)
+            decoder.decode(b'', final=True)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    
+    # Wenn alle Encodings fehlschlagen
+    raise Exception("Datei konnte mit keinem unterstützten Encoding gelesen werden")
+
+def _read_text_blocks(file_path: Path, encoding: str) -> Iterator[List[Tuple[int, str]]]:
+    """
+    Liest eine Text-Datei in Blöcken von etwa TEXT_BLOCK_SIZE Zeichen
+    Getrennt wird nur, wenn mehr als ein Block vorliegt, und dann an einer Absatzgrenze,
+    damit kein Absatz zerschnitten wird; Dateien bis TEXT_BLOCK_SIZE ergeben genau einen Block.
+    Alle Blöcke gehören zu Seite 1 und ergeben aneinandergehängt den Dateiinhalt
+    """
+    with open(file_path, 'r', encoding=encoding) as f:
+        buffer = ""
+        while True:
+            data = f.read(TEXT_BLOCK_SIZE)
+            if not data:
+                break
+            buffer += data
+            while len(buffer) > TEXT_BLOCK_SIZE:
+                # Letzter Absatz im ersten Block, sonst der erste danach
+                cut = buffer.rfind("\n\n", 0, TEXT_BLOCK_SIZE)
+                if cut <= 0:
+                    cut = buffer.find("\n\n", TEXT_BLOCK_SIZE)
+                if cut <= 0:
+                    # Kein Absatz in Sicht: erst bei sehr großen Puffern hart trennen
+                    if len(buffer) < 4 * TEXT_BLOCK_SIZE:
+                        break
+                    cut = len(buffer)
+                else:
+                    cut += 2
+                yield [(1, buffer[:cut])]
+                buffer = buffer[cut:]
+        if buffer:
+            yield [(1, buffer)]
+
+async def _iterate_in_executor(iterator: Iterator):
+    """
+    Liest einen blockierenden Iterator im Thread-Pool, ohne den Event-Loop anzuhalten
+    """
+    loop = asyncio.get_event_loop()
+    sentinel = object()
+    while True:
+        item = await loop.run_in_executor(None, next, iterator, sentinel)
+        if item is sentinel:
+            break
+        yield item
+
+def _consume_page_batch(builder: DocumentBuilder, writer: Optional[PageWriter],
+                        batch: List[Tuple[int, str]]):
+    """
+    Schreibt einen Seitenstapel in den Extraktions-Cache und indexiert ihn
+    """
+    if writer:
+        writer.write(batch)
+    builder.add_pages(batch)
+
+def _peak_rss_mb() -> Optional[float]:
+    """
+    Maximaler Speicherverbrauch des Prozesses in MB (None, falls nicht ermittelbar)
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux meldet KB, macOS Bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
 class KnowledgeBase:
     """
     Verwaltet die Wissensdatenbank aus PDF- und Text-Dateien
     """
     
-    def __init__(self, data_folder: str = "user_knowledge"):
+    def __init__(self, data_folder: str = "user_knowledge", chunker: Optional[TextChunker] = None,
+                 cache_dir: Optional[str] = None, pdf_workers: Optional[int] = None,
+                 pages_per_task: int = 50, retrieval_engine: str = "bm25", retrieval_mode: str = "keyword",
+                 embedding_store: Optional[EmbeddingStore] = None):
         self.data_folder = Path(data_folder)
-        self.loaded_content: Dict[str, str] = {}
+        # Bewertung der Chunks: "bm25" oder "tfidf" (siehe retrieval.create_engine)
+        self.retrieval_engine = retrieval_engine
+        # Vektorsuche: "keyword", "semantic" oder "hybrid" (siehe embeddings.EmbeddingStore)
+        self.retrieval_mode = retrieval_mode if embedding_store is not None else "keyword"
+        self.embedding_store = embedding_store
+        # PDF-Extraktion: Anzahl Prozesse und Seiten pro Teilaufgabe
+        self.pdf_workers = max(1, pdf_workers or os.cpu_count() or 1)
+        self.pages_per_task = max(1, pages_per_task)
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        # Optionaler Festplatten-Cache für extrahierte Inhalte
+        self.extraction_cache = ExtractionCache(cache_dir) if cache_dir else None
+        # Aufbereitete Dokumente pro Datei, werden beim Neuladen wiederverwendet
+        self._documents: Dict[str, IndexedDocument] = {}
+        self.chunker = chunker or TextChunker()
+        self.index = KnowledgeIndex([], self.chunker)
+        # Fingerabdruck des geladenen Wissensstands (ändert sich bei jeder inhaltlichen Änderung)
+        self.version = ""
+        # Manifest aller gesehenen Dateien: {name: (größe, mtime_ns)}, inkl. leerer/fehlerhafter
+        self._file_signatures: Dict[str, Tuple[int, int]] = {}
+        self._reload_callbacks: List[Callable[[], None]] = []
+        self._reload_lock = asyncio.Lock()
         self.supported_extensions = {'.txt', '.pdf', '.md'}
         
         # Data-Ordner erstellen falls nicht vorhanden
@@ -31,163 +186,331 @@ class KnowledgeBase:
         """
         try:
             logger.info(f"📁 Durchsuche Ordner: {self.data_folder}")
+            await self.reload()
             
-            # Alle Dateien im data-Ordner finden
-            files = [f for f in self.data_folder.rglob("*") 
-                    if f.is_file() and f.suffix.lower() in self.supported_extensions]
+        except Exception as e:
+            logger.error(f"❌ Kritischer Fehler beim Laden der Wissensdatenbank: {e}")
+            raise
+    
+    def _scan_files(self) -> Dict[str, Tuple[Path, Tuple[int, int]]]:
+        """
+        Findet alle unterstützten Dateien mit Größe und Änderungszeit
+        """
+        files = {}
+        for file_path in self.data_folder.rglob("*"):
+            if file_path.is_file() and file_path.suffix.lower() in self.supported_extensions:
+                stat = file_path.stat()
+                files[self._document_name(file_path)] = (file_path, (stat.st_size, stat.st_mtime_ns))
+        return files
+    
+    def _document_name(self, file_path: Path) -> str:
+        """
+        Name eines Dokuments: Pfad relativ zum Wissensordner
+        """
+        return file_path.relative_to(self.data_folder).as_posix()
+    
+    async def reload(self) -> Dict[str, int]:
+        """
+        Lädt hinzugekommene und geänderte Dateien neu und entfernt gelöschte
+        Unveränderte Dokumente werden wiederverwendet; der neue Index ersetzt den
+        alten erst, wenn er vollständig aufgebaut ist, bis dahin wird weiter aus
+        dem alten Index geantwortet
+        """
+        async with self._reload_lock:
+            loop = asyncio.get_event_loop()
+            current_files = await loop.run_in_executor(None, self._scan_files)
+            
+            added = [name for name in current_files if name not in self._file_signatures]
+            changed = [name for name in current_files
+                       if name in self._file_signatures and current_files[name][1] != self._file_signatures[name]]
+            removed = [name for name in self._file_signatures if name not in current_files]
+            summary = {
+                "added": len(added),
+                "changed": len(changed),
+                "removed": len(removed),
+                "unchanged": len(current_files) - len(added) - len(changed),
+            }
             
-            if not files:
+            if not current_files and not self._file_signatures:
                 logger.warning(f"⚠️ Keine unterstützten Dateien in {self.data_folder} gefunden!")
                 logger.info(f"Unterstützte Formate: {', '.join(self.supported_extensions)}")
-                return
+                return summary
             
-            logger.info(f"📄 {len(files)} Dateien gefunden")
+            if not (added or changed or removed):
+                return summary
             
-            # Dateien parallel verarbeiten für bessere Performance
-            tasks = [self._process_file(file) for file in files]
+            to_process = added + changed
+            logger.info(f"📄 {len(current_files)} Dateien gefunden: {len(added)} neu, {len(changed)} geändert, {len(removed)} entfernt")
+            
+            cache_stats_before = self.extraction_cache.get_stats() if self.extraction_cache else None
+            
+            # Betroffene Dateien parallel verarbeiten für bessere Performance
+            tasks = [self._process_file(current_files[name][0]) for name in to_process]
             results = await asyncio.gather(*tasks, return_exceptions=True)
             
-            # Ergebnisse auswerten
+            # Neuen Stand aufbauen, ohne den aktuell genutzten zu verändern
+            stale = set(changed) | set(removed)
+            documents = {name: doc for name, doc in self._documents.items() if name not in stale}
+            
             successful_loads = 0
-            for i, result in enumerate(results):
+            for name, result in zip(to_process, results):
                 if isinstance(result, Exception):
-                    logger.error(f"❌ Fehler beim Verarbeiten von {files[i].name}: {result}")
-                else:
-                    successful_loads += 1
+                    logger.error(f"❌ Fehler beim Verarbeiten von {name}: {result}")
+                    continue
+                successful_loads += 1
+                if result is not None:
+                    documents[name] = result
             
-            logger.info(f"✅ {successful_loads}/{len(files)} Dateien erfolgreich geladen")
+            logger.info(f"✅ {successful_loads}/{len(to_process)} Dateien erfolgreich geladen")
             
-        except Exception as e:
-            logger.error(f"❌ Kritischer Fehler beim Laden der Wissensdatenbank: {e}")
-            raise
+            if self.extraction_cache:
+                cache_stats = self.extraction_cache.get_stats()
+                cache_hits = cache_stats["hits"] - cache_stats_before["hits"]
+                cache_misses = cache_stats["misses"] - cache_stats_before["misses"]
+                hashed_files = cache_stats["hashed_files"] - cache_stats_before["hashed_files"]
+                logger.info(f"💾 Extraktions-Cache: {cache_hits} Treffer, {cache_misses} neu extrahiert, {hashed_files} Dateien gehasht")
+                await loop.run_in_executor(None, self.extraction_cache.save_manifest)
+            
+            # Index aus den Dokumenten zusammensetzen (stabile Reihenfolge für stabile Chunk-IDs)
+            ordered_documents = [documents[name] for name in sorted(documents)]
+            index = await loop.run_in_executor(
+                None, KnowledgeIndex.from_documents, ordered_documents, self.chunker, self.retrieval_engine,
+                self.retrieval_mode, self.embedding_store
+            )
+            
+            # Atomarer Wechsel: zwischen diesen Zuweisungen gibt es keinen await
+            self._documents = documents
+            self._file_signatures = {name: signature for name, (_, signature) in current_files.items()}
+            self.index = index
+            self._update_version()
+            
+            logger.info(f"🔄 Wissensdatenbank aktualisiert: +{len(added)} ~{len(changed)} -{len(removed)} (Version {self.version})")
+            peak_rss = _peak_rss_mb()
+            if peak_rss is not None:
+                logger.info(f"📈 Maximaler Speicherverbrauch (RSS): {peak_rss:.0f} MB")
+            return summary
     
-    async def _process_file(self, file_path: Path) -> str:
+    async def watch(self, interval: float = 60.0):
+        """
+        Prüft den Wissensordner periodisch auf Änderungen und lädt inkrementell neu
+        """
+        logger.info(f"👀 Überwache {self.data_folder} alle {interval:g}s auf Änderungen")
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.reload()
+            except Exception as e:
+                logger.error(f"❌ Fehler beim automatischen Neuladen: {e}")
+    
+    async def _process_file(self, file_path: Path) -> Optional[IndexedDocument]:
         """
         Verarbeitet eine einzelne Datei basierend auf ihrem Typ
+        Seiten fließen stapelweise direkt in Chunker und Index, der komplette
+        Dokumenttext liegt nie gleichzeitig im Speicher
+        Gibt das aufbereitete Dokument zurück, oder None bei leeren Dateien
         """
+        writer = None
         try:
             file_extension = file_path.suffix.lower()
+            name = self._document_name(file_path)
             
-            logger.info(f"📖 Verarbeite: {file_path.name}")
+            logger.info(f"📖 Verarbeite: {name}")
             
-            if file_extension == '.pdf':
-                content = await self._extract_pdf_content(file_path)
-            elif file_extension in {'.txt', '.md'}:
-                content = await self._extract_text_content(file_path)
-            else:
+            if file_extension not in self.supported_extensions:
                 raise ValueError(f"Nicht unterstütztes Dateiformat: {file_extension}")
             
-            # Leere Dateien abfangen
-            if not content or not content.strip():
-                logger.warning(f"⚠️ Datei {file_path.name} ist leer oder konnte nicht gelesen werden")
-                return ""
+            loop = asyncio.get_event_loop()
+            cached_blob = None
+            if self.extraction_cache:
+                cached_blob = await loop.run_in_executor(None, self.extraction_cache.lookup, file_path)
+            
+            if cached_blob is not None:
+                logger.debug(f"💾 {name} aus dem Extraktions-Cache geladen")
+                batches = _iterate_in_executor(read_page_batches(cached_blob, TEXT_BLOCK_SIZE))
+            else:
+                if self.extraction_cache:
+                    writer = await loop.run_in_executor(None, self.extraction_cache.open_writer, file_path)
+                if file_extension == '.pdf':
+                    batches = self._iter_pdf_page_batches(file_path)
+                else:
+                    batches = self._iter_text_blocks(file_path)
+            
+            # Chunks und Teilindex stapelweise erzeugen (CPU-lastig, daher im Executor)
+            builder = DocumentBuilder(name, self.chunker)
+            async for batch in batches:
+                await loop.run_in_executor(None, _consume_page_batch, builder, writer, batch)
             
-            # Inhalt in Dictionary speichern
-            self.loaded_content[str(file_path.name)] = content
+            if writer:
+                await loop.run_in_executor(None, writer.commit)
+                writer = None
             
-            logger.info(f"✅ {file_path.name}: {len(content)} Zeichen geladen")
-            return content
+            document = builder.build()
+            
+            # Leere Dateien abfangen
+            if not document.chunks:
+                logger.warning(f"⚠️ Datei {name} ist leer oder konnte nicht gelesen werden")
+                return None
+            
+            logger.info(f"✅ {name}: {document.char_count} Zeichen geladen")
+            return document
             
         except Exception as e:
+            if writer:
+                writer.discard()
             logger.error(f"❌ Fehler beim Verarbeiten von {file_path.name}: {e}")
             raise
     
-    async def _extract_pdf_content(self, file_path: Path) -> str:
+    def _get_process_pool(self) -> ProcessPoolExecutor:
         """
-        Extrahiert Text aus PDF-Dateien mit PyMuPDF
+        Prozess-Pool für die PDF-Extraktion (wird beim ersten Bedarf erzeugt)
         """
-        try:
-            # PDF-Verarbeitung in separatem Thread für bessere Performance
-            content = await asyncio.get_event_loop().run_in_executor(
-                None, self._extract_pdf_sync, file_path
-            )
-            return content
-            
-        except Exception as e:
-            logger.error(f"PDF-Verarbeitungsfehler für {file_path.name}: {e}")
-            raise
+        if self._process_pool is None:
+            # spawn statt fork: der Bot hat schon Threads (Gateway, Thread-Pools), deren
+            # gehaltene Locks ein geforkter Prozess erben und daran hängen bleiben könnte
+            self._process_pool = ProcessPoolExecutor(max_workers=self.pdf_workers,
+                                                     mp_context=multiprocessing.get_context("spawn"))
+            logger.info(f"⚙️ PDF-Extraktion mit {self.pdf_workers} Prozessen")
+        return self._process_pool
     
-    def _extract_pdf_sync(self, file_path: Path) -> str:
+    async def _iter_pdf_page_batches(self, file_path: Path) -> AsyncIterator[List[Tuple[int, str]]]:
         """
-        Synchrone PDF-Textextraktion mit PyMuPDF
+        Extrahiert Text aus PDF-Dateien mit PyMuPDF
+        Große PDFs werden in Seitenbereiche aufgeteilt, die parallel in eigenen
+        Prozessen extrahiert und in Seitenreihenfolge geliefert werden; es sind
+        höchstens doppelt so viele Bereiche unterwegs wie Prozesse existieren
         """
         try:
-            doc = fitz.open(str(file_path))
-            text_content = []
+            loop = asyncio.get_event_loop()
+            pool = self._get_process_pool()
             
-            for page_num in range(len(doc)):
-                page = doc.load_page(page_num)
-                page_text = page.get_text()
-                
-                if page_text.strip():  # Nur nicht-leere Seiten hinzufügen
-                    text_content.append(f"--- Seite {page_num + 1} ---\n{page_text}")
+            page_count = await loop.run_in_executor(pool, _count_pdf_pages, str(file_path))
+            window = self.pdf_workers * 2
+            pending = deque()
             
-            doc.close()
+            # PDF-Verarbeitung in separaten Prozessen, da PyMuPDF den GIL hält
+            for start in range(0, page_count, self.pages_per_task):
+                end = min(start + self.pages_per_task, page_count)
+                pending.append(loop.run_in_executor(pool, _extract_pdf_page_range, str(file_path), start, end))
+                if len(pending) >= window:
+                    yield await pending.popleft()
             
-            return "\n\n".join(text_content)
+            while pending:
+                yield await pending.popleft()
             
         except Exception as e:
-            raise Exception(f"PyMuPDF Fehler: {str(e)}")
+            logger.error(f"PDF-Verarbeitungsfehler für {file_path.name}: {e}")
+            raise
     
-    async def _extract_text_content(self, file_path: Path) -> str:
+    async def _extract_pdf_content(self, file_path: Path) -> List[Tuple[int, str]]:
         """
-        Lädt Text aus .txt und .md Dateien
+        Extrahiert alle Seiten einer PDF-Datei als Liste (z.B. für Benchmarks)
+        """
+        pages = []
+        async for batch in self._iter_pdf_page_batches(file_path):
+            pages.extend(batch)
+        return pages
+    
+    def close(self):
+        """
+        Beendet den Prozess-Pool der PDF-Extraktion
+        """
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=False, cancel_futures=True)
+            self._process_pool = None
+    
+    async def _iter_text_blocks(self, file_path: Path) -> AsyncIterator[List[Tuple[int, str]]]:
+        """
+        Liest .txt und .md Dateien blockweise (an Absatzgrenzen getrennt)
         """
         try:
-            # Verschiedene Encodings probieren
-            encodings = ['utf-8', 'utf-8-sig', 'latin-1', 'cp1252']
-            
-            for encoding in encodings:
-                try:
-                    content = await asyncio.get_event_loop().run_in_executor(
-                        None, lambda: file_path.read_text(encoding=encoding)
-                    )
-                    
-                    logger.debug(f"Datei {file_path.name} mit {encoding} Encoding gelesen")
-                    return content
-                    
-                except UnicodeDecodeError:
-                    continue
+            encoding = await asyncio.get_event_loop().run_in_executor(
+                None, _detect_text_encoding, file_path
+            )
+            logger.debug(f"Datei {file_path.name} mit {encoding} Encoding gelesen")
             
-            # Wenn alle Encodings fehlschlagen
-            raise Exception("Datei konnte mit keinem unterstützten Encoding gelesen werden")
+            async for batch in _iterate_in_executor(_read_text_blocks(file_path, encoding)):
+                yield batch
             
         except Exception as e:
             logger.error(f"Text-Verarbeitungsfehler für {file_path.name}: {e}")
             raise
     
-    def get_combined_content(self) -> str:
+    def on_reload(self, callback: Callable[[], None]):
         """
-        Gibt den kombinierten Inhalt aller geladenen Dateien zurück
+        Registriert eine Funktion, die aufgerufen wird, wenn sich der Wissensstand
+        beim Neuladen geändert hat, z.B. um Caches zu invalidieren
         """
-        if not self.loaded_content:
-            return ""
+        self._reload_callbacks.append(callback)
+    
+    def _update_version(self):
+        """
+        Berechnet den Wissensstand aus Dateinamen, Größen und Änderungszeiten
+        und benachrichtigt registrierte Listener, falls er sich geändert hat
+        """
+        previous_version = self.version
+        fingerprint = hashlib.sha1()
+        for filename in sorted(self._file_signatures):
+            size, mtime_ns = self._file_signatures[filename]
+            fingerprint.update(f"{filename}\x1f{size}\x1f{mtime_ns}\n".encode('utf-8'))
+        self.version = fingerprint.hexdigest()[:16]
         
-        combined_parts = []
-        for filename, content in self.loaded_content.items():
-            combined_parts.append(f"=== DATEI: {filename} ===\n{content}")
+        if not previous_version or previous_version == self.version:
+            return
         
-        return "\n\n".join(combined_parts)
+        for callback in self._reload_callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"❌ Fehler im Reload-Listener: {e}")
+    
+    def search(self, question: str, max_tokens: int = 8000) -> List[ChunkRecord]:
+        """
+        Gibt die relevantesten Chunk-Records (mit Datei, Seite, Offset und ID) zurück
+        """
+        return self.index.search(question, max_tokens)
+    
+    def get_relevant_chunks(self, question: str, max_tokens: int = 8000) -> List[str]:
+        """
+        Gibt die relevantesten Chunks aus dem vorberechneten Index zurück
+        """
+        return self.index.get_relevant_chunks(question, max_tokens)
     
     def get_loaded_files(self) -> List[str]:
         """
         Gibt eine Liste der erfolgreich geladenen Dateinamen zurück
         """
-        return list(self.loaded_content.keys())
+        return list(self._documents.keys())
     
     def get_file_content(self, filename: str) -> str:
         """
-        Gibt den Inhalt einer bestimmten Datei zurück
+        Gibt den Inhalt einer bestimmten Datei zurück (aus ihren Chunks zusammengesetzt)
+        Überlappende Chunks (CHUNK_OVERLAP) werden über ihre Offsets zusammengeführt,
+        sodass kein Text doppelt erscheint
         """
-        return self.loaded_content.get(filename, "")
+        document = self._documents.get(filename)
+        if not document:
+            return ""
+        sections: List[List[str]] = []
+        last_page, last_end = None, 0
+        for page, offset, text in document.chunks:
+            end = offset + len(text)
+            if page == last_page and offset < last_end:
+                # Nur den Teil anhängen, der nicht schon im vorherigen Chunk steht
+                if end > last_end:
+                    sections[-1].append(text[last_end - offset:])
+                    last_end = end
+                continue
+            sections.append([text])
+            last_page, last_end = page, end
+        return "\n\n".join("".join(section) for section in sections)
     
     def get_content_stats(self) -> Dict[str, int]:
         """
         Gibt Statistiken über die geladenen Inhalte zurück
         """
         stats = {
-            "total_files": len(self.loaded_content),
-            "total_characters": sum(len(content) for content in self.loaded_content.values()),
+            "total_files": len(self._documents),
+            "total_characters": sum(document.char_count for document in self._documents.values()),
             "average_file_size": 0
         }
         
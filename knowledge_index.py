@@ -0,0 +1,234 @@
+"""
+Vorberechneter Wissens-Index für den Discord Bot
+Hält die Chunks aller geladenen Dateien, damit Fragen nicht jedes Mal
+den kompletten Korpus neu aufteilen und bewerten müssen
+"""
+
+import logging
+from array import array
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from embeddings import EmbeddingIndex, EmbeddingStore, fuse_rankings
+from retrieval import Analyzer, BM25Engine, PostingsSegment, create_engine
+from text_chunker import TextChunker
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ChunkRecord:
+    """
+    Unveränderlicher Chunk mit Herkunftsangaben
+    """
+    chunk_id: int
+    file: str
+    page: int  # 1-basiert, Text-Dateien haben genau eine Seite
+    offset: int  # Zeichen-Offset innerhalb der Seite
+    text: str
+
+
+@dataclass(frozen=True)
+class IndexedDocument:
+    """
+    Fertig aufbereitetes Dokument: Chunks (ohne globale IDs) und sein BM25-Teilindex
+    Wird beim inkrementellen Neuladen für unveränderte Dateien wiederverwendet
+    """
+    name: str
+    chunks: Tuple[Tuple[int, int, str], ...]  # (seite, offset, text)
+    segment: PostingsSegment
+    char_count: int = 0
+    page_count: int = 0
+
+
+class DocumentBuilder:
+    """
+    Baut ein IndexedDocument Seite für Seite auf
+    Jede Seite wird sofort in Chunks zerlegt und indexiert, sodass nie der
+    komplette Dokumenttext gleichzeitig im Speicher liegt
+    """
+
+    def __init__(self, name: str, chunker: TextChunker, analyzer: Optional[Analyzer] = None):
+        self.name = name
+        self.chunker = chunker
+        self.analyzer = analyzer or Analyzer()
+        self._chunks: List[Tuple[int, int, str]] = []
+        self._segment = PostingsSegment({}, array('I'))
+        self.char_count = 0
+        self.page_count = 0
+        self._last_page: Optional[int] = None
+        self._page_offset = 0
+
+    def add_page(self, page_num: int, page_text: str):
+        """
+        Zerlegt eine Seite in Chunks und indexiert sie
+        Folgen mehrere Blöcke mit derselben Seitennummer aufeinander (Text-Dateien),
+        setzen sie die Seite fort und die Offsets laufen weiter
+        """
+        if page_num == self._last_page:
+            base_offset = self._page_offset
+        else:
+            base_offset = 0
+            self.page_count += 1
+            self._last_page = page_num
+        self._page_offset = base_offset + len(page_text)
+        self.char_count += len(page_text)
+        # Der Chunker liefert exakte Bereiche der Seite; Text wird nur einmal ausgeschnitten
+        for start, end in self.chunker.iter_spans(page_text):
+            chunk = page_text[start:end]
+            self._chunks.append((page_num, base_offset + start, chunk))
+            self._segment.add(chunk, self.analyzer)
+
+    def add_pages(self, pages: Iterable[Tuple[int, str]]):
+        for page_num, page_text in pages:
+            self.add_page(page_num, page_text)
+
+    def build(self) -> IndexedDocument:
+        return IndexedDocument(
+            name=self.name,
+            chunks=tuple(self._chunks),
+            segment=self._segment,
+            char_count=self.char_count,
+            page_count=self.page_count
+        )
+
+
+class KnowledgeIndex:
+    """
+    Unveränderlicher Index über alle Chunks der Wissensdatenbank
+    Wird beim Laden aufgebaut und danach nur noch gelesen; Änderungen
+    erzeugen einen neuen Index, der den alten als Ganzes ersetzt
+    """
+
+    def __init__(self, records: Sequence[ChunkRecord], chunker: TextChunker, engine=None,
+                 embeddings: Optional[EmbeddingIndex] = None, mode: str = "keyword"):
+        self.chunker = chunker
+        self.records: Tuple[ChunkRecord, ...] = tuple(records)
+        self._chunk_tokens: Tuple[int, ...] = tuple(
+            chunker.estimate_tokens(record.text) for record in self.records
+        )
+        self._avg_tokens = (sum(self._chunk_tokens) // len(self.records)) if self.records else 0
+
+        # Invertierter Index über alle Chunk-Texte (falls nicht bereits vorberechnet)
+        self.engine = engine or BM25Engine().build([record.text for record in self.records])
+        # Optionale Vektorsuche: "semantic" nur Vektoren, "hybrid" beide Rankings fusioniert
+        self.embeddings = embeddings
+        self.mode = mode if embeddings is not None else "keyword"
+
+    @classmethod
+    def from_documents(cls, documents: Sequence[IndexedDocument], chunker: TextChunker,
+                       engine_name: str = "bm25", mode: str = "keyword",
+                       embedding_store: Optional[EmbeddingStore] = None) -> "KnowledgeIndex":
+        """
+        Setzt den Index aus aufbereiteten Dokumenten zusammen, ohne Texte neu zu analysieren
+        engine_name wählt die Bewertung: "bm25" (Standard) oder "tfidf" (benötigt numpy/scipy)
+        mode "semantic"/"hybrid" nutzt zusätzlich die Vektoren aus embedding_store
+        """
+        records: List[ChunkRecord] = []
+        for document in documents:
+            for page_num, offset, text in document.chunks:
+                records.append(ChunkRecord(
+                    chunk_id=len(records),
+                    file=document.name,
+                    page=page_num,
+                    offset=offset,
+                    text=text
+                ))
+
+        engine = create_engine(engine_name).build_from_segments([document.segment for document in documents])
+        embeddings = None
+        if mode != "keyword" and embedding_store is not None:
+            embeddings = embedding_store.build_index(
+                [[text for _, _, text in document.chunks] for document in documents]
+            )
+        logger.info(f"🗂️ Wissens-Index aufgebaut: {len(records)} Chunks aus {len(documents)} Dateien")
+        return cls(records, chunker, engine, embeddings, mode)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def search(self, question: str, max_tokens: int = 8000) -> List[ChunkRecord]:
+        """
+        Gibt die relevantesten Chunks für eine Frage bis zum Token-Limit zurück
+        Die Kosten hängen nur von den Postings der Fragebegriffe ab
+        """
+        if not question or not self.records:
+            return []
+
+        # Erst so viele Treffer holen, wie voraussichtlich ins Limit passen;
+        # reicht das nicht, wird der Heap vergrößert
+        top_k = max(8, max_tokens // max(1, self._avg_tokens) + 1)
+        while True:
+            ranked = self._rank(question, top_k)
+            selected, total_tokens, limit_reached = self._fill_budget(
+                (chunk_id for chunk_id, _ in ranked), max_tokens
+            )
+            if limit_reached or len(ranked) < top_k:
+                break
+            top_k *= 2
+
+        if not ranked:
+            logger.warning("⚠️ Keine relevanten Chunks gefunden, verwende erste Chunks")
+            selected, total_tokens, _ = self._fill_budget(range(len(self.records)), max_tokens)
+
+        logger.info(f"🎯 {len(selected)} relevante Chunks ausgewählt ({total_tokens} geschätzte Tokens)")
+        return selected
+
+    def _rank(self, question: str, top_k: int) -> List[Tuple[int, float]]:
+        if self.mode == "semantic":
+            return self.embeddings.search(question, top_k)
+        if self.mode == "hybrid":
+            return fuse_rankings([self.engine.search(question, top_k),
+                                  self.embeddings.search(question, top_k)])[:top_k]
+        return self.engine.search(question, top_k)
+
+    def search_many(self, questions: Sequence[str], max_tokens: int = 8000) -> List[List[ChunkRecord]]:
+        """
+        Wie search() für mehrere Fragen; die TF-IDF-Engine bewertet sie in einem Durchgang
+        """
+        if not self.records:
+            return [[] for _ in questions]
+        if self.mode != "keyword":
+            return [self.search(question, max_tokens) for question in questions]
+
+        top_k = max(8, max_tokens // max(1, self._avg_tokens) + 1)
+        results = []
+        for question, ranked in zip(questions, self.engine.search_many(questions, top_k)):
+            selected, _, limit_reached = self._fill_budget((chunk_id for chunk_id, _ in ranked), max_tokens)
+            if not ranked or (not limit_reached and len(ranked) == top_k):
+                # Kein Treffer oder Budget nicht gefüllt: Einzelsuche mit größerem Heap bzw. Fallback
+                selected = self.search(question, max_tokens)
+            results.append(selected)
+        return results
+
+    def _fill_budget(self, chunk_ids: Iterable[int], max_tokens: int) -> Tuple[List[ChunkRecord], int, bool]:
+        """
+        Sammelt Chunks in Reihenfolge, bis das Token-Limit erreicht ist
+        """
+        selected: List[ChunkRecord] = []
+        total_tokens = 0
+        for chunk_id in chunk_ids:
+            chunk_tokens = self._chunk_tokens[chunk_id]
+            if total_tokens + chunk_tokens > max_tokens:
+                return selected, total_tokens, True
+            selected.append(self.records[chunk_id])
+            total_tokens += chunk_tokens
+        return selected, total_tokens, False
+
+    def get_relevant_chunks(self, question: str, max_tokens: int = 8000) -> List[str]:
+        """
+        Wie search(), gibt aber nur die Chunk-Texte zurück
+        """
+        return [record.text for record in self.search(question, max_tokens)]
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Gibt Statistiken über den Index zurück
+        """
+        return {
+            "chunks": len(self.records),
+            "terms": self.engine.term_count,
+            "files": len({record.file for record in self.records}),
+            "embedded_chunks": len(self.embeddings) if self.embeddings is not None else 0,
+            "embedding_lists": self.embeddings.nlist if self.embeddings is not None else 0,
+        }
@@ -0,0 +1,181 @@
+"""
+Dispatch-Schicht für Gemini-Anfragen
+Führt Modellaufrufe außerhalb des Event-Loops aus, begrenzt die Anzahl
+gleichzeitiger Anfragen und misst Warteschlange, Laufzeit und Timeouts
+"""
+
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class LLMDispatcher:
+    """
+    Begrenzt parallele Modellaufrufe über ein Semaphore und setzt Timeouts durch
+    Nutzt die asynchrone API des Modells, sonst einen eigenen Thread-Pool
+
+    Mit limit_concurrency=False entfällt das Semaphore: dann begrenzt allein der
+    Aufrufer (z.B. der RequestScheduler) die Anzahl gleichzeitiger Aufrufe, und
+    max_in_flight bestimmt nur die Größe des Thread-Pools
+    """
+
+    def __init__(self, max_in_flight: int = 4, timeout: float = 60.0, limit_concurrency: bool = True):
+        self.max_in_flight = max(1, int(max_in_flight))
+        self.timeout = float(timeout)
+        self._semaphore = asyncio.Semaphore(self.max_in_flight) if limit_concurrency else None
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_in_flight, thread_name_prefix="llm"
+        )
+
+        # Metriken
+        self.queued = 0
+        self.in_flight = 0
+        self.max_queue_depth = 0
+        self.completed = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.total_latency = 0.0
+
+    async def generate(self, model, contents: Any, timeout: Optional[float] = None, **kwargs):
+        """
+        Ruft model.generate_content(contents) auf, ohne den Event-Loop zu blockieren
+        Wirft asyncio.TimeoutError, wenn die Anfrage das Zeitlimit überschreitet
+        """
+        timeout = self.timeout if timeout is None else timeout
+
+        await self._acquire()
+
+        self.in_flight += 1
+        started = time.perf_counter()
+        try:
+            response = await asyncio.wait_for(self._call_model(model, contents, **kwargs), timeout)
+            self.completed += 1
+            return response
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            logger.warning(f"⏱️ Gemini-Anfrage nach {timeout:g}s abgebrochen")
+            raise
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.total_latency += time.perf_counter() - started
+            self.in_flight -= 1
+            if self._semaphore is not None:
+                self._semaphore.release()
+
+    async def stream(self, model, contents: Any, timeout: Optional[float] = None,
+                     **kwargs) -> AsyncIterator[str]:
+        """
+        Streamt die Antwort des Modells als Textstücke
+        Der Slot im Semaphore bleibt belegt, bis der Stream vollständig gelesen
+        oder geschlossen wurde; das Zeitlimit gilt für den gesamten Stream
+        """
+        timeout = self.timeout if timeout is None else timeout
+
+        await self._acquire()
+
+        self.in_flight += 1
+        started = time.perf_counter()
+        deadline = started + timeout
+        try:
+            generate_async = getattr(model, "generate_content_async", None)
+            if generate_async is None:
+                # Ohne asynchrone API: komplette Antwort im Thread-Pool erzeugen
+                response = await asyncio.wait_for(self._call_model(model, contents, **kwargs), timeout)
+                text = _response_text(response)
+                if text:
+                    yield text
+            else:
+                response = await asyncio.wait_for(
+                    generate_async(contents, stream=True, **kwargs), timeout
+                )
+                iterator = response.__aiter__()
+                while True:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        raise asyncio.TimeoutError()
+                    try:
+                        chunk = await asyncio.wait_for(iterator.__anext__(), remaining)
+                    except StopAsyncIteration:
+                        break
+                    text = _response_text(chunk)
+                    if text:
+                        yield text
+            self.completed += 1
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            logger.warning(f"⏱️ Gemini-Stream nach {timeout:g}s abgebrochen")
+            raise
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.total_latency += time.perf_counter() - started
+            self.in_flight -= 1
+            if self._semaphore is not None:
+                self._semaphore.release()
+
+    async def _acquire(self):
+        """
+        Wartet auf einen freien Platz im Semaphore (sofern der Dispatcher selbst begrenzt)
+        """
+        if self._semaphore is None:
+            return
+        self.queued += 1
+        self.max_queue_depth = max(self.max_queue_depth, self.queued)
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.queued -= 1
+
+    async def _call_model(self, model, contents: Any, **kwargs):
+        """
+        Bevorzugt generate_content_async, fällt auf den Thread-Pool zurück
+        """
+        generate_async = getattr(model, "generate_content_async", None)
+        if generate_async is not None:
+            return await generate_async(contents, **kwargs)
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, lambda: model.generate_content(contents, **kwargs)
+        )
+
+    def get_stats(self) -> Dict[str, float]:
+        """
+        Gibt Warteschlangen- und Laufzeitmetriken zurück
+        """
+        finished = self.completed + self.failed + self.timeouts
+        return {
+            "max_in_flight": self.max_in_flight,
+            "queue_depth": self.queued,
+            "max_queue_depth": self.max_queue_depth,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "failed": self.failed,
+            "timeouts": self.timeouts,
+            "avg_latency": (self.total_latency / finished) if finished else 0.0,
+        }
+
+    def shutdown(self):
+        """
+        Beendet den Thread-Pool, ohne auf laufende Aufrufe zu warten
+        """
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _response_text(response) -> str:
+    """
+    Liest den Text einer (Teil-)Antwort; Teile ohne Text (z.B. Abschluss-Chunks) ergeben ""
+    """
+    if response is None:
+        return ""
+    try:
+        return response.text or ""
+    except ValueError:
+        return ""
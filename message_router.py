@@ -0,0 +1,141 @@
+"""
+Routing eingehender Nachrichten vor jeder teuren Verarbeitung
+Ordnet jede Nachricht genau einer Route zu (Begrüßung, Befehl, Bild,
+Wissensfrage, allgemeiner Chat), damit jede Route nur die Schritte ausführt,
+die sie braucht, und misst die Latenz pro Route
+"""
+
+import random
+import re
+import time
+from collections import deque
+from contextlib import contextmanager
+from enum import Enum
+from typing import Dict, Iterator, Optional
+
+from question_classifier import QuestionClassifier
+
+
+class Route(Enum):
+    GREETING = "greeting"
+    COMMAND = "command"
+    IMAGE = "image"
+    KNOWLEDGE = "knowledge"
+    CHAT = "chat"
+
+
+# Begrüßungen als ganze Wörter ("hi" trifft nicht mehr "nicht")
+_GREETING = re.compile(
+    r"\b(?:hallo|hi|hey|moin|servus|guten (?:tag|morgen|abend)|wie geht'?s|wie geht es|wie läuft'?s|"
+    r"hello|how are you)\b",
+    re.IGNORECASE
+)
+_ENGLISH_GREETING = re.compile(r"\b(?:hello|hi|hey|how are you)\b", re.IGNORECASE)
+_MENTION = re.compile(r"<@!?\d+>")
+MAX_GREETING_WORDS = 6
+
+GREETING_RESPONSES = {
+    # Antworten auf !frage
+    ("explicit", "en"): [
+        "Hello! How can I assist you today?",
+        "Hi there! What can I help you with?",
+        "Greetings! I'm here to help. What's your question?"
+    ],
+    ("explicit", "de"): [
+        "Hallo! Wie kann ich Ihnen heute behilflich sein?",
+        "Hallo! Womit kann ich Ihnen helfen?",
+        "Guten Tag! Ich bin hier, um zu helfen. Was ist Ihre Frage?"
+    ],
+    # Antworten auf Erwähnungen und automatisch erkannte Begrüßungen
+    ("auto", "en"): [
+        "Hello! I'm doing well, thank you. How can I help you?",
+        "Hi! Everything is fine. What can I do for you today?",
+        "Hello! I'm operational and ready to assist."
+    ],
+    ("auto", "de"): [
+        "Hallo! Mir geht es gut, danke. Wie kann ich Ihnen helfen?",
+        "Hi! Alles in Ordnung. Was kann ich heute für Sie tun?",
+        "Hallo! Ich bin einsatzbereit und stehe zur Verfügung."
+    ],
+}
+
+
+def is_greeting(text: str) -> bool:
+    """
+    Kurze Nachricht (höchstens MAX_GREETING_WORDS Wörter) mit einer Begrüßung
+    """
+    text = _MENTION.sub(" ", text)
+    return len(text.split()) <= MAX_GREETING_WORDS and _GREETING.search(text) is not None
+
+
+def greeting_response(text: str, style: str = "auto") -> str:
+    """
+    Wählt eine passende Begrüßung in der Sprache der Nachricht
+    """
+    language = "en" if _ENGLISH_GREETING.search(text) else "de"
+    return random.choice(GREETING_RESPONSES[(style, language)])
+
+
+class MessageRouter:
+    """
+    Entscheidet anhand billiger lokaler Prüfungen, welche Route eine Nachricht nimmt
+    """
+
+    def __init__(self, classifier: QuestionClassifier, command_prefix: str = "!",
+                 min_question_length: int = 5, latency_window: int = 1000):
+        self.classifier = classifier
+        self.command_prefix = command_prefix
+        self.min_question_length = min_question_length
+
+        self._counts: Dict[Route, int] = {route: 0 for route in Route}
+        self._total_seconds: Dict[Route, float] = {route: 0.0 for route in Route}
+        self._recent: Dict[Route, deque] = {route: deque(maxlen=latency_window) for route in Route}
+
+    def route(self, content: str, mentioned: bool = False, has_attachments: bool = False) -> Route:
+        """
+        Ordnet eine Nachricht einer Route zu (Reihenfolge = Vorrang)
+        """
+        if content.startswith(self.command_prefix):
+            return Route.COMMAND
+        if mentioned and has_attachments:
+            return Route.IMAGE
+
+        addressed = mentioned or self.classifier.is_question(content)
+        if not addressed:
+            return Route.CHAT
+        if is_greeting(content):
+            return Route.GREETING
+        if len(content.strip()) > self.min_question_length:
+            return Route.KNOWLEDGE
+        return Route.CHAT
+
+    @contextmanager
+    def timed(self, route: Route) -> Iterator[None]:
+        """
+        Misst die Bearbeitungsdauer einer Nachricht auf der angegebenen Route
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(route, time.perf_counter() - started)
+
+    def record(self, route: Route, seconds: float):
+        self._counts[route] += 1
+        self._total_seconds[route] += seconds
+        self._recent[route].append(seconds)
+
+    def get_stats(self) -> Dict[str, Dict[str, Optional[float]]]:
+        """
+        Gibt pro Route Anzahl, mittlere und p95-Latenz (Sekunden) zurück
+        """
+        stats = {}
+        for route in Route:
+            count = self._counts[route]
+            recent = sorted(self._recent[route])
+            stats[route.value] = {
+                "count": count,
+                "avg_seconds": (self._total_seconds[route] / count) if count else 0.0,
+                "p95_seconds": recent[int(len(recent) * 0.95)] if recent else 0.0,
+            }
+        return stats
@@ -0,0 +1,181 @@
+"""
+Leichtgewichtige Messpunkte für den Bot
+Histogramme pro Verarbeitungsschritt, Zähler und Kennzahlen aus den
+get_stats()-Methoden der Komponenten, ausgegeben im Prometheus-Textformat
+"""
+
+import asyncio
+import logging
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Obergrenzen der Histogramm-Buckets in Sekunden
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """
+    Zählt Beobachtungen pro Bucket (nicht kumulativ; kumuliert wird erst bei der Ausgabe)
+    """
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class StageTimer:
+    """
+    Misst aufeinanderfolgende Schritte einer Anfrage: mark(name) erfasst die Zeit seit dem letzten mark
+    """
+    __slots__ = ("_registry", "_handler", "_last")
+
+    def __init__(self, registry: "MetricsRegistry", handler: str):
+        self._registry = registry
+        self._handler = handler
+        self._last = time.perf_counter()
+
+    def mark(self, stage: str):
+        now = time.perf_counter()
+        # Labels sind bereits sortiert (handler < stage), das spart das Sortieren pro Aufruf
+        self._registry._observe_key("bot_stage_seconds", (("handler", self._handler), ("stage", stage)),
+                                    now - self._last)
+        self._last = now
+
+
+class MetricsRegistry:
+    """
+    Sammelt Histogramme und Zähler; Kennzahlen anderer Komponenten werden erst beim Abruf gelesen
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._help: Dict[str, str] = {}
+        self._collectors: List[Tuple[str, Callable[[], Optional[Dict[str, float]]]]] = []
+
+    def describe(self, name: str, help_text: str):
+        self._help[name] = help_text
+
+    def observe(self, name: str, value: float, **labels: str):
+        """
+        Trägt einen Wert in das Histogramm name mit den angegebenen Labels ein
+        """
+        self._observe_key(name, tuple(sorted(labels.items())), value)
+
+    def _observe_key(self, name: str, key: LabelKey, value: float):
+        series = self._histograms.get(name)
+        if series is None:
+            series = self._histograms[name] = {}
+        histogram = series.get(key)
+        if histogram is None:
+            histogram = series[key] = Histogram(self.buckets)
+        histogram.observe(value)
+
+    def inc(self, name: str, amount: float = 1.0, **labels: str):
+        series = self._counters.setdefault(name, {})
+        key = tuple(sorted(labels.items()))
+        series[key] = series.get(key, 0.0) + amount
+
+    @contextmanager
+    def timer(self, name: str, **labels: str) -> Iterator[None]:
+        """
+        Misst die Dauer des with-Blocks (auch bei Ausnahmen)
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def stage_timer(self, handler: str) -> StageTimer:
+        return StageTimer(self, handler)
+
+    def register_stats(self, prefix: str, source: Callable[[], Optional[Dict[str, float]]]):
+        """
+        Registriert eine get_stats()-Quelle; numerische Werte werden als prefix_<schlüssel> ausgegeben
+        """
+        self._collectors.append((prefix, source))
+
+    def render(self) -> str:
+        """
+        Gibt alle Metriken im Prometheus-Textformat (Version 0.0.4) aus
+        """
+        lines: List[str] = []
+        for name, series in sorted(self._histograms.items()):
+            self._header(lines, name, "histogram")
+            for key, histogram in sorted(series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_labels(key, le=_format_value(bound))} {cumulative}")
+                lines.append(f"{name}_bucket{_labels(key, le='+Inf')} {histogram.count}")
+                lines.append(f"{name}_sum{_labels(key)} {_format_value(histogram.sum)}")
+                lines.append(f"{name}_count{_labels(key)} {histogram.count}")
+
+        for name, series in sorted(self._counters.items()):
+            self._header(lines, name, "counter")
+            for key, value in sorted(series.items()):
+                lines.append(f"{name}{_labels(key)} {_format_value(value)}")
+
+        for prefix, source in self._collectors:
+            try:
+                stats = source() or {}
+            except Exception as e:
+                logger.warning(f"⚠️ Metriken für {prefix} nicht verfügbar: {e}")
+                continue
+            for key, value in stats.items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                name = f"{prefix}_{key}"
+                self._header(lines, name, "gauge")
+                lines.append(f"{name} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def _header(self, lines: List[str], name: str, metric_type: str):
+        if name in self._help:
+            lines.append(f"# HELP {name} {self._help[name]}")
+        lines.append(f"# TYPE {name} {metric_type}")
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(key: LabelKey, **extra: str) -> str:
+    pairs = list(key) + list(extra.items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+async def monitor_event_loop_lag(registry: MetricsRegistry, interval: float = 0.5):
+    """
+    Misst, wie viel später als geplant der Event-Loop einen Timer ausführt
+    (blockierende Aufrufe im Loop zeigen sich hier direkt)
+    """
+    registry.describe("bot_event_loop_lag_seconds", "Verzögerung geplanter Timer im Event-Loop")
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        registry.observe("bot_event_loop_lag_seconds", max(0.0, time.perf_counter() - started - interval))
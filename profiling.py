@@ -0,0 +1,192 @@
+"""
+Profiling bei Bedarf für laufende Anfragen
+Ein Admin aktiviert per Befehl oder Signal einen cProfile-Mitschnitt für die
+nächsten N Anfragen; das Profil wird gespeichert und als Zusammenfassung
+der teuersten Funktionen gemeldet. Ausgeschaltet kostet ein Aufruf nur
+eine Attributprüfung.
+"""
+
+import asyncio
+import cProfile
+import functools
+import io
+import logging
+import pstats
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ProfileReport:
+    path: Path
+    requests: int
+    kinds: Dict[str, int]
+    duration: float
+    summary: str = field(repr=False)
+
+
+class RequestProfiler:
+    """
+    Schneidet die nächsten N profilierten Aufrufe mit einem gemeinsamen cProfile mit
+
+    cProfile kann Coroutinen nicht einzeln zuordnen: Das Profil läuft vom Start der
+    ersten bis zum Ende der letzten erfassten Anfrage und enthält alles, was der
+    Event-Loop in dieser Zeit ausführt. cProfile sieht nur den Thread des
+    Event-Loops: Arbeit in Thread- und Prozess-Pools fehlt, daher werden nur
+    Fragen profiliert und nicht das Laden der Wissensdatenbank.
+    """
+
+    def __init__(self, output_dir: str = "data/profiles", top: int = 15):
+        self.output_dir = Path(output_dir)
+        self.top = top
+
+        self._remaining = 0
+        self._active = 0
+        self._profile: Optional[cProfile.Profile] = None
+        self._started = 0.0
+        self._kinds: Counter = Counter()
+        self._notify: Optional[Callable[[ProfileReport], Awaitable[None]]] = None
+        self._report_task: Optional[asyncio.Task] = None
+
+        self.sessions = 0
+        self.profiled_requests = 0
+        self.last_report: Optional[ProfileReport] = None
+
+    @property
+    def running(self) -> bool:
+        return bool(self._remaining or self._active)
+
+    def arm(self, requests: int, notify: Optional[Callable[[ProfileReport], Awaitable[None]]] = None) -> bool:
+        """
+        Profiliert die nächsten requests Aufrufe; notify erhält danach den Bericht
+        Gibt False zurück, wenn bereits ein Mitschnitt läuft
+        """
+        if requests <= 0 or self.running:
+            return False
+        self._remaining = requests
+        self._notify = notify
+        self._kinds = Counter()
+        logger.info(f"🔬 Profiling für die nächsten {requests} Anfragen aktiviert")
+        return True
+
+    def stop(self) -> bool:
+        """
+        Beendet einen laufenden Mitschnitt vorzeitig (laufende Anfragen werden noch erfasst)
+        """
+        if not self.running:
+            return False
+        self._remaining = 0
+        if self._active == 0:
+            self._finish()
+        return True
+
+    def profiled(self, kind: str):
+        """
+        Dekorator für async-Handler, die bei aktivem Mitschnitt profiliert werden
+        """
+        def decorator(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                if not self._remaining:
+                    return await func(*args, **kwargs)
+                return await self._run(kind, func, args, kwargs)
+            return wrapper
+        return decorator
+
+    async def run(self, kind: str, func, *args, **kwargs):
+        """
+        Ruft func auf und profiliert den Aufruf, falls ein Mitschnitt aktiv ist
+        """
+        if not self._remaining:
+            return await func(*args, **kwargs)
+        return await self._run(kind, func, args, kwargs)
+
+    async def _run(self, kind: str, func, args, kwargs):
+        if self._profile is None and not self._start():
+            return await func(*args, **kwargs)
+        self._remaining -= 1
+        self._active += 1
+        self._kinds[kind] += 1
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            self._active -= 1
+            self.profiled_requests += 1
+            if not self._remaining and not self._active:
+                self._finish()
+
+    def _start(self) -> bool:
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError as e:
+            # Ein anderer Profiler ist bereits aktiv
+            logger.warning(f"⚠️ Profiling nicht möglich: {e}")
+            self._remaining = 0
+            return False
+        self._profile = profile
+        self._started = time.perf_counter()
+        return True
+
+    def _finish(self):
+        profile, self._profile = self._profile, None
+        notify, self._notify = self._notify, None
+        if profile is None:
+            return
+        profile.disable()
+        self.sessions += 1
+        duration = time.perf_counter() - self._started
+        requests = sum(self._kinds.values())
+        self._report_task = asyncio.create_task(
+            self._write_report(profile, requests, dict(self._kinds), duration, notify)
+        )
+
+    async def _write_report(self, profile: cProfile.Profile, requests: int, kinds: Dict[str, int],
+                            duration: float, notify):
+        try:
+            path = self.output_dir / f"{time.strftime('%Y%m%d-%H%M%S')}-{requests}req.prof"
+            summary = await asyncio.to_thread(self._dump, profile, path)
+            report = ProfileReport(path=path, requests=requests, kinds=kinds, duration=duration, summary=summary)
+            self.last_report = report
+            logger.info(f"🔬 Profil gespeichert: {path} ({requests} Anfragen, {duration:.1f}s)\n{summary}")
+            if notify:
+                await notify(report)
+        except Exception as e:
+            logger.error(f"❌ Profil konnte nicht gespeichert werden: {e}")
+
+    def _dump(self, profile: cProfile.Profile, path: Path) -> str:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        profile.dump_stats(str(path))
+        return summarize_profile(path, self.top)
+
+    async def close(self):
+        self.stop()
+        if self._report_task:
+            await self._report_task
+
+    def get_stats(self) -> dict:
+        return {
+            "running": self.running,
+            "remaining": self._remaining,
+            "sessions": self.sessions,
+            "profiled_requests": self.profiled_requests,
+        }
+
+
+def summarize_profile(path: Path, top: int = 15) -> str:
+    """
+    Tabelle der Funktionen mit der meisten Eigenzeit (tottime), dazu die kumulierte Zeit
+    """
+    stats = pstats.Stats(str(path), stream=io.StringIO())
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)[:top]
+    lines = [f"{'Aufrufe':>9} {'eigen s':>8} {'kumul. s':>8}  Funktion"]
+    for (filename, line, name), (_, calls, tottime, cumtime, _) in rows:
+        location = f" ({Path(filename).name}:{line})" if line else ""
+        lines.append(f"{calls:>9} {tottime:>8.3f} {cumtime:>8.3f}  {name}{location}")
+    lines.append(f"Gesamt: {stats.total_calls} Aufrufe in {stats.total_tt:.3f}s")
+    return "\n".join(lines)
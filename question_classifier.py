@@ -0,0 +1,137 @@
+"""
+Lokale Vorabprüfung, ob eine Chat-Nachricht eine Frage an den Bot ist
+Ersetzt die Teilstring-Suche ('was' trifft auch "etwas") durch vorkompilierte
+Wortgrenzen-Muster und ein kleines gewichtetes Merkmalsmodell mit Schwellwert
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+# Fragewörter (deutsch/englisch), nur als ganze Wörter
+_INTERROGATIVES = (
+    r"wie|was|wann|wo|warum|weshalb|wieso|weswegen|welche[rsmn]?|wer|wem|wen|wessen|"
+    r"woher|wohin|womit|wofür|worüber|wozu|"
+    r"how|what|when|where|why|which|who|whom|whose"
+)
+# Verben, die am Satzanfang eine Entscheidungsfrage einleiten
+# ("was" fehlt bewusst: deutsch ist es ein Fragewort, englisch würde es doppelt zählen)
+_INVERTED_VERBS = (
+    r"kann|kannst|könnt|können|könnte|könntest|soll|sollte|sollten|muss|musst|müssen|"
+    r"darf|darfst|hast|habt|haben|hat|gibt|ist|sind|bist|seid|wird|werden|würde|würdest|"
+    r"geht|lohnt|macht|funktioniert|weißt|wisst|kennt|kennst|"
+    r"can|could|should|would|will|do|does|did|is|are|were|has|have|any"
+)
+
+_QUESTION_MARK_END = re.compile(r"\?\s*$")
+_QUESTION_MARK = re.compile(r"\?")
+_LEADING_INTERROGATIVE = re.compile(rf"^\W*(?:{_INTERROGATIVES})\b", re.IGNORECASE)
+_INTERROGATIVE = re.compile(rf"\b(?:{_INTERROGATIVES})\b", re.IGNORECASE)
+_LEADING_VERB = re.compile(rf"^\W*(?:{_INVERTED_VERBS})\b", re.IGNORECASE)
+_HELP_REQUEST = re.compile(
+    r"\b(?:hilfe|helfen|hilft|hilf|helft|help|(?:eine|meine|kurze) frage|erklär\w*|tipps?|empfehl\w*|"
+    r"weiß jemand|kennt jemand|hat jemand|any ?one know|any idea|advice)\b",
+    re.IGNORECASE
+)
+_SMALL_TALK = re.compile(
+    r"^\W*(?:haha+|hehe+|lol|xd|ok(?:ay)?|jo|ja|nein|nee|danke|thx|thanks|thank you|gn8|gute nacht|"
+    r"nice|cool|geil|top|gg)\b",
+    re.IGNORECASE
+)
+# Lachen/Chat-Kürzel irgendwo in der Nachricht ("Wie immer zu spät lol")
+_LAUGHTER = re.compile(r"\b(?:haha+|hehe+|lol|lmao|rofl|xd)\b", re.IGNORECASE)
+# Ausrufe, die mit einem Fragewort beginnen ("Was für ein Tag", "Wie immer")
+_EXCLAMATIVE = re.compile(
+    r"^\W*(?:was für (?:ein|eine|einen|ein\w*)|was (?:ein|eine|für)|wie (?:immer|gesagt|geil|schön|cool|krass|toll|süß)|"
+    r"what an?)\b",
+    re.IGNORECASE
+)
+_URL = re.compile(r"https?://\S+")
+_WORD = re.compile(r"\w+")
+_EXCLAMATION_END = re.compile(r"!\s*$")
+
+# Gewichte der Merkmale; positiv spricht für eine Frage
+DEFAULT_WEIGHTS: Dict[str, float] = {
+    "question_mark_end": 2.0,
+    "question_mark": 1.0,
+    "leading_interrogative": 1.5,
+    "interrogative": 0.5,
+    "leading_verb": 1.0,
+    "help_request": 1.5,
+    "small_talk": -1.5,
+    "exclamative": -1.5,
+    "short": -1.0,
+    "exclamation_end": -0.5,
+    "url_only": -2.0,
+}
+DEFAULT_THRESHOLD = 1.5
+
+
+@dataclass(frozen=True)
+class QuestionScore:
+    """
+    Ergebnis der Klassifikation mit den ausgelösten Merkmalen
+    """
+    score: float
+    is_question: bool
+    features: Tuple[str, ...]
+
+
+class QuestionClassifier:
+    """
+    Summiert die Gewichte der zutreffenden Merkmale und vergleicht mit dem Schwellwert
+    """
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, weights: Optional[Dict[str, float]] = None):
+        self.threshold = threshold
+        self.weights = dict(DEFAULT_WEIGHTS)
+        if weights:
+            self.weights.update(weights)
+
+    def features(self, text: str) -> Tuple[str, ...]:
+        """
+        Gibt die Namen aller zutreffenden Merkmale zurück
+        """
+        found = []
+        if _QUESTION_MARK_END.search(text):
+            found.append("question_mark_end")
+        elif _QUESTION_MARK.search(text):
+            found.append("question_mark")
+
+        if _LEADING_INTERROGATIVE.search(text):
+            found.append("leading_interrogative")
+        elif _INTERROGATIVE.search(text):
+            found.append("interrogative")
+
+        if _LEADING_VERB.search(text):
+            found.append("leading_verb")
+        if _HELP_REQUEST.search(text):
+            found.append("help_request")
+        if _SMALL_TALK.search(text) or _LAUGHTER.search(text):
+            found.append("small_talk")
+        if _EXCLAMATIVE.search(text):
+            found.append("exclamative")
+        if _EXCLAMATION_END.search(text):
+            found.append("exclamation_end")
+
+        without_urls = _URL.sub(" ", text)
+        word_count = len(_WORD.findall(without_urls))
+        if word_count == 0 and _URL.search(text):
+            found.append("url_only")
+        elif word_count < 3:
+            found.append("short")
+        return tuple(found)
+
+    def classify(self, text: str) -> QuestionScore:
+        """
+        Bewertet eine Nachricht und liefert Punktzahl, Entscheidung und Merkmale
+        """
+        features = self.features(text)
+        score = sum(self.weights.get(name, 0.0) for name in features)
+        return QuestionScore(score=score, is_question=score >= self.threshold, features=features)
+
+    def is_question(self, text: str) -> bool:
+        """
+        True, wenn die Nachricht eine Antwort des Bots verdient
+        """
+        return self.classify(text).is_question
@@ -0,0 +1,328 @@
+"""
+Retrieval-Engines für die Wissensdatenbank
+- BM25: invertierter Index, eine Anfrage berührt nur die Postings-Listen
+  ihrer eigenen Begriffe statt jeden Chunk
+- TF-IDF: dünn besetzte Matrix (NumPy/SciPy, optional), eine Anfrage ist ein
+  Matrix-Vektor-Produkt, mehrere Anfragen ein Matrix-Matrix-Produkt
+"""
+
+import heapq
+import logging
+import math
+from array import array
+from collections import Counter
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+from text_chunker import GERMAN_STOP_WORDS, WORD_PATTERN
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:  # NumPy/SciPy sind optional; ohne sie steht nur BM25 zur Verfügung
+    np = None
+    sparse = None
+
+logger = logging.getLogger(__name__)
+
+RETRIEVAL_ENGINES = ("bm25", "tfidf")
+
+
+class Analyzer:
+    """
+    Zerlegt Texte in Begriffe: lowercase, Wortgrenzen, ohne Stoppwörter
+    """
+
+    def __init__(self, stop_words: Optional[Iterable[str]] = None):
+        self.stop_words: FrozenSet[str] = frozenset(
+            GERMAN_STOP_WORDS if stop_words is None else stop_words
+        )
+
+    def analyze(self, text: str) -> List[str]:
+        """
+        Gibt alle Begriffe des Texts in Reihenfolge zurück (mit Wiederholungen)
+        """
+        stop_words = self.stop_words
+        return [term for term in WORD_PATTERN.findall(text.lower()) if term not in stop_words]
+
+
+class PostingsSegment:
+    """
+    Invertierter Teilindex über eine zusammenhängende Folge von Chunks (z.B. ein Dokument)
+    Chunk-IDs sind lokal (ab 0); Segmente werden beim Zusammenführen verschoben
+    """
+
+    __slots__ = ("postings", "doc_lengths")
+
+    def __init__(self, postings: Dict[str, Tuple[array, array]], doc_lengths: array):
+        self.postings = postings
+        self.doc_lengths = doc_lengths
+
+    @classmethod
+    def build(cls, texts: Iterable[str], analyzer: Analyzer) -> "PostingsSegment":
+        segment = cls({}, array('I'))
+        for text in texts:
+            segment.add(text, analyzer)
+        return segment
+
+    def add(self, text: str, analyzer: Analyzer):
+        """
+        Hängt einen Chunk an (lokale ID = bisherige Anzahl Chunks)
+        """
+        doc_id = len(self.doc_lengths)
+        term_counts = Counter(analyzer.analyze(text))
+        self.doc_lengths.append(sum(term_counts.values()))
+        postings = self.postings
+        for term, tf in term_counts.items():
+            entry = postings.get(term)
+            if entry is None:
+                entry = postings[term] = (array('I'), array('I'))
+            entry[0].append(doc_id)
+            entry[1].append(tf)
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+
+class BM25Engine:
+    """
+    BM25-Suche über einen invertierten Index
+    Postings: Begriff -> (Chunk-IDs, Termfrequenzen) als kompakte Arrays
+    """
+
+    def __init__(self, analyzer: Optional[Analyzer] = None, k1: float = 1.5, b: float = 0.75):
+        self.analyzer = analyzer or Analyzer()
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Tuple[array, array]] = {}
+        self._idf: Dict[str, float] = {}
+        self._doc_norms = array('d')
+        self.doc_count = 0
+        self.avg_doc_length = 0.0
+
+    def build(self, texts: Sequence[str]) -> "BM25Engine":
+        """
+        Baut den invertierten Index für die gegebenen Chunk-Texte auf
+        Die Position in der Sequenz ist die Chunk-ID
+        """
+        return self.build_from_segments([PostingsSegment.build(texts, self.analyzer)])
+
+    def build_from_segments(self, segments: Sequence[PostingsSegment]) -> "BM25Engine":
+        """
+        Führt vorberechnete Segmente zu einem Index zusammen, ohne Texte erneut zu analysieren
+        Die Chunk-IDs ergeben sich aus der Reihenfolge der Segmente
+        """
+        if len(segments) == 1:
+            postings = segments[0].postings
+            doc_lengths = segments[0].doc_lengths
+        else:
+            postings = {}
+            doc_lengths = array('I')
+            for segment in segments:
+                base = len(doc_lengths)
+                for term, (ids, tfs) in segment.postings.items():
+                    entry = postings.get(term)
+                    if entry is None:
+                        entry = postings[term] = (array('I'), array('I'))
+                    entry[0].extend(ids if base == 0 else array('I', [doc_id + base for doc_id in ids]))
+                    entry[1].extend(tfs)
+                doc_lengths.extend(segment.doc_lengths)
+
+        self.doc_count = len(doc_lengths)
+        self.avg_doc_length = (sum(doc_lengths) / self.doc_count) if self.doc_count else 0.0
+        self._postings = postings
+
+        # IDF und Längennormalisierung vorberechnen
+        self._idf = {
+            term: math.log(1.0 + (self.doc_count - len(ids) + 0.5) / (len(ids) + 0.5))
+            for term, (ids, _) in postings.items()
+        }
+        avg = self.avg_doc_length or 1.0
+        self._doc_norms = array('d', (
+            self.k1 * (1.0 - self.b + self.b * length / avg) for length in doc_lengths
+        ))
+        return self
+
+    @property
+    def term_count(self) -> int:
+        return len(self._postings)
+
+    def search(self, query: str, top_k: int = 10) -> List[Tuple[int, float]]:
+        """
+        Gibt die top_k besten (chunk_id, score) Paare zurück, höchster Score zuerst
+        """
+        if top_k <= 0 or not self.doc_count:
+            return []
+
+        query_terms = Counter(self.analyzer.analyze(query))
+        scores: Dict[int, float] = {}
+        k1_plus_one = self.k1 + 1.0
+        doc_norms = self._doc_norms
+
+        for term, query_tf in query_terms.items():
+            entry = self._postings.get(term)
+            if entry is None:
+                continue
+            weight = self._idf[term] * query_tf
+            for doc_id, tf in zip(*entry):
+                scores[doc_id] = scores.get(doc_id, 0.0) + (
+                    weight * tf * k1_plus_one / (tf + doc_norms[doc_id])
+                )
+
+        # Begrenzter Heap statt vollständiger Sortierung; bei Gleichstand gewinnt der frühere Chunk
+        return heapq.nlargest(top_k, scores.items(), key=lambda item: (item[1], -item[0]))
+
+    def search_many(self, queries: Sequence[str], top_k: int = 10) -> List[List[Tuple[int, float]]]:
+        """
+        Gleiche Schnittstelle wie TfidfEngine.search_many (hier einfach nacheinander)
+        """
+        return [self.search(query, top_k) for query in queries]
+
+
+class TfidfEngine:
+    """
+    TF-IDF-Kosinus-Suche über eine dünn besetzte Matrix (nur CPU)
+
+    Gewichte: (1 + log tf) * idf, jeder Chunk auf Länge 1 normiert. Die Matrix wird
+    als Begriff x Chunk (CSR) gespeichert: Das Produkt Anfrage x Matrix liest nur
+    die Zeilen der Anfragebegriffe und liefert die Scores dünn besetzt zurück.
+    """
+
+    def __init__(self, analyzer: Optional[Analyzer] = None):
+        if np is None or sparse is None:
+            raise RuntimeError("TfidfEngine benötigt numpy und scipy")
+        self.analyzer = analyzer or Analyzer()
+        self._vocabulary: Dict[str, int] = {}
+        self._idf = np.zeros(0, dtype=np.float32)
+        self._matrix = sparse.csr_matrix((0, 0), dtype=np.float32)
+        self.doc_count = 0
+
+    def build(self, texts: Sequence[str]) -> "TfidfEngine":
+        """
+        Baut die Matrix für die gegebenen Chunk-Texte auf (Position = Chunk-ID)
+        """
+        return self.build_from_segments([PostingsSegment.build(texts, self.analyzer)])
+
+    def build_from_segments(self, segments: Sequence[PostingsSegment]) -> "TfidfEngine":
+        """
+        Setzt die Matrix aus den Postings vorberechneter Segmente zusammen
+        """
+        # Postings pro Begriff sammeln; je Begriff bleiben die Chunk-IDs aufsteigend
+        vocabulary: Dict[str, int] = {}
+        term_ids: List[List[np.ndarray]] = []
+        term_tfs: List[List[np.ndarray]] = []
+        base = 0
+        for segment in segments:
+            for term, (ids, counts) in segment.postings.items():
+                term_id = vocabulary.get(term)
+                if term_id is None:
+                    term_id = vocabulary[term] = len(term_ids)
+                    term_ids.append([])
+                    term_tfs.append([])
+                ids = np.frombuffer(ids, dtype=np.uint32).astype(np.int32)
+                term_ids[term_id].append(ids + base if base else ids)
+                term_tfs[term_id].append(np.frombuffer(counts, dtype=np.uint32))
+            base += len(segment)
+
+        self.doc_count = base
+        self._vocabulary = vocabulary
+        if not term_ids:
+            self._idf = np.zeros(0, dtype=np.float32)
+            self._matrix = sparse.csr_matrix((0, base), dtype=np.float32)
+            return self
+
+        # CSR direkt aufbauen: Zeile = Begriff, Dokumentfrequenz = Länge der Zeile
+        document_frequency = np.fromiter((sum(len(ids) for ids in parts) for parts in term_ids),
+                                         dtype=np.int64, count=len(term_ids))
+        indptr = np.zeros(len(term_ids) + 1, dtype=np.int64)
+        np.cumsum(document_frequency, out=indptr[1:])
+        indices = np.concatenate([ids for parts in term_ids for ids in parts])
+        del term_ids
+        weights = np.log(np.concatenate([tfs for parts in term_tfs for tfs in parts]).astype(np.float32))
+        del term_tfs
+        weights += 1.0
+
+        self._idf = (np.log((1.0 + base) / (1.0 + document_frequency)) + 1.0).astype(np.float32)
+        weights *= np.repeat(self._idf, document_frequency)
+        norms = np.sqrt(np.bincount(indices, weights=weights * weights, minlength=base)).astype(np.float32)
+        weights /= norms[indices]
+
+        self._matrix = sparse.csr_matrix((weights, indices, indptr), shape=(len(vocabulary), base))
+        return self
+
+    @property
+    def term_count(self) -> int:
+        return len(self._vocabulary)
+
+    @property
+    def matrix_bytes(self) -> int:
+        matrix = self._matrix
+        return matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes
+
+    def search(self, query: str, top_k: int = 10) -> List[Tuple[int, float]]:
+        """
+        Gibt die top_k besten (chunk_id, score) Paare zurück, höchster Score zuerst
+        """
+        return self.search_many([query], top_k)[0]
+
+    def search_many(self, queries: Sequence[str], top_k: int = 10) -> List[List[Tuple[int, float]]]:
+        """
+        Bewertet mehrere Anfragen mit einem einzigen Matrix-Matrix-Produkt
+        """
+        if top_k <= 0 or not self.doc_count or not queries:
+            return [[] for _ in queries]
+
+        scores = (self._query_matrix(queries) @ self._matrix).tocsr()
+        results = []
+        for row in range(len(queries)):
+            start, end = scores.indptr[row], scores.indptr[row + 1]
+            results.append(_top_k(scores.indices[start:end], scores.data[start:end], top_k))
+        return results
+
+    def _query_matrix(self, queries: Sequence[str]):
+        """
+        Anfragen als normierte TF-IDF-Zeilen; unbekannte Begriffe fallen weg
+        """
+        vocabulary = self._vocabulary
+        rows, cols, weights = [], [], []
+        for row, query in enumerate(queries):
+            terms = [(vocabulary[term], tf) for term, tf in Counter(self.analyzer.analyze(query)).items()
+                     if term in vocabulary]
+            if not terms:
+                continue
+            term_ids = np.fromiter((term_id for term_id, _ in terms), dtype=np.int32, count=len(terms))
+            query_weights = (1.0 + np.log(np.fromiter((tf for _, tf in terms), dtype=np.float32,
+                                                      count=len(terms)))) * self._idf[term_ids]
+            rows.append(np.full(len(terms), row, dtype=np.int32))
+            cols.append(term_ids)
+            weights.append(query_weights / np.linalg.norm(query_weights))
+
+        shape = (len(queries), len(vocabulary))
+        if not rows:
+            return sparse.csr_matrix(shape, dtype=np.float32)
+        return sparse.csr_matrix((np.concatenate(weights), (np.concatenate(rows), np.concatenate(cols))),
+                                 shape=shape, dtype=np.float32)
+
+
+def _top_k(ids, scores, top_k: int) -> List[Tuple[int, float]]:
+    """
+    Beste top_k Treffer ohne vollständige Sortierung; bei Gleichstand gewinnt der frühere Chunk
+    """
+    if len(scores) > top_k:
+        threshold = np.partition(scores, len(scores) - top_k)[len(scores) - top_k]
+        keep = scores >= threshold
+        ids, scores = ids[keep], scores[keep]
+    order = np.lexsort((ids, -scores))[:top_k]
+    return list(zip(ids[order].tolist(), scores[order].tolist()))
+
+
+def create_engine(name: str = "bm25", analyzer: Optional[Analyzer] = None):
+    """
+    Erstellt die konfigurierte Engine; ohne NumPy/SciPy wird auf BM25 ausgewichen
+    """
+    if name == "tfidf":
+        if np is not None and sparse is not None:
+            return TfidfEngine(analyzer)
+        logger.warning("⚠️ RETRIEVAL_ENGINE 'tfidf' benötigt numpy und scipy - verwende bm25")
+    elif name != "bm25":
+        logger.warning(f"⚠️ Unbekannte Retrieval-Engine '{name}' - verwende bm25")
+    return BM25Engine(analyzer)
@@ -0,0 +1,256 @@
+"""
+Zulassungssteuerung für KI-Anfragen
+Sitzt zwischen den Discord-Handlern und der Modellschicht:
+- Token-Bucket pro User (Rate-Limit)
+- Prioritäten: explizite Anfragen (!frage, @-Erwähnung) vor automatisch erkannten Fragen
+- Gewichtete faire Warteschlange (WFQ) über Guilds
+- Begrenzte Warteschlangenlänge mit Lastabwurf
+"""
+
+import asyncio
+import heapq
+import logging
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import Dict, Hashable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(IntEnum):
+    """
+    Kleinere Werte werden zuerst bedient
+    """
+    EXPLICIT = 0
+    AUTO = 1
+
+
+class SchedulerRejected(Exception):
+    """
+    Anfrage wurde nicht angenommen
+    """
+
+
+class RateLimited(SchedulerRejected):
+    """
+    Der User hat sein Kontingent aufgebraucht
+    """
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Rate-Limit erreicht, erneut in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class QueueFull(SchedulerRejected):
+    """
+    Die Warteschlange ist voll (Lastabwurf)
+    """
+
+
+class TokenBucket:
+    """
+    Klassischer Token-Bucket: rate Tokens pro Sekunde, höchstens capacity gespeichert
+    """
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float, now: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+
+    def consume(self, now: float, amount: float = 1.0) -> float:
+        """
+        Entnimmt amount Tokens; gibt 0 zurück oder die Wartezeit bis genug Tokens vorhanden sind
+        """
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= amount:
+            self.tokens -= amount
+            return 0.0
+        return (amount - self.tokens) / self.rate if self.rate > 0 else float("inf")
+
+
+class _Waiter:
+    __slots__ = ("priority", "finish_tag", "sequence", "future", "guild_id", "enqueued_at")
+
+    def __init__(self, priority: int, finish_tag: float, sequence: int, future: asyncio.Future,
+                 guild_id: Hashable, enqueued_at: float):
+        self.priority = priority
+        self.finish_tag = finish_tag
+        self.sequence = sequence
+        self.future = future
+        self.guild_id = guild_id
+        self.enqueued_at = enqueued_at
+
+    def __lt__(self, other: "_Waiter") -> bool:
+        return (self.priority, self.finish_tag, self.sequence) < (other.priority, other.finish_tag, other.sequence)
+
+
+class RequestScheduler:
+    """
+    Vergibt eine begrenzte Anzahl gleichzeitiger Modell-Slots
+
+    Innerhalb einer Priorität bekommt jede Guild einen virtuellen Endzeitpunkt
+    (WFQ mit Kosten 1 pro Anfrage); eine Guild mit vielen Anfragen reiht sich
+    dadurch hinter Guilds mit wenigen Anfragen ein
+    """
+
+    def __init__(self, max_concurrent: int = 4, max_queue: int = 100,
+                 user_rate_per_minute: float = 6.0, user_burst: int = 3,
+                 guild_weights: Optional[Dict[Hashable, float]] = None, max_tracked_users: int = 10000):
+        self.max_concurrent = max(1, int(max_concurrent))
+        self.max_queue = max(0, int(max_queue))
+        self.user_rate = user_rate_per_minute / 60.0
+        self.user_burst = user_burst
+        self.guild_weights = guild_weights or {}
+        self.max_tracked_users = max_tracked_users
+
+        self._buckets: "OrderedDict[Hashable, TokenBucket]" = OrderedDict()
+        self._queue: List[_Waiter] = []
+        self._queued = 0
+        self._active = 0
+        self._sequence = 0
+        self._virtual_time = 0.0
+        self._guild_finish: Dict[Hashable, float] = {}
+        self._closed = False
+
+        self.admitted = 0
+        self.rate_limited = 0
+        self.shed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self._recent_waits: deque = deque(maxlen=1000)
+
+    def check_rate(self, user_id: Hashable):
+        """
+        Prüft das Kontingent des Users; wirft RateLimited, wenn es aufgebraucht ist
+        """
+        if self.user_rate <= 0:
+            return
+        now = time.monotonic()
+        bucket = self._buckets.get(user_id)
+        if bucket is None:
+            bucket = self._buckets[user_id] = TokenBucket(self.user_rate, self.user_burst, now)
+            if len(self._buckets) > self.max_tracked_users:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(user_id)
+
+        retry_after = bucket.consume(now)
+        if retry_after:
+            self.rate_limited += 1
+            raise RateLimited(retry_after)
+
+    @asynccontextmanager
+    async def slot(self, guild_id: Hashable, priority: Priority = Priority.AUTO):
+        """
+        Wartet auf einen freien Slot; wirft QueueFull, wenn die Warteschlange voll ist
+        """
+        await self._acquire(guild_id, priority)
+        try:
+            yield
+        finally:
+            self._release()
+
+    async def _acquire(self, guild_id: Hashable, priority: Priority):
+        if self._closed:
+            raise QueueFull("Scheduler beendet")
+        enqueued_at = time.monotonic()
+        if self._active < self.max_concurrent and not self._queued:
+            self._active += 1
+            self._record_wait(0.0)
+            return
+
+        if self._queued >= self.max_queue and not self._shed_lower_than(priority):
+            self.shed += 1
+            raise QueueFull("Warteschlange voll")
+
+        weight = self.guild_weights.get(guild_id, 1.0)
+        finish_tag = max(self._virtual_time, self._guild_finish.get(guild_id, 0.0)) + 1.0 / weight
+        self._guild_finish[guild_id] = finish_tag
+
+        future = asyncio.get_running_loop().create_future()
+        self._sequence += 1
+        heapq.heappush(self._queue, _Waiter(priority, finish_tag, self._sequence, future, guild_id, enqueued_at))
+        self._queued += 1
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.cancelled() or not future.done():
+                # Noch in der Warteschlange (der Abbruch des Tasks bricht auch future ab);
+                # der Eintrag wird beim nächsten _release übersprungen
+                future.cancel()
+                self._queued -= 1
+            elif future.exception() is None:
+                # Slot war schon zugeteilt, wird sofort weitergegeben
+                self._release()
+            # Sonst wurde die Anfrage verdrängt (QueueFull) und hatte nie einen Slot
+            raise
+        self._record_wait(time.monotonic() - enqueued_at)
+
+    def _shed_lower_than(self, priority: Priority) -> bool:
+        """
+        Verdrängt bei voller Warteschlange die späteste Anfrage niedrigerer Priorität
+        """
+        candidates = [waiter for waiter in self._queue if not waiter.future.done() and waiter.priority > priority]
+        if not candidates:
+            return False
+        victim = max(candidates)
+        victim.future.set_exception(QueueFull("Von einer wichtigeren Anfrage verdrängt"))
+        self._queued -= 1
+        self.shed += 1
+        return True
+
+    def _release(self):
+        self._active -= 1
+        while self._queue and self._active < self.max_concurrent:
+            waiter = heapq.heappop(self._queue)
+            if waiter.future.done():
+                # Abgebrochen oder verdrängt
+                continue
+            self._queued -= 1
+            self._active += 1
+            self._virtual_time = max(self._virtual_time, waiter.finish_tag)
+            waiter.future.set_result(None)
+        if not self._queued:
+            # Leere Warteschlange: Endzeitpunkte der Guilds werden nicht mehr gebraucht
+            self._queue.clear()
+            self._guild_finish.clear()
+
+    def shutdown(self):
+        """
+        Nimmt keine Anfragen mehr an und weist alle wartenden ab
+        Bereits vergebene Slots laufen normal zu Ende
+        """
+        self._closed = True
+        for waiter in self._queue:
+            if not waiter.future.done():
+                waiter.future.set_exception(QueueFull("Scheduler beendet"))
+        self._queue.clear()
+        self._queued = 0
+        self._guild_finish.clear()
+
+    def _record_wait(self, seconds: float):
+        self.admitted += 1
+        self.total_wait += seconds
+        self.max_wait = max(self.max_wait, seconds)
+        self._recent_waits.append(seconds)
+
+    def get_stats(self) -> Dict[str, float]:
+        """
+        Gibt Warteschlangenlänge, Zulassungs-/Abwurfzähler und Wartezeiten zurück
+        """
+        waits = sorted(self._recent_waits)
+        return {
+            "queue_depth": self._queued,
+            "active": self._active,
+            "admitted": self.admitted,
+            "rate_limited": self.rate_limited,
+            "shed": self.shed,
+            "avg_wait": (self.total_wait / self.admitted) if self.admitted else 0.0,
+            "p95_wait": waits[int(len(waits) * 0.95)] if waits else 0.0,
+            "max_wait": self.max_wait,
+        }
@@ -0,0 +1,94 @@
+"""
+Zusammenführen gleichzeitiger identischer Anfragen (Single-Flight)
+Läuft für einen Schlüssel bereits ein Aufruf, warten weitere Anfragen auf dessen
+Ergebnis, statt einen eigenen Gemini-Aufruf zu starten
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Tuple, Type
+
+logger = logging.getLogger(__name__)
+
+
+class LeaderCancelled(Exception):
+    """
+    Der ausführende Aufruf wurde abgebrochen oder nur für ihn abgelehnt; Wartende versuchen es selbst erneut
+    """
+
+
+class SingleFlight:
+    """
+    Führt pro Schlüssel höchstens einen Aufruf gleichzeitig aus
+
+    do() gibt (ergebnis, geteilt) zurück: geteilt ist True, wenn das Ergebnis
+    von einem bereits laufenden Aufruf übernommen wurde. Wird der ausführende
+    Aufruf abgebrochen, übernimmt der erste Wartende und startet func selbst;
+    ebenso bei Fehlern aus leader_errors, die nur den ausführenden Aufrufer
+    betreffen (z.B. das Rate-Limit seines Users)
+    """
+
+    def __init__(self, leader_errors: Tuple[Type[BaseException], ...] = ()):
+        self.leader_errors = leader_errors
+        self._calls: Dict[str, asyncio.Future] = {}
+
+        self.calls = 0
+        self.coalesced = 0
+        self.failed = 0
+        self.retried = 0
+
+    async def do(self, key: str, func: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Führt func aus oder wartet auf den bereits laufenden Aufruf mit demselben Schlüssel
+        """
+        while True:
+            future = self._calls.get(key)
+            if future is None:
+                break
+            try:
+                # shield: ein abgebrochener Wartender bricht nicht den gemeinsamen Aufruf ab
+                result = await asyncio.shield(future)
+            except LeaderCancelled:
+                self.retried += 1
+                continue
+            self.coalesced += 1
+            return result, True
+
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        self.calls += 1
+        try:
+            result = await func()
+        except asyncio.CancelledError:
+            # Nicht future.cancel(): das würde CancelledError in allen Wartenden auslösen,
+            # die dann ohne Antwort blieben; LeaderCancelled lässt sie neu starten
+            future.set_exception(LeaderCancelled())
+            future.exception()
+            raise
+        except self.leader_errors:
+            future.set_exception(LeaderCancelled())
+            future.exception()
+            raise
+        except Exception as e:
+            self.failed += 1
+            future.set_exception(e)
+            # Als abgerufen markieren, falls niemand wartet
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            del self._calls[key]
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Gibt ausgeführte, eingesparte, fehlgeschlagene, neu gestartete und laufende Aufrufe zurück
+        """
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "failed": self.failed,
+            "retried": self.retried,
+            "in_flight": len(self._calls),
+        }
@@ -0,0 +1,49 @@
+"""
+Lokaler Status-Server für Metriken
+Stellt /metrics (Prometheus-Textformat) und /healthz über aiohttp bereit;
+bindet standardmäßig nur an localhost
+"""
+
+import logging
+from typing import Optional
+
+from aiohttp import web
+
+from metrics import MetricsRegistry
+
+logger = logging.getLogger(__name__)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class StatusServer:
+    """
+    Kleiner HTTP-Server im Event-Loop des Bots; start() und stop() folgen dem Bot-Lebenszyklus
+    """
+
+    def __init__(self, registry: MetricsRegistry, host: str = "127.0.0.1", port: int = 9108):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._runner: Optional[web.AppRunner] = None
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/metrics", self._metrics)
+        app.router.add_get("/healthz", self._health)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        logger.info(f"📈 Metriken unter http://{self.host}:{self.port}/metrics")
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _metrics(self, request: web.Request) -> web.Response:
+        return web.Response(body=self.registry.render().encode("utf-8"),
+                            headers={"Content-Type": PROMETHEUS_CONTENT_TYPE})
+
+    async def _health(self, request: web.Request) -> web.Response:
+        return web.Response(text="ok")
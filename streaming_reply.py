@@ -0,0 +1,121 @@
+"""
+Gestreamte Discord-Antworten
+Zeigt die ersten Tokens sofort an und aktualisiert die Nachricht danach
+gebündelt per message.edit; bei 2000 Zeichen geht es in einer neuen Nachricht weiter
+"""
+
+import logging
+import time
+from typing import Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Discord-Limit pro Nachricht
+DISCORD_MESSAGE_LIMIT = 2000
+
+
+class StreamingReply:
+    """
+    Baut eine Antwort schrittweise aus Textstücken auf
+
+    send_first: sendet die erste Nachricht (z.B. message.reply oder ctx.send)
+    send_followup: sendet Folgenachrichten (z.B. channel.send)
+    Beide geben die gesendete discord.Message zurück
+    """
+
+    def __init__(self,
+                 send_first: Callable[[str], Awaitable],
+                 send_followup: Callable[[str], Awaitable],
+                 edit_interval: float = 1.0,
+                 max_length: int = DISCORD_MESSAGE_LIMIT):
+        self.send_first = send_first
+        self.send_followup = send_followup
+        # Mindestabstand zwischen zwei Edits derselben Nachricht (Discord-Ratelimit ~5 Edits/5s)
+        self.edit_interval = edit_interval
+        self.max_length = max_length
+
+        self.messages = []
+        self._parts = []  # abgeschlossene Nachrichten-Texte
+        self._current = ""  # Text der aktuellen Nachricht (inkl. nicht angezeigter Teile)
+        self._shown = ""  # aktuell in Discord angezeigter Text
+        self._last_edit = 0.0
+        self._started = time.perf_counter()
+        self.time_to_first_message: Optional[float] = None
+        self.edit_count = 0
+
+    @property
+    def text(self) -> str:
+        """
+        Bisher empfangener Gesamttext
+        """
+        return "".join(self._parts) + self._current
+
+    async def feed(self, piece: str):
+        """
+        Fügt ein Textstück hinzu und aktualisiert Discord, sobald es sinnvoll ist
+        """
+        if not piece:
+            return
+        self._current += piece
+
+        # Nachrichten, die das Limit überschreiten, abschließen und neu beginnen
+        while len(self._current) > self.max_length:
+            split_at = self._find_split(self._current)
+            head, self._current = self._current[:split_at], self._current[split_at:]
+            await self._publish(head, force=True)
+            self._parts.append(head)
+            self.messages.append(None)  # Platzhalter: nächste Nachricht wird neu gesendet
+            self._shown = ""
+
+        await self._publish(self._current, force=False)
+
+    async def finish(self) -> str:
+        """
+        Zeigt den restlichen Text an und gibt die vollständige Antwort zurück
+        """
+        await self._publish(self._current, force=True)
+        self.messages = [message for message in self.messages if message is not None]
+        return self.text
+
+    async def _publish(self, text: str, force: bool):
+        """
+        Sendet oder editiert die aktuelle Nachricht
+        Edits werden gebündelt, damit pro Nachricht höchstens alle edit_interval Sekunden editiert wird
+        """
+        display = text.strip()
+        if not display or display == self._shown:
+            return
+
+        current_message = self.messages[-1] if self.messages else None
+        now = time.perf_counter()
+
+        if current_message is None:
+            send = self.send_first if not self._parts else self.send_followup
+            message = await send(display)
+            if self.messages:
+                self.messages[-1] = message
+            else:
+                self.messages.append(message)
+            if self.time_to_first_message is None:
+                self.time_to_first_message = now - self._started
+                logger.info(f"⚡ Erste Antwort nach {self.time_to_first_message:.2f}s sichtbar")
+        elif force or now - self._last_edit >= self.edit_interval:
+            await current_message.edit(content=display)
+            self.edit_count += 1
+        else:
+            return
+
+        self._shown = display
+        self._last_edit = now
+
+    def _find_split(self, text: str) -> int:
+        """
+        Sucht eine gute Trennstelle vor dem Limit (Absatz, Satzende, Leerzeichen)
+        """
+        window = text[:self.max_length]
+        minimum = self.max_length // 2
+        for separator in ("\n\n", "\n", ". ", " "):
+            position = window.rfind(separator)
+            if position >= minimum:
+                return position + len(separator)
+        return self.max_length
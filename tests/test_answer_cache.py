@@ -0,0 +1,124 @@
+import hashlib
+
+import pytest
+
+import answer_cache
+from answer_cache import ResponseCache, answer_cache_key, image_digest, normalize_question, vision_cache_key
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(answer_cache.time, "time", lambda: now[0])
+    return now
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = ResponseCache(max_entries=2)
+    cache.put("a", "Antwort A")
+    cache.put("b", "Antwort B")
+    assert cache.get("a") == "Antwort A"
+    cache.put("c", "Antwort C")
+    assert cache.get("b") is None
+    assert cache.get("a") == "Antwort A"
+    assert cache.get("c") == "Antwort C"
+    assert cache.get_stats()["evictions"] == 1
+
+
+def test_total_characters_are_bounded(clock):
+    cache = ResponseCache(max_entries=10, max_chars=10)
+    cache.put("a", "12345")
+    cache.put("b", "12345")
+    cache.put("c", "123")
+    assert len(cache) == 2
+    assert cache.get("a") is None
+    assert cache.get_stats()["chars"] == 8
+
+
+def test_value_longer_than_max_chars_is_rejected(clock):
+    cache = ResponseCache(max_chars=10)
+    cache.put("a", "kurz")
+    cache.put("b", "x" * 11)
+    cache.put("c", "")
+    assert cache.get("b") is None
+    assert cache.get("c") is None
+    assert cache.get("a") == "kurz"
+    assert cache.get_stats()["evictions"] == 0
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = ResponseCache(ttl_seconds=60)
+    cache.put("a", "Antwort")
+    clock[0] += 59
+    assert cache.get("a") == "Antwort"
+    clock[0] += 1
+    assert cache.get("a") is None
+    assert len(cache) == 0
+    assert cache.get_stats()["chars"] == 0
+
+
+def test_put_replaces_existing_value(clock):
+    cache = ResponseCache()
+    cache.put("a", "alt")
+    cache.put("a", "neuer Wert")
+    assert cache.get("a") == "neuer Wert"
+    assert cache.get_stats()["chars"] == len("neuer Wert")
+
+
+def test_clear_removes_everything(clock):
+    cache = ResponseCache()
+    cache.put("a", "Antwort A")
+    cache.put("b", "Antwort B")
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.get("a") is None
+    assert cache.get_stats()["chars"] == 0
+
+
+def test_save_and_load_round_trip(tmp_path, clock):
+    path = tmp_path / "cache" / "answers.json"
+    cache = ResponseCache(ttl_seconds=60, persist_path=str(path))
+    cache.put("alt", "läuft gleich ab")
+    clock[0] += 30
+    cache.put("neu", "Antwort mit Ümlauten")
+    cache.save()
+    assert not path.with_suffix(".json.tmp").exists()
+
+    clock[0] += 40
+    restored = ResponseCache(ttl_seconds=60, persist_path=str(path))
+    restored.load()
+    assert len(restored) == 1
+    assert restored.get("neu") == "Antwort mit Ümlauten"
+    assert restored.get_stats()["chars"] == len("Antwort mit Ümlauten")
+
+
+def test_unreadable_cache_file_is_ignored(tmp_path, clock):
+    path = tmp_path / "answers.json"
+    path.write_text("{kein json", encoding="utf-8")
+    cache = ResponseCache(persist_path=str(path))
+    cache.load()
+    assert len(cache) == 0
+
+
+def test_answer_cache_key_normalizes_the_question():
+    key = answer_cache_key("Wie lange dauert der Versand?", [3, 7], "v1")
+    assert key == answer_cache_key("  wie LANGE dauert der versand  ", [3, 7], "v1")
+    assert key != answer_cache_key("Wie lange dauert der Versand?", [3, 8], "v1")
+    assert key != answer_cache_key("Wie lange dauert der Versand?", [3, 7], "v2")
+    assert normalize_question("Was kostet's?!") == "was kostet s"
+
+
+def test_image_digest_depends_only_on_content():
+    data = b"\x89PNG\r\n\x1a\n" + bytes(range(256))
+    assert image_digest(data) == image_digest(bytes(bytearray(data)))
+    assert image_digest(data) == hashlib.sha256(data).hexdigest()
+    assert image_digest(data) != image_digest(data + b"\x00")
+
+
+def test_vision_cache_key():
+    digest = image_digest(b"bild")
+    key = vision_cache_key(digest, "Was ist auf dem Bild?", "v1")
+    assert key == vision_cache_key(digest, "was ist auf dem bild", "v1")
+    assert key != vision_cache_key(image_digest(b"anderes bild"), "Was ist auf dem Bild?", "v1")
+    assert key != vision_cache_key(digest, "Welche Farbe hat es?", "v1")
+    assert key != vision_cache_key(digest, "Was ist auf dem Bild?", "v2")
@@ -0,0 +1,108 @@
+import asyncio
+import sqlite3
+import time
+
+from context_db import ContextDatabase
+from context_store import ContextRecord, ContextStore
+
+
+def record(channel_id, user_id, content, timestamp=None):
+    return ContextRecord(channel_id, user_id, content, time.time() if timestamp is None else timestamp)
+
+
+def stored_contents(path):
+    connection = sqlite3.connect(str(path))
+    try:
+        return [row[0] for row in connection.execute("SELECT content FROM context_messages ORDER BY id")]
+    finally:
+        connection.close()
+
+
+def test_flush_writes_pending_messages(tmp_path):
+    path = tmp_path / "context.sqlite3"
+    database = ContextDatabase(db_path=str(path))
+
+    async def scenario():
+        database.enqueue(record(1, 10, "erste"))
+        database.enqueue(record(1, 11, "zweite"))
+        assert database.get_stats()["pending"] == 2
+        await database.flush()
+        await database.close()
+
+    asyncio.run(scenario())
+    assert stored_contents(path) == ["erste", "zweite"]
+    assert database.get_stats() == {"pending": 0, "written": 2, "flushes": 1, "failed_flushes": 0, "dropped": 0}
+
+
+def test_warm_load_restores_recent_messages(tmp_path):
+    path = str(tmp_path / "context.sqlite3")
+    now = time.time()
+
+    async def scenario():
+        database = ContextDatabase(db_path=path, expire_seconds=60)
+        database.enqueue(record(1, 10, "abgelaufen", now - 120))
+        for number in range(3):
+            database.enqueue(record(1, 10, f"nachricht {number}", now - 10 + number))
+        await database.close()
+
+        restored = ContextDatabase(db_path=path, expire_seconds=60)
+        store = ContextStore(expire_seconds=60)
+        assert await restored.warm_load(store, limit=2) == 2
+        await restored.close()
+        return store
+
+    store = asyncio.run(scenario())
+    assert [entry.content for entry in store.recent_channel_messages(1)] == ["nachricht 1", "nachricht 2"]
+
+
+def test_failed_flush_keeps_the_batch_for_the_next_one(tmp_path, monkeypatch):
+    path = tmp_path / "context.sqlite3"
+    database = ContextDatabase(db_path=str(path))
+    write_sync = database._write_sync
+    failures = [sqlite3.OperationalError("database is locked")]
+
+    def flaky_write(batch):
+        if failures:
+            raise failures.pop()
+        write_sync(batch)
+
+    monkeypatch.setattr(database, "_write_sync", flaky_write)
+
+    async def scenario():
+        database.enqueue(record(1, 10, "erste"))
+        database.enqueue(record(1, 10, "zweite"))
+        await database.flush()
+        assert database.get_stats()["pending"] == 2
+        database.enqueue(record(1, 10, "dritte"))
+        await database.flush()
+        await database.close()
+
+    asyncio.run(scenario())
+    assert stored_contents(path) == ["erste", "zweite", "dritte"]
+    stats = database.get_stats()
+    assert stats["failed_flushes"] == 1
+    assert stats["written"] == 3
+    assert stats["pending"] == 0
+
+
+def test_retried_messages_are_capped(tmp_path, monkeypatch):
+    database = ContextDatabase(db_path=str(tmp_path / "context.sqlite3"), max_pending=3, expire_seconds=60)
+
+    def locked(batch):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(database, "_write_sync", locked)
+
+    async def scenario():
+        database.enqueue(record(1, 10, "abgelaufen", time.time() - 120))
+        for number in range(4):
+            database.enqueue(record(1, 10, f"nachricht {number}"))
+        await database.flush()
+        database.enqueue(record(1, 10, "neu"))
+        await database.flush()
+
+    asyncio.run(scenario())
+    assert [row[2] for row in database._pending] == ["nachricht 2", "nachricht 3", "neu"]
+    stats = database.get_stats()
+    assert stats["failed_flushes"] == 2
+    assert stats["dropped"] == 2
@@ -0,0 +1,81 @@
+import pytest
+
+import context_store
+from context_store import ContextStore
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [10_000.0]
+    monkeypatch.setattr(context_store.time, "time", lambda: now[0])
+    return now
+
+
+def contents(records):
+    return [record.content for record in records]
+
+
+def test_messages_are_kept_per_channel_and_user(clock):
+    store = ContextStore(channel_maxlen=3, user_maxlen=2)
+    for number in range(4):
+        store.add("kanal", "anna", f"nachricht {number}")
+    store.add("kanal", "ben", "hallo")
+    assert contents(store.recent_channel_messages("kanal", limit=0)) == ["nachricht 2", "nachricht 3", "hallo"]
+    assert contents(store.recent_user_messages("anna")) == ["nachricht 2", "nachricht 3"]
+    assert contents(store.recent_user_messages("anna", exclude="nachricht 3")) == ["nachricht 2"]
+    assert store.get_stats()["messages"] == 3 + 2 + 1
+
+
+def test_least_recently_active_channel_is_evicted(clock):
+    store = ContextStore(max_channels=2)
+    store.add("a", 1, "eins")
+    store.add("b", 1, "zwei")
+    store.add("a", 1, "drei")
+    store.add("c", 1, "vier")
+    assert store.recent_channel_messages("b") == []
+    assert contents(store.recent_channel_messages("a")) == ["eins", "drei"]
+    assert store.get_stats()["evicted_entries"] == 1
+
+
+def test_least_recently_active_user_is_evicted(clock):
+    store = ContextStore(max_users=1)
+    store.add("kanal", "anna", "eins")
+    store.add("kanal", "ben", "zwei")
+    assert store.recent_user_messages("anna") == []
+    assert contents(store.recent_user_messages("ben")) == ["zwei"]
+
+
+def test_total_messages_are_bounded(clock):
+    store = ContextStore(max_messages=4)
+    for number in range(3):
+        clock[0] += 1
+        store.add(f"kanal {number}", f"user {number}", f"nachricht {number}")
+    stats = store.get_stats()
+    assert stats["messages"] <= 4
+    assert contents(store.recent_channel_messages("kanal 2")) == ["nachricht 2"]
+    assert store.recent_channel_messages("kanal 0") == []
+
+
+def test_each_message_expires_on_its_own(clock):
+    store = ContextStore(expire_seconds=60)
+    store.add("kanal", "anna", "alt")
+    clock[0] += 30
+    store.add("kanal", "anna", "neu")
+    clock[0] += 31
+    assert contents(store.recent_channel_messages("kanal")) == ["neu"]
+    assert contents(store.recent_user_messages("anna")) == ["neu"]
+    assert store.get_stats()["expired_messages"] == 2
+    assert store.get_stats()["messages"] == 2
+
+
+def test_prune_removes_inactive_entries_only(clock):
+    store = ContextStore(expire_seconds=60)
+    store.add("still", "anna", "alt")
+    clock[0] += 50
+    store.add("aktiv", "ben", "neu")
+    clock[0] += 20
+    assert store.prune() == 2
+    assert store.recent_channel_messages("still") == []
+    assert contents(store.recent_channel_messages("aktiv")) == ["neu"]
+    assert store.get_stats() == {"channels": 1, "users": 1, "messages": 2,
+                                 "evicted_entries": 0, "expired_messages": 2}
@@ -0,0 +1,50 @@
+import logging
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from embeddings import EmbeddingStore, HashingEmbedder, create_embedding_store  # noqa: E402
+
+
+def make_store(tmp_path, **options):
+    return EmbeddingStore(cache_dir=str(tmp_path), embedder=HashingEmbedder(), **options)
+
+
+def test_unknown_dtype_falls_back_to_int8(tmp_path, caplog):
+    with caplog.at_level(logging.WARNING):
+        store = create_embedding_store("hybrid", cache_dir=str(tmp_path), dtype="float64")
+    assert store.dtype == "int8"
+    assert "EMBEDDING_DTYPE" in caplog.text
+
+
+def test_keyword_mode_has_no_store(tmp_path):
+    assert create_embedding_store("keyword", cache_dir=str(tmp_path), dtype="float64") is None
+
+
+@pytest.mark.parametrize("dtype", ["int8", "float16"])
+def test_search_finds_word_forms(tmp_path, dtype):
+    store = make_store(tmp_path, dtype=dtype, ivf_min_chunks=0, min_score=0.0)
+    index = store.build_index([
+        ["Die Lieferzeit beträgt drei Werktage.", "Rücksendungen sind kostenlos."],
+        ["Zahlung per Rechnung ist möglich."],
+    ])
+    results = index.search("Lieferzeiten", top_k=2)
+    assert results[0][0] == 0
+    assert index.nlist == 0
+
+
+def test_ivf_is_skipped_when_all_vectors_are_zero(tmp_path):
+    store = make_store(tmp_path, ivf_min_chunks=1)
+    index = store.build_index([["...", "!!!", "---"]])
+    assert len(index) == 3
+    assert index.nlist == 0
+    assert index.search("Lieferzeit") == []
+
+
+def test_ivf_search_on_small_index(tmp_path):
+    texts = [f"Artikel {number} Lieferzeit Versand Nummer{number}" for number in range(50)] + ["", "..."]
+    store = make_store(tmp_path, ivf_min_chunks=1, nprobe=64)
+    index = store.build_index([texts])
+    assert index.nlist > 0
+    assert index.search("Nummer7 Lieferzeit", top_k=1)[0][0] == 7
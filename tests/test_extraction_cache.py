@@ -0,0 +1,63 @@
+import os
+
+from extraction_cache import ExtractionCache, read_page_batches
+
+
+def store(cache, file_path, pages):
+    writer = cache.open_writer(file_path)
+    writer.write(pages)
+    writer.commit()
+
+
+def blobs(cache):
+    return sorted(path.name for path in cache.cache_dir.glob("*.pages.gz"))
+
+
+def test_roundtrip_and_hit(tmp_path):
+    source = tmp_path / "a.txt"
+    source.write_text("Hallo Welt", encoding="utf-8")
+    cache = ExtractionCache(str(tmp_path / "cache"))
+    assert cache.lookup(source) is None
+    store(cache, source, [(1, "Hallo Welt")])
+    cache.save_manifest()
+
+    reopened = ExtractionCache(str(tmp_path / "cache"))
+    blob_path = reopened.lookup(source)
+    assert list(read_page_batches(blob_path)) == [[(1, "Hallo Welt")]]
+    assert reopened.get_stats()["hashed_files"] == 0
+
+
+def test_read_page_batches_limits_characters(tmp_path):
+    source = tmp_path / "a.pdf"
+    source.write_bytes(b"%PDF")
+    cache = ExtractionCache(str(tmp_path / "cache"))
+    store(cache, source, [(1, "x" * 40), (2, "x" * 40), (3, "x" * 250), (4, "x" * 10)])
+    batches = list(read_page_batches(cache.lookup(source), max_chars=100))
+    assert [[page for page, _ in batch] for batch in batches] == [[1, 2, 3], [4]]
+
+
+def test_save_manifest_prunes_superseded_and_deleted_entries(tmp_path):
+    changed = tmp_path / "changed.txt"
+    deleted = tmp_path / "deleted.txt"
+    kept = tmp_path / "kept.txt"
+    for path in (changed, deleted, kept):
+        path.write_text(f"Inhalt von {path.name}", encoding="utf-8")
+    cache = ExtractionCache(str(tmp_path / "cache"))
+    for path in (changed, deleted, kept):
+        cache.lookup(path)
+        store(cache, path, [(1, path.read_text(encoding="utf-8"))])
+    cache.save_manifest()
+    assert len(blobs(cache)) == 3
+    old_blob = cache.lookup(changed).name
+
+    changed.write_text("Neuer, längerer Inhalt", encoding="utf-8")
+    os.utime(changed, ns=(1_000_000_000, 1_000_000_000))
+    deleted.unlink()
+    assert cache.lookup(changed) is None
+    store(cache, changed, [(1, "Neuer, längerer Inhalt")])
+    cache.save_manifest()
+
+    assert old_blob not in blobs(cache)
+    assert blobs(cache) == sorted([cache.lookup(changed).name, cache.lookup(kept).name])
+    assert cache.get_stats()["pruned_blobs"] == 2
+    assert str(deleted.resolve()) not in ExtractionCache(str(tmp_path / "cache"))._manifest
@@ -0,0 +1,109 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("aiohttp")
+
+from aiohttp import web  # noqa: E402
+from aiohttp.test_utils import TestServer  # noqa: E402
+
+from http_client import AttachmentDownloader, AttachmentTooLarge, DownloadError  # noqa: E402
+
+BLOCK = b"x" * 1024
+SENT = web.AppKey("sent", list)
+
+
+async def declared(request):
+    return web.Response(body=b"y" * 3000)
+
+
+async def streamed(request):
+    # Ohne Content-Length: die Größe zeigt sich erst beim Lesen
+    response = web.StreamResponse()
+    response.enable_chunked_encoding()
+    await response.prepare(request)
+    try:
+        for _ in range(int(request.query.get("blocks", "1000"))):
+            await response.write(BLOCK)
+            request.app[SENT].append(len(BLOCK))
+    except (ConnectionResetError, asyncio.CancelledError):
+        pass
+    return response
+
+
+async def missing(request):
+    return web.Response(status=404)
+
+
+def with_server(scenario, **options):
+    async def run():
+        app = web.Application()
+        app[SENT] = []
+        app.router.add_get("/declared", declared)
+        app.router.add_get("/streamed", streamed)
+        app.router.add_get("/missing", missing)
+        server = TestServer(app)
+        await server.start_server()
+        downloader = AttachmentDownloader(**options)
+        await downloader.start()
+        try:
+            return await scenario(downloader, server, app)
+        finally:
+            await downloader.close()
+            await server.close()
+
+    return asyncio.run(run())
+
+
+def test_check_size():
+    downloader = AttachmentDownloader(max_bytes=100)
+    downloader.check_size(None)
+    downloader.check_size(100)
+    with pytest.raises(AttachmentTooLarge):
+        downloader.check_size(101)
+    assert downloader.get_stats()["rejected"] == 1
+
+
+def test_download_within_limit():
+    async def scenario(downloader, server, app):
+        data = await downloader.download(str(server.make_url("/streamed?blocks=4")))
+        assert data == BLOCK * 4
+        assert downloader.get_stats()["bytes_downloaded"] == 4096
+
+    with_server(scenario, max_bytes=4096, read_size=512)
+
+
+def test_declared_size_is_rejected_before_download():
+    async def scenario(downloader, server, app):
+        with pytest.raises(AttachmentTooLarge):
+            await downloader.download(str(server.make_url("/declared")), declared_size=5000)
+        # Content-Length der Antwort über dem Limit
+        with pytest.raises(AttachmentTooLarge):
+            await downloader.download(str(server.make_url("/declared")))
+        assert downloader.get_stats()["rejected"] == 2
+        assert downloader.get_stats()["downloads"] == 0
+
+    with_server(scenario, max_bytes=2000)
+
+
+def test_streamed_download_is_aborted_at_the_limit():
+    async def scenario(downloader, server, app):
+        with pytest.raises(AttachmentTooLarge):
+            await downloader.download(str(server.make_url("/streamed?blocks=100000")))
+        await asyncio.sleep(0.1)
+        # Der Server konnte höchstens Puffer füllen, nicht die 100 MB senden
+        assert sum(app[SENT]) < 100000 * len(BLOCK) // 10
+        assert downloader.get_stats()["rejected"] == 1
+        assert downloader.get_stats()["bytes_downloaded"] == 0
+
+    with_server(scenario, max_bytes=8 * 1024, read_size=1024)
+
+
+def test_http_errors_raise_download_error():
+    async def scenario(downloader, server, app):
+        with pytest.raises(DownloadError) as error:
+            await downloader.download(str(server.make_url("/missing")))
+        assert not isinstance(error.value, AttachmentTooLarge)
+        assert downloader.get_stats()["failed"] == 1
+
+    with_server(scenario)
@@ -0,0 +1,105 @@
+import asyncio
+import io
+
+import pytest
+
+from image_pipeline import ImagePipeline, detect_image_format
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+requires_pillow = pytest.mark.skipif(Image is None, reason="Pillow nicht installiert")
+
+
+@pytest.mark.parametrize("data, mime_type", [
+    (b"\xff\xd8\xff\xe0\x00\x10JFIF", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR", "image/png"),
+    (b"RIFF\x24\x00\x00\x00WEBPVP8 ", "image/webp"),
+    (b"GIF89a\x01\x00", "image/gif"),
+    (b"\x00\x00\x00\x18ftypheic", "image/heic"),
+    (b"\x00\x00\x00\x18ftypmif1", "image/heif"),
+])
+def test_detects_format_from_magic_bytes(data, mime_type):
+    assert detect_image_format(data) == mime_type
+
+
+@pytest.mark.parametrize("data", [b"", b"%PDF-1.7", b"RIFF\x00\x00\x00\x00WAVE", b"<html>"])
+def test_unknown_bytes_are_not_an_image(data):
+    assert detect_image_format(data) is None
+
+
+def encode(size, format, mode="RGB"):
+    image = Image.new(mode, size, (200, 30, 30, 128) if mode == "RGBA" else (200, 30, 30))
+    output = io.BytesIO()
+    image.save(output, format=format)
+    return output.getvalue()
+
+
+@pytest.fixture
+def pipeline():
+    pipeline = ImagePipeline(max_edge=256, quality=80, workers=1)
+    yield pipeline
+    pipeline.shutdown()
+
+
+@requires_pillow
+@pytest.mark.parametrize("format, mime_type", [("JPEG", "image/jpeg"), ("PNG", "image/png"), ("WEBP", "image/webp")])
+def test_encoded_images_are_detected(format, mime_type):
+    assert detect_image_format(encode((8, 8), format)) == mime_type
+
+
+@requires_pillow
+def test_large_image_is_downscaled_to_jpeg(pipeline):
+    data = encode((1024, 512), "PNG")
+    prepared = pipeline.prepare_sync(data)
+    assert prepared.mime_type == "image/jpeg"
+    assert detect_image_format(prepared.data) == "image/jpeg"
+    assert (prepared.width, prepared.height) == (256, 128)
+    assert Image.open(io.BytesIO(prepared.data)).size == (256, 128)
+    assert prepared.original_bytes == len(data)
+    assert len(prepared.data) < len(data)
+
+
+@requires_pillow
+def test_transparent_image_is_reencoded_as_webp(pipeline):
+    prepared = pipeline.prepare_sync(encode((600, 300), "PNG", mode="RGBA"))
+    assert prepared.mime_type == "image/webp"
+    assert detect_image_format(prepared.data) == "image/webp"
+    assert max(prepared.width, prepared.height) == 256
+
+
+@requires_pillow
+def test_small_supported_image_is_kept(pipeline):
+    data = encode((100, 50), "PNG")
+    prepared = pipeline.prepare_sync(data)
+    assert prepared.data == data
+    assert prepared.mime_type == "image/png"
+    assert (prepared.width, prepared.height) == (100, 50)
+    assert prepared.bytes_saved == 0
+
+
+@requires_pillow
+def test_small_unsupported_image_is_converted(pipeline):
+    prepared = pipeline.prepare_sync(encode((100, 50), "BMP"))
+    assert prepared.mime_type == "image/jpeg"
+    assert detect_image_format(prepared.data) == "image/jpeg"
+
+
+@requires_pillow
+def test_unreadable_bytes_are_passed_through(pipeline):
+    data = b"kein Bild"
+    prepared = pipeline.prepare_sync(data)
+    assert prepared.data == data
+    assert (prepared.width, prepared.height) == (0, 0)
+
+
+@requires_pillow
+def test_prepare_counts_bytes(pipeline):
+    data = encode((1024, 1024), "PNG")
+    prepared = asyncio.run(pipeline.prepare(data))
+    stats = pipeline.get_stats()
+    assert stats["images"] == 1
+    assert stats["bytes_in"] == len(data)
+    assert stats["bytes_out"] == len(prepared.data)
@@ -0,0 +1,167 @@
+import asyncio
+import os
+
+import pytest
+
+pytest.importorskip("fitz")
+
+import knowledge_base as knowledge_base_module  # noqa: E402
+from knowledge_base import KnowledgeBase  # noqa: E402
+from text_chunker import TextChunker  # noqa: E402
+
+
+def write(path, text, mtime_ns=None):
+    path.write_text(text, encoding="utf-8")
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def files_of(knowledge_base, question):
+    return {record.file for record in knowledge_base.search(question)}
+
+
+@pytest.fixture
+def knowledge_dir(tmp_path):
+    folder = tmp_path / "knowledge"
+    folder.mkdir()
+    write(folder / "versand.txt", "Die Lieferzeit beträgt drei Werktage.\n\nVersand ist ab 50 Euro kostenlos.")
+    write(folder / "retouren.md", "# Retouren\n\nRücksendungen sind 14 Tage lang möglich.")
+    return folder
+
+
+@pytest.mark.parametrize("with_cache", [False, True], ids=["no-cache", "cache"])
+def test_reload_adds_changes_and_removes_files(tmp_path, knowledge_dir, with_cache):
+    cache_dir = str(tmp_path / "cache") if with_cache else None
+    knowledge_base = KnowledgeBase(str(knowledge_dir), cache_dir=cache_dir)
+    reloads = []
+    knowledge_base.on_reload(lambda: reloads.append(knowledge_base.version))
+
+    async def scenario():
+        first = await knowledge_base.reload()
+        assert first == {"added": 2, "changed": 0, "removed": 0, "unchanged": 0}
+        assert sorted(knowledge_base.get_loaded_files()) == ["retouren.md", "versand.txt"]
+        assert files_of(knowledge_base, "Rücksendungen") == {"retouren.md"}
+        version = knowledge_base.version
+
+        assert await knowledge_base.reload() == {"added": 0, "changed": 0, "removed": 0, "unchanged": 2}
+        assert knowledge_base.version == version
+        unchanged_index = knowledge_base.index
+
+        write(knowledge_dir / "zahlung.txt", "Wir akzeptieren PayPal und Rechnung.")
+        write(knowledge_dir / "versand.txt", "Die Lieferzeit beträgt einen Werktag.", mtime_ns=1_000_000_000)
+        (knowledge_dir / "retouren.md").unlink()
+
+        second = await knowledge_base.reload()
+        assert second == {"added": 1, "changed": 1, "removed": 1, "unchanged": 0}
+        assert knowledge_base.index is not unchanged_index
+        assert sorted(knowledge_base.get_loaded_files()) == ["versand.txt", "zahlung.txt"]
+        assert {record.file for record in knowledge_base.index.records} == {"versand.txt", "zahlung.txt"}
+        assert files_of(knowledge_base, "PayPal") == {"zahlung.txt"}
+        assert knowledge_base.get_file_content("versand.txt") == "Die Lieferzeit beträgt einen Werktag."
+        assert knowledge_base.version != version
+        assert reloads == [knowledge_base.version]
+
+    asyncio.run(scenario())
+
+
+def test_unchanged_documents_are_reused(knowledge_dir):
+    knowledge_base = KnowledgeBase(str(knowledge_dir))
+
+    async def scenario():
+        await knowledge_base.reload()
+        retouren = knowledge_base._documents["retouren.md"]
+        write(knowledge_dir / "versand.txt", "Neu: Express-Versand 10 Euro.", mtime_ns=1_000_000_000)
+        await knowledge_base.reload()
+        assert knowledge_base._documents["retouren.md"] is retouren
+
+    asyncio.run(scenario())
+
+
+def test_chunk_offsets_point_into_the_file(knowledge_dir):
+    knowledge_base = KnowledgeBase(str(knowledge_dir))
+    asyncio.run(knowledge_base.reload())
+    text = (knowledge_dir / "versand.txt").read_text(encoding="utf-8")
+    for record in knowledge_base.index.records:
+        if record.file == "versand.txt":
+            assert text[record.offset:record.offset + len(record.text)] == record.text
+
+
+def read_blocks(path, monkeypatch, block_size):
+    monkeypatch.setattr(knowledge_base_module, "TEXT_BLOCK_SIZE", block_size)
+    return [text for batch in knowledge_base_module._read_text_blocks(path, "utf-8") for _, text in batch]
+
+
+def test_small_text_file_is_one_block(tmp_path, monkeypatch):
+    path = tmp_path / "b.md"
+    write(path, "# Versand\n\nStandard 5 Euro.\n\nNeu: Express-Versand 10 Euro.")
+    assert read_blocks(path, monkeypatch, 1024) == [path.read_text(encoding="utf-8")]
+
+
+def test_large_text_file_is_split_at_paragraphs(tmp_path, monkeypatch):
+    path = tmp_path / "gross.txt"
+    paragraphs = [f"Absatz {number}: " + "wort " * (number % 7 + 3) for number in range(200)]
+    write(path, "\n\n".join(paragraphs))
+    blocks = read_blocks(path, monkeypatch, 256)
+    assert "".join(blocks) == path.read_text(encoding="utf-8")
+    assert len(blocks) > 1
+    assert all(block.endswith("\n\n") for block in blocks[:-1])
+    assert all(len(block) <= 256 for block in blocks)
+
+
+def test_small_file_keeps_last_paragraph_in_context(knowledge_dir):
+    write(knowledge_dir / "b.md", "# Versand\n\nStandard 5 Euro.\n\nNeu: Express-Versand 10 Euro.")
+    knowledge_base = KnowledgeBase(str(knowledge_dir))
+    asyncio.run(knowledge_base.reload())
+    assert [record.text for record in knowledge_base.index.records if record.file == "b.md"] == [
+        "# Versand\n\nStandard 5 Euro.\n\nNeu: Express-Versand 10 Euro."
+    ]
+
+
+def write_pdf(path, pages):
+    import fitz
+
+    document = fitz.open()
+    for text in pages:
+        page = document.new_page()
+        page.insert_text((72, 72), text)
+    document.save(str(path))
+    document.close()
+
+
+def test_pdf_is_extracted_and_reloaded_through_the_process_pool(tmp_path):
+    folder = tmp_path / "knowledge"
+    folder.mkdir()
+    write_pdf(folder / "handbuch.pdf", ["Seite eins zur Lieferzeit", "Seite zwei zu PayPal", "Seite drei zum Umtausch"])
+    knowledge_base = KnowledgeBase(str(folder), pdf_workers=2, pages_per_task=1)
+
+    async def scenario():
+        assert (await knowledge_base.reload())["added"] == 1
+        assert knowledge_base._process_pool._mp_context.get_start_method() == "spawn"
+        assert files_of(knowledge_base, "PayPal") == {"handbuch.pdf"}
+        content = knowledge_base.get_file_content("handbuch.pdf")
+        assert content.index("Lieferzeit") < content.index("PayPal") < content.index("Umtausch")
+
+        write_pdf(folder / "handbuch.pdf", ["Seite eins zur Rechnung"])
+        os.utime(folder / "handbuch.pdf", ns=(1_000_000_000, 1_000_000_000))
+        assert (await knowledge_base.reload())["changed"] == 1
+        assert "Rechnung" in knowledge_base.get_file_content("handbuch.pdf")
+        assert "PayPal" not in knowledge_base.get_file_content("handbuch.pdf")
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        knowledge_base.close()
+
+
+def test_file_content_does_not_repeat_overlapping_text(tmp_path):
+    folder = tmp_path / "knowledge"
+    folder.mkdir()
+    text = " ".join(f"Satz {number} beschreibt die Lieferzeit für Paket {number}." for number in range(40))
+    write(folder / "lang.txt", text + "\n\nZweiter Absatz zu Rücksendungen.")
+    knowledge_base = KnowledgeBase(str(folder), chunker=TextChunker(max_chunk_size=200, overlap=80))
+    asyncio.run(knowledge_base.reload())
+
+    records = knowledge_base.index.records
+    assert any(following.offset < previous.offset + len(previous.text)
+               for previous, following in zip(records, records[1:]))
+    assert knowledge_base.get_file_content("lang.txt") == text + "\n\nZweiter Absatz zu Rücksendungen."
@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+
+from llm_dispatch import LLMDispatcher
+from scheduler import Priority, RequestScheduler
+
+
+class StubModel:
+    def __init__(self):
+        self.running = 0
+        self.peak = 0
+        self.release = asyncio.Event()
+
+    async def generate_content_async(self, contents, **kwargs):
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            await self.release.wait()
+            return contents
+        finally:
+            self.running -= 1
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+@pytest.mark.parametrize("limit_concurrency, peak", [(True, 2), (False, 5)])
+def test_semaphore_only_when_limiting(limit_concurrency, peak):
+    async def scenario():
+        model = StubModel()
+        dispatcher = LLMDispatcher(max_in_flight=2, limit_concurrency=limit_concurrency)
+        tasks = [asyncio.create_task(dispatcher.generate(model, f"frage {number}")) for number in range(5)]
+        await settle()
+        assert model.peak == peak
+        model.release.set()
+        assert await asyncio.gather(*tasks) == [f"frage {number}" for number in range(5)]
+        stats = dispatcher.get_stats()
+        assert stats["completed"] == 5
+        assert stats["in_flight"] == 0
+        dispatcher.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_scheduler_is_the_only_limit():
+    async def scenario():
+        model = StubModel()
+        scheduler = RequestScheduler(max_concurrent=2, user_rate_per_minute=0)
+        dispatcher = LLMDispatcher(max_in_flight=scheduler.max_concurrent, limit_concurrency=False)
+        order = []
+
+        async def ask(name, priority):
+            async with scheduler.slot(1, priority):
+                order.append(name)
+                return await dispatcher.generate(model, name)
+
+        tasks = [asyncio.create_task(ask(f"auto {number}", Priority.AUTO)) for number in range(3)]
+        await settle()
+        tasks.append(asyncio.create_task(ask("explizit", Priority.EXPLICIT)))
+        await settle()
+        assert model.running == 2
+        assert scheduler.get_stats()["queue_depth"] == 2
+        assert dispatcher.get_stats()["queue_depth"] == 0
+        model.release.set()
+        await asyncio.gather(*tasks)
+        # Die explizite Anfrage überholt die wartende automatische
+        assert order == ["auto 0", "auto 1", "explizit", "auto 2"]
+        dispatcher.shutdown()
+
+    asyncio.run(scenario())
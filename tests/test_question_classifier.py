@@ -0,0 +1,47 @@
+import pytest
+
+from question_classifier import QuestionClassifier
+
+
+@pytest.fixture(scope="module")
+def classifier():
+    return QuestionClassifier()
+
+
+@pytest.mark.parametrize("text", [
+    "Wie lange dauert der Versand nach Österreich?",
+    "Was kostet der Premium-Tarif im Monat?",
+    "wie richte ich facebook ads für mehrere länder ein",
+    "Kann ich meine Bestellung noch ändern?",
+    "Bitte hilf mir mit den Versandregeln",
+    "Was für ein Netzteil brauche ich?",
+    "Does anyone know a good supplier for phone cases",
+])
+def test_questions(classifier, text):
+    assert classifier.is_question(text)
+
+
+@pytest.mark.parametrize("text", [
+    "Ich habe heute etwas Neues gelernt",
+    "Die Kanne Kaffee ist leer",
+    "Was für ein geiler Tag heute",
+    "Wie immer zu spät lol",
+    "Wie gesagt, ich melde mich morgen",
+    "Danke für die schnelle Hilfe!",
+    "https://example.com/produkt/12345",
+    "lol",
+])
+def test_chat(classifier, text):
+    assert not classifier.is_question(text)
+
+
+def test_german_was_counts_once(classifier):
+    features = classifier.features("Was kostet das?")
+    assert "leading_interrogative" in features
+    assert "leading_verb" not in features
+
+
+def test_threshold_and_weights_are_configurable():
+    text = "Hat jemand Tipps"
+    assert QuestionClassifier(threshold=10).is_question(text) is False
+    assert QuestionClassifier(weights={"help_request": 0.0, "leading_verb": 0.0}).classify(text).score < 1.5
@@ -0,0 +1,54 @@
+import pytest
+
+from retrieval import BM25Engine, PostingsSegment, TfidfEngine, create_engine, np, sparse
+
+CHUNKS = [
+    "Die Lieferzeit nach Deutschland beträgt drei bis fünf Werktage.",
+    "Rücksendungen sind innerhalb von 14 Tagen kostenlos möglich.",
+    "Zahlungsanbieter: PayPal, Kreditkarte und Rechnung.",
+    "Express-Versand kostet 10 Euro und dauert einen Werktag.",
+]
+
+ENGINES = [BM25Engine]
+if np is not None and sparse is not None:
+    ENGINES.append(TfidfEngine)
+
+
+@pytest.fixture(params=ENGINES, ids=lambda engine: engine.__name__)
+def engine(request):
+    return request.param().build(CHUNKS)
+
+
+def test_search_ranks_matching_chunk_first(engine):
+    results = engine.search("Wie lange ist die Lieferzeit?", top_k=2)
+    assert results[0][0] == 0
+    assert all(score > 0 for _, score in results)
+
+
+def test_search_without_known_terms_returns_nothing(engine):
+    assert engine.search("Quantenchromodynamik", top_k=5) == []
+    assert engine.search("Lieferzeit", top_k=0) == []
+
+
+def test_search_many_matches_single_searches(engine):
+    queries = ["Rücksendungen kostenlos", "Express Versand Euro", "unbekannt"]
+    many = engine.search_many(queries, top_k=3)
+    for query, results in zip(queries, many):
+        single = engine.search(query, top_k=3)
+        assert [chunk_id for chunk_id, _ in results] == [chunk_id for chunk_id, _ in single]
+        assert [score for _, score in results] == pytest.approx([score for _, score in single])
+
+
+def test_segments_shift_chunk_ids(engine):
+    segments = [PostingsSegment.build(CHUNKS[:2], engine.analyzer), PostingsSegment.build(CHUNKS[2:], engine.analyzer)]
+    merged = type(engine)().build_from_segments(segments)
+    assert merged.search("Express Versand", top_k=1)[0][0] == 3
+    assert merged.search("Express Versand", top_k=1)[0][1] == pytest.approx(engine.search("Express Versand", 1)[0][1])
+
+
+def test_empty_engine_returns_nothing():
+    assert BM25Engine().build([]).search("Lieferzeit") == []
+
+
+def test_create_engine_falls_back_to_bm25():
+    assert isinstance(create_engine("unbekannt"), BM25Engine)
@@ -0,0 +1,192 @@
+import asyncio
+
+import pytest
+
+from scheduler import Priority, QueueFull, RateLimited, RequestScheduler
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+class Holder:
+    """
+    Hält einen Slot, bis release() aufgerufen wird, und merkt sich die Reihenfolge der Zuteilung
+    """
+
+    def __init__(self, scheduler, order):
+        self.scheduler = scheduler
+        self.order = order
+        self.events = {}
+
+    def start(self, name, guild_id=1, priority=Priority.AUTO):
+        self.events[name] = asyncio.Event()
+
+        async def use():
+            async with self.scheduler.slot(guild_id, priority):
+                self.order.append(name)
+                await self.events[name].wait()
+
+        return asyncio.create_task(use())
+
+    def release(self, name):
+        self.events[name].set()
+
+
+def test_slots_are_limited_and_handed_over_in_priority_order():
+    async def scenario():
+        scheduler = RequestScheduler(max_concurrent=1, max_queue=10, user_rate_per_minute=0)
+        order = []
+        holder = Holder(scheduler, order)
+        tasks = [holder.start("erste", priority=Priority.EXPLICIT)]
+        await settle()
+        tasks.append(holder.start("auto", priority=Priority.AUTO))
+        tasks.append(holder.start("explizit", priority=Priority.EXPLICIT))
+        await settle()
+        assert order == ["erste"]
+        assert scheduler.get_stats()["queue_depth"] == 2
+
+        for name in ("erste", "explizit", "auto"):
+            holder.release(name)
+            await settle()
+        await asyncio.gather(*tasks)
+        assert order == ["erste", "explizit", "auto"]
+        stats = scheduler.get_stats()
+        assert (stats["active"], stats["queue_depth"]) == (0, 0)
+
+    run(scenario())
+
+
+def test_guilds_are_served_fairly():
+    async def scenario():
+        scheduler = RequestScheduler(max_concurrent=1, max_queue=10, user_rate_per_minute=0)
+        order = []
+        holder = Holder(scheduler, order)
+        tasks = [holder.start("start", guild_id=0)]
+        await settle()
+        for name in ("a1", "a2", "a3"):
+            tasks.append(holder.start(name, guild_id="a"))
+        tasks.append(holder.start("b1", guild_id="b"))
+        await settle()
+        for name in ("start", "a1", "b1", "a2", "a3"):
+            holder.release(name)
+            await settle()
+        await asyncio.gather(*tasks)
+        assert order == ["start", "a1", "b1", "a2", "a3"]
+
+    run(scenario())
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def scenario():
+        scheduler = RequestScheduler(max_concurrent=1, max_queue=10, user_rate_per_minute=0)
+        order = []
+        holder = Holder(scheduler, order)
+        first = holder.start("erste")
+        await settle()
+        waiting = holder.start("wartend")
+        await settle()
+        assert scheduler.get_stats()["queue_depth"] == 1
+
+        waiting.cancel()
+        await settle()
+        assert scheduler.get_stats()["queue_depth"] == 0
+        holder.release("erste")
+        await first
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        stats = scheduler.get_stats()
+        assert (stats["active"], stats["queue_depth"]) == (0, 0)
+        assert order == ["erste"]
+
+    run(scenario())
+
+
+def test_shed_and_then_cancelled_waiter_does_not_release_a_slot():
+    async def scenario():
+        scheduler = RequestScheduler(max_concurrent=1, max_queue=1, user_rate_per_minute=0)
+        order = []
+        holder = Holder(scheduler, order)
+        first = holder.start("erste", priority=Priority.EXPLICIT)
+        await settle()
+        shed = holder.start("auto", priority=Priority.AUTO)
+        await asyncio.sleep(0)
+        important = holder.start("explizit", priority=Priority.EXPLICIT)
+        await asyncio.sleep(0)
+        # "auto" wurde verdrängt (QueueFull gesetzt), wird aber abgebrochen, bevor es das merkt
+        shed.cancel()
+        await settle()
+
+        assert order == ["erste"]
+        assert scheduler.get_stats()["active"] == 1
+
+        holder.release("erste")
+        await settle()
+        assert order == ["erste", "explizit"]
+        holder.release("explizit")
+        await asyncio.gather(first, important)
+        with pytest.raises(asyncio.CancelledError):
+            await shed
+        stats = scheduler.get_stats()
+        assert (stats["active"], stats["queue_depth"]) == (0, 0)
+
+    run(scenario())
+
+
+def test_full_queue_rejects_requests_of_equal_priority():
+    async def scenario():
+        scheduler = RequestScheduler(max_concurrent=1, max_queue=1, user_rate_per_minute=0)
+        holder = Holder(scheduler, [])
+        first = holder.start("erste")
+        await settle()
+        waiting = holder.start("wartend")
+        await settle()
+        with pytest.raises(QueueFull):
+            async with scheduler.slot(1, Priority.AUTO):
+                pass
+        holder.release("erste")
+        holder.release("wartend")
+        await asyncio.gather(first, waiting)
+        assert scheduler.get_stats()["shed"] == 1
+
+    run(scenario())
+
+
+def test_rate_limit_after_burst():
+    scheduler = RequestScheduler(user_rate_per_minute=6, user_burst=2)
+    scheduler.check_rate("user")
+    scheduler.check_rate("user")
+    with pytest.raises(RateLimited) as error:
+        scheduler.check_rate("user")
+    assert 0 < error.value.retry_after <= 10
+    scheduler.check_rate("anderer user")
+
+
+def test_shutdown_rejects_waiting_and_new_requests():
+    async def scenario():
+        scheduler = RequestScheduler(max_concurrent=1, user_rate_per_minute=0)
+        order = []
+        holder = Holder(scheduler, order)
+        active = holder.start("aktiv")
+        await settle()
+        waiting = holder.start("wartend")
+        await settle()
+        scheduler.shutdown()
+        with pytest.raises(QueueFull):
+            await waiting
+        with pytest.raises(QueueFull):
+            async with scheduler.slot(1):
+                pass
+        holder.release("aktiv")
+        await active
+        assert order == ["aktiv"]
+        stats = scheduler.get_stats()
+        assert stats["active"] == 0
+        assert stats["queue_depth"] == 0
+
+    run(scenario())
@@ -0,0 +1,144 @@
+import asyncio
+
+import pytest
+
+from singleflight import SingleFlight
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_concurrent_calls_share_one_execution():
+    async def scenario():
+        flights = SingleFlight()
+        calls = 0
+        release = asyncio.Event()
+
+        async def work():
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return "antwort"
+
+        tasks = [asyncio.create_task(flights.do("frage", work)) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*tasks)
+        assert calls == 1
+        assert sorted(shared for _, shared in results) == [False, True, True]
+        assert {answer for answer, _ in results} == {"antwort"}
+        assert flights.get_stats()["in_flight"] == 0
+
+    run(scenario())
+
+
+def test_errors_reach_all_waiters():
+    async def scenario():
+        flights = SingleFlight()
+        release = asyncio.Event()
+
+        async def fail():
+            await release.wait()
+            raise ValueError("kaputt")
+
+        tasks = [asyncio.create_task(flights.do("frage", fail)) for _ in range(2)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        assert all(isinstance(result, ValueError) for result in results)
+        assert flights.get_stats()["failed"] == 1
+
+    run(scenario())
+
+
+def test_cancelled_leader_hands_over_to_a_waiter():
+    async def scenario():
+        flights = SingleFlight()
+        started = []
+        release = asyncio.Event()
+
+        def work(name):
+            async def call():
+                started.append(name)
+                await release.wait()
+                return name
+            return call
+
+        leader = asyncio.create_task(flights.do("frage", work("leader")))
+        await asyncio.sleep(0)
+        followers = [asyncio.create_task(flights.do("frage", work(f"follower{i}"))) for i in range(2)]
+        await asyncio.sleep(0)
+
+        leader.cancel()
+        for _ in range(5):
+            await asyncio.sleep(0)
+        release.set()
+
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        results = await asyncio.gather(*followers)
+        # Genau ein Wartender übernimmt, der andere bekommt dessen Ergebnis
+        assert started == ["leader", "follower0"]
+        assert results == [("follower0", False), ("follower0", True)]
+        assert flights.get_stats()["retried"] == 2
+
+    run(scenario())
+
+
+def test_cancelled_waiter_does_not_cancel_the_call():
+    async def scenario():
+        flights = SingleFlight()
+        release = asyncio.Event()
+
+        async def work():
+            await release.wait()
+            return "antwort"
+
+        leader = asyncio.create_task(flights.do("frage", work))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flights.do("frage", work))
+        await asyncio.sleep(0)
+        follower.cancel()
+        release.set()
+        assert await leader == ("antwort", False)
+        with pytest.raises(asyncio.CancelledError):
+            await follower
+
+    run(scenario())
+
+
+class Rejected(Exception):
+    pass
+
+
+def test_leader_error_lets_a_waiter_run_its_own_call():
+    async def scenario():
+        flights = SingleFlight(leader_errors=(Rejected,))
+        release = asyncio.Event()
+        callers = []
+
+        def work_for(user):
+            async def work():
+                await release.wait()
+                callers.append(user)
+                if user == "gesperrt":
+                    raise Rejected(user)
+                return f"antwort für {user}"
+            return work
+
+        leader = asyncio.create_task(flights.do("frage", work_for("gesperrt")))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flights.do("frage", work_for("frei")))
+        await asyncio.sleep(0)
+        release.set()
+
+        with pytest.raises(Rejected):
+            await leader
+        assert await follower == ("antwort für frei", False)
+        assert callers == ["gesperrt", "frei"]
+        stats = flights.get_stats()
+        assert stats["retried"] == 1
+        assert stats["failed"] == 0
+
+    run(scenario())
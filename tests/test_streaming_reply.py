@@ -0,0 +1,130 @@
+import asyncio
+
+import pytest
+
+import streaming_reply
+from streaming_reply import StreamingReply
+
+
+class FakeMessage:
+    def __init__(self, content):
+        self.content = content
+        self.edits = []
+
+    async def edit(self, content):
+        self.content = content
+        self.edits.append(content)
+
+
+class FakeChannel:
+    def __init__(self):
+        self.sent = []
+
+    async def send_first(self, content):
+        return self._send("first", content)
+
+    async def send_followup(self, content):
+        return self._send("followup", content)
+
+    def _send(self, kind, content):
+        message = FakeMessage(content)
+        self.sent.append((kind, message))
+        return message
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(streaming_reply.time, "perf_counter", lambda: now[0])
+    return now
+
+
+def make_reply(channel, **options):
+    return StreamingReply(channel.send_first, channel.send_followup, **options)
+
+
+def test_edits_are_batched_by_interval(clock):
+    channel = FakeChannel()
+    reply = make_reply(channel, edit_interval=1.0)
+
+    async def scenario():
+        await reply.feed("Hallo")
+        clock[0] += 0.2
+        await reply.feed(" Welt")
+        clock[0] += 0.2
+        await reply.feed(", wie")
+        first = channel.sent[0][1]
+        assert first.content == "Hallo"
+        assert first.edits == []
+
+        clock[0] += 1.0
+        await reply.feed(" geht's?")
+        assert first.edits == ["Hallo Welt, wie geht's?"]
+        return await reply.finish()
+
+    assert asyncio.run(scenario()) == "Hallo Welt, wie geht's?"
+    assert [kind for kind, _ in channel.sent] == ["first"]
+    assert reply.edit_count == 1
+    assert reply.time_to_first_message == 0.0
+
+
+def test_finish_flushes_pending_text(clock):
+    channel = FakeChannel()
+    reply = make_reply(channel, edit_interval=10.0)
+
+    async def scenario():
+        await reply.feed("Erster Teil.")
+        await reply.feed(" Zweiter Teil.")
+        assert channel.sent[0][1].content == "Erster Teil."
+        return await reply.finish()
+
+    text = asyncio.run(scenario())
+    assert text == "Erster Teil. Zweiter Teil."
+    assert channel.sent[0][1].content == text
+    assert reply.messages == [channel.sent[0][1]]
+
+
+def test_long_answers_roll_over_into_new_messages(clock):
+    channel = FakeChannel()
+    reply = make_reply(channel, edit_interval=0.0)
+    sentence = "Das ist ein Satz über Lieferzeiten. "
+
+    async def scenario():
+        for _ in range(120):
+            await reply.feed(sentence)
+        return await reply.finish()
+
+    text = asyncio.run(scenario())
+    assert text == sentence * 120
+    assert [kind for kind, _ in channel.sent] == ["first", "followup", "followup"]
+    contents = [message.content for _, message in channel.sent]
+    assert all(len(content) <= streaming_reply.DISCORD_MESSAGE_LIMIT for content in contents)
+    assert all(content.endswith("Lieferzeiten.") for content in contents)
+    assert " ".join(contents) == text.strip()
+    assert reply.messages == [message for _, message in channel.sent]
+
+
+def test_word_longer_than_limit_is_split_hard(clock):
+    channel = FakeChannel()
+    reply = make_reply(channel, max_length=10)
+
+    async def scenario():
+        await reply.feed("x" * 25)
+        return await reply.finish()
+
+    assert asyncio.run(scenario()) == "x" * 25
+    assert [message.content for _, message in channel.sent] == ["x" * 10, "x" * 10, "x" * 5]
+
+
+def test_empty_pieces_send_nothing(clock):
+    channel = FakeChannel()
+    reply = make_reply(channel)
+
+    async def scenario():
+        await reply.feed("")
+        await reply.feed("   ")
+        return await reply.finish()
+
+    assert asyncio.run(scenario()) == "   "
+    assert channel.sent == []
+    assert reply.messages == []
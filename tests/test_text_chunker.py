@@ -0,0 +1,79 @@
+import random
+
+import pytest
+
+from text_chunker import TextChunker
+
+
+def words(count, seed=0):
+    rng = random.Random(seed)
+    return " ".join(rng.choice(["Versand", "Lieferzeit", "Rücksendung", "Rechnung", "Kunde", "Paket"])
+                    for _ in range(count))
+
+
+def sample_text(seed=0):
+    rng = random.Random(seed)
+    paragraphs = []
+    for _ in range(40):
+        sentences = [words(rng.randint(3, 40), rng.random()) + rng.choice([".", "!", "?"])
+                     for _ in range(rng.randint(1, 12))]
+        paragraphs.append(" ".join(sentences))
+    return rng.choice(["\n\n", "\n"]).join(paragraphs)
+
+
+def check_spans(chunker, text):
+    spans = list(chunker.iter_spans(text))
+    for (start, end), (next_start, next_end) in zip(spans, spans[1:]):
+        assert next_start > start
+        assert next_end > end
+        if not chunker.overlap:
+            assert next_start >= end
+    for start, end in spans:
+        assert 0 <= start < end <= len(text)
+        assert end - start <= chunker.max_chunk_size
+        assert not text[start].isspace() and not text[end - 1].isspace()
+    covered = set()
+    for start, end in spans:
+        covered.update(range(start, end))
+    assert all(text[position].isspace() for position in range(len(text)) if position not in covered)
+    return spans
+
+
+@pytest.mark.parametrize("overlap", [0, 50, 200, 1000])
+@pytest.mark.parametrize("seed", range(5))
+def test_span_invariants(overlap, seed):
+    check_spans(TextChunker(max_chunk_size=500, overlap=overlap), sample_text(seed))
+
+
+def test_chunks_keep_original_text():
+    text = "Erster Satz! Zweiter Satz?\n\nNeuer Absatz.   Mit Leerraum."
+    chunker = TextChunker(max_chunk_size=20)
+    assert chunker.split_into_chunks(text) == [text[start:end] for start, end in chunker.iter_spans(text)]
+    assert chunker.split_into_chunks(text)[0] == "Erster Satz!"
+
+
+def test_no_redundant_spans_after_paragraph_cut():
+    text = words(200, 1) + "\n\n" + words(600, 2)
+    chunker = TextChunker(max_chunk_size=2000, overlap=200)
+    spans = check_spans(chunker, text)
+    paragraph = text.index("\n\n")
+    assert [end for _, end in spans].count(paragraph) == 1
+    assert spans[1][0] == paragraph + 2
+
+
+def test_overlap_after_sentence_cut():
+    text = " ".join(f"Satz Nummer {number} über Lieferzeiten." for number in range(100))
+    spans = check_spans(TextChunker(max_chunk_size=300, overlap=100), text)
+    assert all(next_start < end for (_, end), (next_start, _) in zip(spans, spans[1:]))
+
+
+def test_long_word_is_split_hard():
+    text = "x" * 1200 + " ende"
+    spans = check_spans(TextChunker(max_chunk_size=500), text)
+    assert spans[:2] == [(0, 500), (500, 1000)]
+
+
+def test_empty_and_whitespace_only_text():
+    chunker = TextChunker(overlap=100)
+    assert chunker.split_into_chunks("") == []
+    assert chunker.split_into_chunks(" \n\n  ") == []
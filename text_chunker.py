@@ -5,18 +5,59 @@ Implementiert intelligente Textaufteilung und Relevanz-Bewertung
 
 import re
 import logging
-from typing import List, Tuple
-import math
+from typing import Iterator, List, Set, Tuple
 
 logger = logging.getLogger(__name__)
 
+# Deutsche Stoppwörter, die bei der Relevanz-Bewertung ignoriert werden
+GERMAN_STOP_WORDS = frozenset({
+    'der', 'die', 'das', 'und', 'oder', 'aber', 'ein', 'eine', 'einen',
+    'ist', 'sind', 'war', 'waren', 'hat', 'haben', 'wird', 'werden',
+    'ich', 'du', 'er', 'sie', 'es', 'wir', 'ihr', 'sie', 'mich', 'dich',
+    'sich', 'uns', 'euch', 'ihm', 'ihr', 'ihnen', 'sein', 'seine', 'ihre',
+    'mit', 'von', 'zu', 'bei', 'auf', 'in', 'an', 'für', 'über', 'unter',
+    'durch', 'gegen', 'ohne', 'um', 'während', 'vor', 'nach', 'seit',
+    'bis', 'trotz', 'wegen', 'statt', 'anstatt', 'außer', 'innerhalb'
+})
+
+WORD_PATTERN = re.compile(r'\b\w+\b')
+WHITESPACE_PATTERN = re.compile(r'\s+')
+# Gierig verankert: ein match() liefert direkt das letzte Satzende bzw. den letzten
+# Leerraum im Bereich (Rückwärtssuche in C statt finditer über alle Treffer)
+LAST_SENTENCE_END_PATTERN = re.compile(r'.*[.!?](?=\s)', re.DOTALL)
+LAST_WHITESPACE_PATTERN = re.compile(r'.*\s(?=.)', re.DOTALL)
+
+
+def _skip_whitespace(text: str, position: int, length: int) -> int:
+    while position < length and text[position].isspace():
+        position += 1
+    return position
+
+
+def _trim_whitespace(text: str, start: int, end: int) -> int:
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return end
+
+
+def _last_match_end(pattern: re.Pattern, text: str, start: int, end: int) -> int:
+    """
+    Ende des letzten Treffers von pattern in text[start:end] (-1 wenn keiner)
+    Das Zeichen direkt nach end darf nur vom Lookahead gelesen werden
+    """
+    match = pattern.match(text, start, end + 1)
+    return match.end() if match else -1
+
+
 class TextChunker:
     """
     Intelligenter Text-Chunker für optimale AI-Prompt-Erstellung
     """
     
-    def __init__(self, max_chunk_size: int = 2000):
+    def __init__(self, max_chunk_size: int = 2000, overlap: int = 0):
         self.max_chunk_size = max_chunk_size
+        # Überlappung benachbarter Chunks in Zeichen (0 = keine), höchstens ein halber Chunk
+        self.overlap = max(0, min(overlap, max_chunk_size // 2))
         # Vereinfachte Token-Schätzung: ~4 Zeichen = 1 Token (für deutsche Texte)
         self.chars_per_token = 4
     
@@ -27,133 +68,84 @@ class TextChunker:
         """
         return len(text) // self.chars_per_token
     
-    def split_into_chunks(self, text: str) -> List[str]:
+    def iter_spans(self, text: str) -> Iterator[Tuple[int, int]]:
         """
-        Teilt einen Text in sinnvolle Chunks auf
-        Versucht an Absätzen, Sätzen und Wörtern zu trennen
+        Zerlegt einen Text in einem Durchgang in (start, ende)-Bereiche des Originaltexts
+        Getrennt wird bevorzugt an Absätzen, dann an Satzenden, dann an Leerraum; Satzzeichen
+        bleiben erhalten. Bei overlap > 0 beginnt jeder Chunk bis zu overlap Zeichen vor
+        dem Ende des vorherigen (an einer Wortgrenze), außer nach einer Absatzgrenze.
+        Jeder Chunk endet hinter dem vorherigen.
         """
-        if not text or not text.strip():
-            return []
-        
-        # Wenn Text kurz genug ist, direkt zurückgeben
-        if len(text) <= self.max_chunk_size:
-            return [text]
-        
-        chunks = []
-        
-        # Zunächst an doppelten Zeilenwechseln (Absätze) trennen
-        paragraphs = text.split('\n\n')
-        current_chunk = ""
-        
-        for paragraph in paragraphs:
-            # Wenn Absatz + aktueller Chunk zu lang wäre
-            if len(current_chunk) + len(paragraph) + 2 > self.max_chunk_size:
-                if current_chunk:
-                    chunks.append(current_chunk.strip())
-                    current_chunk = ""
-                
-                # Wenn ein einzelner Absatz zu lang ist, weiter aufteilen
-                if len(paragraph) > self.max_chunk_size:
-                    sub_chunks = self._split_long_paragraph(paragraph)
-                    chunks.extend(sub_chunks)
-                else:
-                    current_chunk = paragraph
+        length = len(text)
+        max_size = self.max_chunk_size
+        start = _skip_whitespace(text, 0, length)
+        previous_end = 0
+        while start < length:
+            limit = start + max_size
+            paragraph = False
+            if limit >= length:
+                end = length
+                next_start = length
             else:
-                if current_chunk:
-                    current_chunk += "\n\n" + paragraph
+                # Letzte Absatzgrenze im Fenster, sonst letztes Satzende, sonst letzter Leerraum;
+                # bei Überlappung nur hinter dem vorherigen Chunk (sonst wäre er darin enthalten)
+                lower = max(start, previous_end) + 1
+                cut = text.rfind('\n\n', lower, limit + 1)
+                if cut != -1:
+                    end, next_start = cut, cut + 2
+                    paragraph = True
                 else:
-                    current_chunk = paragraph
-        
-        # Letzten Chunk hinzufügen
-        if current_chunk:
-            chunks.append(current_chunk.strip())
-        
-        return [chunk for chunk in chunks if chunk.strip()]
-    
-    def _split_long_paragraph(self, paragraph: str) -> List[str]:
+                    cut = _last_match_end(LAST_SENTENCE_END_PATTERN, text, lower, limit)
+                    if cut == -1:
+                        cut = _last_match_end(LAST_WHITESPACE_PATTERN, text, lower, limit)
+                    if cut == -1:
+                        cut = limit  # ein Wort länger als max_chunk_size wird hart getrennt
+                    end = next_start = cut
+
+            chunk_end = _trim_whitespace(text, start, end)
+            if chunk_end > start:
+                yield start, chunk_end
+                previous_end = chunk_end
+
+            next_start = _skip_whitespace(text, next_start, length)
+            # Ein an einer Absatzgrenze endender Chunk schneidet nichts ab und braucht keine Überlappung
+            if self.overlap and not paragraph and next_start < length:
+                next_start = self._overlap_start(text, start, chunk_end, next_start)
+            start = next_start
+
+    def _overlap_start(self, text: str, start: int, chunk_end: int, next_start: int) -> int:
         """
-        Teilt lange Absätze an Satzgrenzen auf
+        Beginn des nächsten Chunks mit Überlappung: erste Wortgrenze nach chunk_end - overlap
         """
-        chunks = []
-        
-        # An Satzenden trennen (. ! ?)
-        sentences = re.split(r'[.!?]+\s+', paragraph)
-        current_chunk = ""
-        
-        for sentence in sentences:
-            sentence = sentence.strip()
-            if not sentence:
-                continue
-                
-            # Satzende-Zeichen wieder hinzufügen (außer beim letzten)
-            if not sentence.endswith(('.', '!', '?')):
-                sentence += '.'
-            
-            if len(current_chunk) + len(sentence) + 1 > self.max_chunk_size:
-                if current_chunk:
-                    chunks.append(current_chunk.strip())
-                    current_chunk = sentence
-                else:
-                    # Einzelner Satz ist zu lang - an Wörtern trennen
-                    word_chunks = self._split_long_sentence(sentence)
-                    chunks.extend(word_chunks)
-            else:
-                if current_chunk:
-                    current_chunk += " " + sentence
-                else:
-                    current_chunk = sentence
-        
-        if current_chunk:
-            chunks.append(current_chunk.strip())
-        
-        return chunks
-    
-    def _split_long_sentence(self, sentence: str) -> List[str]:
+        # Mindestens die halbe Chunk-Länge weiterrücken, damit kurze Chunks nicht vervielfacht werden
+        position = max((start + chunk_end) // 2 + 1, chunk_end - self.overlap)
+        match = WHITESPACE_PATTERN.search(text, position, chunk_end)
+        if match is None:
+            return next_start
+        return min(match.end(), next_start)
+
+    def split_into_chunks(self, text: str) -> List[str]:
         """
-        Teilt sehr lange Sätze an Wortgrenzen auf
+        Teilt einen Text in sinnvolle Chunks auf (siehe iter_spans)
         """
-        words = sentence.split()
-        chunks = []
-        current_chunk = ""
-        
-        for word in words:
-            if len(current_chunk) + len(word) + 1 > self.max_chunk_size:
-                if current_chunk:
-                    chunks.append(current_chunk.strip())
-                current_chunk = word
-            else:
-                if current_chunk:
-                    current_chunk += " " + word
-                else:
-                    current_chunk = word
-        
-        if current_chunk:
-            chunks.append(current_chunk.strip())
-        
-        return chunks
+        if not text:
+            return []
+        return [text[start:end] for start, end in self.iter_spans(text)]
+
+    def extract_terms(self, text: str) -> Set[str]:
+        """
+        Zerlegt einen Text in normalisierte Begriffe (lowercase, ohne Stoppwörter)
+        """
+        return set(WORD_PATTERN.findall(text.lower())) - GERMAN_STOP_WORDS
     
     def calculate_relevance_score(self, chunk: str, question: str) -> float:
         """
         Berechnet einen Relevanz-Score zwischen Chunk und Frage
         Basiert auf gemeinsamen Wörtern und Begriffen
         """
-        # Text normalisieren (lowercase, Interpunktion entfernen)
-        chunk_words = set(re.findall(r'\b\w+\b', chunk.lower()))
-        question_words = set(re.findall(r'\b\w+\b', question.lower()))
-        
-        # Deutsche Stoppwörter ausschließen
-        stop_words = {
-            'der', 'die', 'das', 'und', 'oder', 'aber', 'ein', 'eine', 'einen',
-            'ist', 'sind', 'war', 'waren', 'hat', 'haben', 'wird', 'werden',
-            'ich', 'du', 'er', 'sie', 'es', 'wir', 'ihr', 'sie', 'mich', 'dich',
-            'sich', 'uns', 'euch', 'ihm', 'ihr', 'ihnen', 'sein', 'seine', 'ihre',
-            'mit', 'von', 'zu', 'bei', 'auf', 'in', 'an', 'für', 'über', 'unter',
-            'durch', 'gegen', 'ohne', 'um', 'während', 'vor', 'nach', 'seit',
-            'bis', 'trotz', 'wegen', 'statt', 'anstatt', 'außer', 'innerhalb'
-        }
-        
-        chunk_words -= stop_words
-        question_words -= stop_words
+        # Text normalisieren (lowercase, Interpunktion und Stoppwörter entfernen)
+        chunk_words = self.extract_terms(chunk)
+        question_words = self.extract_terms(question)
         
         if not question_words:
             return 0.0
@@ -168,7 +160,6 @@ class TextChunker:
         jaccard_score = intersection / union
         
         # Bonus für direkte Übereinstimmungen in der ursprünglichen Frage
-        question_lower = question.lower()
         direct_matches = sum(1 for word in question_words if word in chunk.lower())
         direct_bonus = direct_matches / len(question_words) * 0.3
         
@@ -212,7 +203,7 @@ class TextChunker:
                 total_tokens += chunk_tokens
                 logger.debug(f"✅ Chunk hinzugefügt (Score: {score:.3f}, Tokens: {chunk_tokens})")
             else:
-                logger.debug(f"⏭️ Chunk übersprungen - Token-Limit erreicht")
+                logger.debug("⏭️ Chunk übersprungen - Token-Limit erreicht")
                 break
         
         logger.info(f"🎯 {len(selected_chunks)} relevante Chunks ausgewählt ({total_tokens} geschätzte Tokens)")